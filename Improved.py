@@ -1,15 +1,33 @@
 import tkinter as tk
-from tkinter import scrolledtext, ttk
-import pyautogui
+from tkinter import filedialog, scrolledtext, ttk
+import os
+import sys
 import threading
-import time
-import random
+from functools import partial
+from backends import BackendError, available_backends, create_backend, default_backend
+from calibrate import calibrate_backend
+from checkpoint import Checkpoint, CheckpointRecorder, clear_checkpoint, file_digest, load_checkpoint, text_digest
+from control import RunControl
+from engine import TypingEngine
+from hotkeys import CANCEL_KEY, PAUSE_KEY, TRIGGER_KEY, HotkeyError, HotkeyListener, format_hotkey
+from incremental import plan_edits
+from instrument import KeystrokeTrace
+from jobs import JobQueue, load_jobs
+from plan_cache import PlanCache
+from profiles import calibrated_wpm, save_profile
+from schedule import MODERN_PROFILE, compile_schedule, compile_stream, estimate_duration, format_duration
+from session_file import SessionCapture, SessionError, SessionReader, SessionWriter, is_session_file, new_session_path
+from sources import count_chars, iter_file_chunks, read_preview, rstrip_chunks, skip_chars, spool_stdin
+from sink import read_tk_clipboard
+from uipump import UIUpdatePump
+from verify import COPY, SELECT_ALL, Verifier, format_chord, parse_chord
+from whitespace import DEFAULT_EDITOR, EDITOR_PRESETS, plan_for_editor
 
 class ModernTextTyperApp:
     def __init__(self, root):
         self.root = root
         self.root.title("⚡ Ultra Fast Text Typer")
-        self.root.geometry("900x800")
+        self.root.geometry("900x850")
         self.root.minsize(850, 750)
         self.root.resizable(True, True)
         
@@ -32,6 +50,9 @@ class ModernTextTyperApp:
         # Configure modern ttk style
         self.setup_styles()
         
+        # Compiled plans of earlier runs, so repeated snippets start without compiling
+        self.plan_cache = PlanCache()
+        
         # Create main container with padding
         main_container = tk.Frame(root, bg=self.colors['bg_primary'])
         main_container.pack(fill=tk.BOTH, expand=True, padx=25, pady=25)
@@ -51,14 +72,55 @@ class ModernTextTyperApp:
         # Status section
         self.create_status_section(main_container)
         
-        # Help section
-        self.create_help_section(main_container)
+        # Help and the less used panels share one tabbed area, so the window fits small screens
+        self.create_panels(main_container)
         
         # Initialize control variables
         self.typing_active = False
         self.typing_thread = None
         self.countdown_thread = None
         
+        # Compiled typing schedule, reused while text and settings are unchanged
+        self.schedule = None
+        self.estimate_job = None
+        self.engine = None
+        self.runner = None  # ProcessEngine for the current run, if typing from a worker process
+        self.loop_driver = None  # TkLoopDriver, created the first time the event-loop engine is used
+        self.loop_engine = None  # AsyncTypingEngine for the current run, if typing on the event loop
+        self.hotkeys = None  # HotkeyListener while a hotkey-armed run is going
+        self.job_label = None  # queue position and label of the job being typed
+        self.control = None
+        
+        # Large-document mode: path of the file being typed, None for the text area
+        self.source_path = None
+        self.source_digest = None
+        self.source_chars = None  # characters (or keys of a replay) the file types
+        self.replay = None  # SessionReader when the open file is a recorded session
+        self.capture = None  # SessionCapture recording the current run, if recording is on
+        
+        # Where the last interrupted run stopped; survives cancel and restarts
+        self.checkpoint = load_checkpoint()
+        self.recorder = None
+        self.start_offset = 0
+        
+        # Text the target holds after the last completed run, for "Type only changes"
+        self.last_typed_text = None
+        self.typed_text = None
+        self.edit_plan = None
+        self.update_resume_button()
+        
+        # Worker threads never touch Tk; their updates go through this pump
+        self.ui = UIUpdatePump(root)
+        self.ui.register("status", self.status_var.set)
+        self.ui.register("timer", self.timer_var.set)
+        self.ui.register("progress", self.show_progress)
+        self.ui.register("job_progress", self.show_job_progress)
+        self.ui.start()
+        
+        # Keystroke injection backend
+        self.backend = None
+        self.select_backend(self.backend_var.get())
+        
     def setup_styles(self):
         """Setup modern ttk styles"""
         style = ttk.Style()
@@ -69,6 +131,19 @@ class ModernTextTyperApp:
                        troughcolor=self.colors['bg_accent'],
                        slidercolor=self.colors['accent_blue'])
         
+        # Configure notebook style
+        style.configure('Modern.TNotebook',
+                       background=self.colors['bg_primary'],
+                       borderwidth=0)
+        style.configure('Modern.TNotebook.Tab',
+                       background=self.colors['bg_accent'],
+                       foreground=self.colors['text_secondary'],
+                       font=("Segoe UI", 10, "bold"),
+                       padding=(12, 6))
+        style.map('Modern.TNotebook.Tab',
+                  background=[('selected', self.colors['bg_secondary'])],
+                  foreground=[('selected', self.colors['text_primary'])])
+        
     def create_header(self, parent):
         """Create modern header with title and subtitle"""
         header_frame = tk.Frame(parent, bg=self.colors['bg_primary'])
@@ -127,6 +202,7 @@ class ModernTextTyperApp:
             bd=5
         )
         self.input_text.pack(fill=tk.X)
+        self.input_text.bind("<<Modified>>", self.on_text_modified)
         
     def create_controls_section(self, parent):
         """Create controls with modern sliders and options"""
@@ -227,6 +303,21 @@ class ModernTextTyperApp:
         )
         self.delay_scale.pack(side=tk.RIGHT, padx=(20, 0))
         
+        # Arm and start from the target window with a global hotkey instead of the delay
+        self.use_hotkeys = tk.BooleanVar(value=False)
+        self.hotkey_check = tk.Checkbutton(
+            delay_frame,
+            text=f"⌨️ or wait for {format_hotkey(TRIGGER_KEY)}",
+            variable=self.use_hotkeys,
+            font=("Segoe UI", 10),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary'],
+            selectcolor=self.colors['bg_accent'],
+            activebackground=self.colors['bg_secondary'],
+            activeforeground=self.colors['text_primary']
+        )
+        self.hotkey_check.pack(side=tk.LEFT, padx=(20, 0))
+        
         # Options
         options_frame = tk.Frame(controls_grid, bg=self.colors['bg_secondary'])
         options_frame.pack(fill=tk.X)
@@ -234,8 +325,9 @@ class ModernTextTyperApp:
         self.human_variance = tk.BooleanVar(value=False)  # Disabled for max speed
         self.variance_check = tk.Checkbutton(
             options_frame,
-            text="🎯 Human-like variance (reduces speed)",
+            text="🎯 Human-like variance (same speed)",
             variable=self.human_variance,
+            command=self.schedule_estimate,
             font=("Segoe UI", 10),
             fg=self.colors['text_primary'],
             bg=self.colors['bg_secondary'],
@@ -245,11 +337,27 @@ class ModernTextTyperApp:
         )
         self.variance_check.pack(side=tk.LEFT)
         
+        # Retype only what changed since the last completed run
+        self.changes_only = tk.BooleanVar(value=False)
+        self.changes_check = tk.Checkbutton(
+            options_frame,
+            text="✏️ Type only changes",
+            variable=self.changes_only,
+            font=("Segoe UI", 10),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary'],
+            selectcolor=self.colors['bg_accent'],
+            activebackground=self.colors['bg_secondary'],
+            activeforeground=self.colors['text_primary']
+        )
+        self.changes_check.pack(side=tk.LEFT, padx=(20, 0))
+        
         self.instant_mode = tk.BooleanVar(value=False)
         self.instant_check = tk.Checkbutton(
             options_frame,
             text="⚡ INSTANT MODE (Maximum Speed)",
             variable=self.instant_mode,
+            command=self.schedule_estimate,
             font=("Segoe UI", 10, "bold"),
             fg=self.colors['accent_green'],
             bg=self.colors['bg_secondary'],
@@ -281,6 +389,24 @@ class ModernTextTyperApp:
         )
         self.start_button.pack(side=tk.LEFT, padx=(0, 15))
         
+        # Pause button
+        self.pause_button = tk.Button(
+            action_frame,
+            text="⏸ PAUSE",
+            command=self.toggle_pause,
+            font=("Segoe UI", 14, "bold"),
+            bg=self.colors['bg_accent'],
+            fg='white',
+            activebackground='#cc7000',
+            relief='flat',
+            bd=0,
+            padx=30,
+            pady=12,
+            cursor='hand2',
+            state=tk.DISABLED
+        )
+        self.pause_button.pack(side=tk.LEFT, padx=(0, 15))
+        
         # Cancel button
         self.cancel_button = tk.Button(
             action_frame,
@@ -299,6 +425,34 @@ class ModernTextTyperApp:
         )
         self.cancel_button.pack(side=tk.LEFT)
         
+        # Resume button - continues an interrupted run from its saved checkpoint
+        self.resume_button = tk.Button(
+            action_frame,
+            text="↩ RESUME LAST",
+            command=self.resume_typing,
+            font=("Segoe UI", 14, "bold"),
+            bg=self.colors['bg_accent'],
+            fg='white',
+            activebackground='#005a9e',
+            relief='flat',
+            bd=0,
+            padx=20,
+            pady=12,
+            cursor='hand2',
+            state=tk.DISABLED
+        )
+        self.resume_button.pack(side=tk.LEFT, padx=(15, 0))
+        
+        # Estimated typing time of the compiled schedule
+        self.estimate_label = tk.Label(
+            action_frame,
+            text="",
+            font=("Segoe UI", 10),
+            fg=self.colors['text_secondary'],
+            bg=self.colors['bg_primary']
+        )
+        self.estimate_label.pack(side=tk.LEFT, padx=(20, 0))
+        
         # Clear button
         self.clear_button = tk.Button(
             action_frame,
@@ -316,6 +470,329 @@ class ModernTextTyperApp:
         )
         self.clear_button.pack(side=tk.RIGHT)
         
+        # Open file button - large documents stream from disk instead of the text area
+        self.file_button = tk.Button(
+            action_frame,
+            text="📂 OPEN FILE",
+            command=self.toggle_file,
+            font=("Segoe UI", 12, "bold"),
+            bg=self.colors['bg_accent'],
+            fg=self.colors['text_primary'],
+            activebackground=self.colors['bg_secondary'],
+            relief='flat',
+            bd=0,
+            padx=20,
+            pady=8,
+            cursor='hand2'
+        )
+        self.file_button.pack(side=tk.RIGHT, padx=(0, 15))
+        
+    def create_panels(self, parent):
+        """Create the tabs holding help and the panels not needed for every run"""
+        self.panels = ttk.Notebook(parent, style='Modern.TNotebook')
+        self.panels.pack(fill=tk.BOTH, expand=True)
+        for title, create in (("💡 HOW TO USE", self.create_help_section),
+                              ("🔌 BACKEND", self.create_backend_section),
+                              ("📋 JOB QUEUE", self.create_queue_section),
+                              ("🎞 SESSIONS", self.create_session_section),
+                              ("📊 LAST RUN", self.create_report_section)):
+            tab = tk.Frame(self.panels, bg=self.colors['bg_secondary'])
+            self.panels.add(tab, text=title)
+            create(tab)
+            
+    def create_backend_section(self, parent):
+        """Create backend, target editor and verification controls"""
+        controls_grid = tk.Frame(parent, bg=self.colors['bg_secondary'])
+        controls_grid.pack(fill=tk.X, padx=20, pady=(15, 0))
+        
+        # Backend control
+        backend_frame = tk.Frame(controls_grid, bg=self.colors['bg_secondary'])
+        backend_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        backend_label = tk.Label(
+            backend_frame,
+            text="🔌 Injection Backend",
+            font=("Segoe UI", 10, "bold"),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary']
+        )
+        backend_label.pack(side=tk.LEFT)
+        
+        # Inject from a worker process so Tk redraws cannot delay keystrokes
+        self.isolate_typing = tk.BooleanVar(value=False)
+        self.isolate_check = tk.Checkbutton(
+            backend_frame,
+            text="🧵 Separate process",
+            variable=self.isolate_typing,
+            font=("Segoe UI", 10),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary'],
+            selectcolor=self.colors['bg_accent'],
+            activebackground=self.colors['bg_secondary'],
+            activeforeground=self.colors['text_primary']
+        )
+        self.isolate_check.pack(side=tk.LEFT, padx=(20, 0))
+        
+        # Or run countdown and typing as one coroutine on the Tk thread, with no threads at all
+        self.loop_typing = tk.BooleanVar(value=False)
+        self.loop_check = tk.Checkbutton(
+            backend_frame,
+            text="🔁 Event loop",
+            variable=self.loop_typing,
+            font=("Segoe UI", 10),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary'],
+            selectcolor=self.colors['bg_accent'],
+            activebackground=self.colors['bg_secondary'],
+            activeforeground=self.colors['text_primary']
+        )
+        self.loop_check.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Measured per-event cost of the selected backend
+        self.backend_cost_label = tk.Label(
+            backend_frame,
+            text="",
+            font=("Segoe UI", 10, "bold"),
+            fg=self.colors['accent_blue'],
+            bg=self.colors['bg_secondary']
+        )
+        self.backend_cost_label.pack(side=tk.RIGHT)
+        
+        backends = available_backends()
+        self.backend_var = tk.StringVar(value=default_backend(backends))
+        self.backend_menu = tk.OptionMenu(
+            backend_frame,
+            self.backend_var,
+            *backends,
+            command=self.select_backend
+        )
+        self.backend_menu.config(
+            font=("Segoe UI", 10),
+            bg=self.colors['bg_accent'],
+            fg=self.colors['text_primary'],
+            activebackground=self.colors['accent_blue'],
+            highlightthickness=0,
+            relief='flat',
+            width=12
+        )
+        self.backend_menu.pack(side=tk.RIGHT, padx=(20, 20))
+        
+        # Find the fastest rate the backend delivers without losing keys
+        self.calibrate_button = tk.Button(
+            backend_frame,
+            text="🎯 CALIBRATE",
+            command=self.start_calibration,
+            font=("Segoe UI", 10, "bold"),
+            bg=self.colors['bg_accent'],
+            fg=self.colors['text_primary'],
+            activebackground=self.colors['accent_blue'],
+            relief='flat',
+            bd=0,
+            padx=10,
+            cursor='hand2'
+        )
+        self.calibrate_button.pack(side=tk.RIGHT)
+        
+        # Target editor - its auto-indent and auto-close do part of the typing
+        editor_frame = tk.Frame(controls_grid, bg=self.colors['bg_secondary'])
+        editor_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        editor_label = tk.Label(
+            editor_frame,
+            text="📝 Target Editor",
+            font=("Segoe UI", 10, "bold"),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary']
+        )
+        editor_label.pack(side=tk.LEFT)
+        
+        self.editor_var = tk.StringVar(value=DEFAULT_EDITOR)
+        self.editor_menu = tk.OptionMenu(editor_frame, self.editor_var, *EDITOR_PRESETS)
+        self.editor_menu.config(
+            font=("Segoe UI", 10),
+            bg=self.colors['bg_accent'],
+            fg=self.colors['text_primary'],
+            activebackground=self.colors['accent_blue'],
+            highlightthickness=0,
+            relief='flat',
+            width=12
+        )
+        self.editor_menu.pack(side=tk.RIGHT, padx=(20, 20))
+        
+        # Verify - read the target back through the clipboard and fix what differs
+        verify_frame = tk.Frame(controls_grid, bg=self.colors['bg_secondary'])
+        verify_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        self.verify_after = tk.BooleanVar(value=False)
+        self.verify_check = tk.Checkbutton(
+            verify_frame,
+            text="🔍 Verify and fix after typing",
+            variable=self.verify_after,
+            font=("Segoe UI", 10, "bold"),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary'],
+            selectcolor=self.colors['bg_accent'],
+            activebackground=self.colors['bg_secondary'],
+            activeforeground=self.colors['text_primary']
+        )
+        self.verify_check.pack(side=tk.LEFT)
+        
+        # Select-all and copy chords used to read the target back
+        self.verify_chords_var = tk.StringVar(value=f"{format_chord(SELECT_ALL)}, {format_chord(COPY)}")
+        self.verify_chords_entry = tk.Entry(
+            verify_frame,
+            textvariable=self.verify_chords_var,
+            font=("Segoe UI", 10),
+            bg=self.colors['bg_accent'],
+            fg=self.colors['text_primary'],
+            insertbackground=self.colors['text_primary'],
+            relief='flat',
+            width=16
+        )
+        self.verify_chords_entry.pack(side=tk.RIGHT, padx=(20, 20))
+        
+    def create_session_section(self, parent):
+        """Create session recording and replay options"""
+        controls_grid = tk.Frame(parent, bg=self.colors['bg_secondary'])
+        controls_grid.pack(fill=tk.X, padx=20, pady=(15, 0))
+        
+        # Sessions - record runs with their timing, and replay recorded ones opened as files
+        session_frame = tk.Frame(controls_grid, bg=self.colors['bg_secondary'])
+        session_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        session_label = tk.Label(
+            session_frame,
+            text="🎞 Sessions",
+            font=("Segoe UI", 10, "bold"),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary']
+        )
+        session_label.pack(side=tk.LEFT)
+        
+        self.record_runs = tk.BooleanVar(value=False)
+        self.record_check = tk.Checkbutton(
+            session_frame,
+            text="⏺ Record runs",
+            variable=self.record_runs,
+            font=("Segoe UI", 10),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary'],
+            selectcolor=self.colors['bg_accent'],
+            activebackground=self.colors['bg_secondary'],
+            activeforeground=self.colors['text_primary']
+        )
+        self.record_check.pack(side=tk.LEFT, padx=(20, 0))
+        
+        # Otherwise a replay is scaled to the WPM setting, keeping its rhythm
+        self.replay_original = tk.BooleanVar(value=True)
+        self.replay_check = tk.Checkbutton(
+            session_frame,
+            text="🎞 Replay at recorded speed",
+            variable=self.replay_original,
+            command=self.schedule_estimate,
+            font=("Segoe UI", 10),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary'],
+            selectcolor=self.colors['bg_accent'],
+            activebackground=self.colors['bg_secondary'],
+            activeforeground=self.colors['text_primary']
+        )
+        self.replay_check.pack(side=tk.LEFT, padx=(10, 0))
+        
+    def create_queue_section(self, parent):
+        """Create the job queue: snippets compiled up front and typed back to back"""
+        queue_frame = tk.Frame(parent, bg=self.colors['bg_secondary'])
+        queue_frame.pack(fill=tk.BOTH, expand=True)
+        
+        title_frame = tk.Frame(queue_frame, bg=self.colors['bg_secondary'])
+        title_frame.pack(fill=tk.X, padx=20, pady=(15, 10))
+        
+        self.queue = JobQueue(self.plan_cache)
+        self.queue_var = tk.StringVar(value="Empty - add the text above with its current settings, or load a job file")
+        self.queue_label = tk.Label(
+            title_frame,
+            textvariable=self.queue_var,
+            font=("Segoe UI", 10),
+            fg=self.colors['text_secondary'],
+            bg=self.colors['bg_secondary']
+        )
+        self.queue_label.pack(side=tk.LEFT)
+        
+        # One line per job: its settings while queued, its throughput once typed
+        self.queue_list = tk.Listbox(
+            queue_frame,
+            height=3,
+            font=("Consolas", 10),
+            bg=self.colors['bg_accent'],
+            fg=self.colors['text_primary'],
+            selectbackground=self.colors['accent_blue'],
+            relief='flat',
+            bd=5,
+            highlightthickness=0
+        )
+        self.queue_list.pack(fill=tk.X, padx=20)
+        
+        queue_buttons = tk.Frame(queue_frame, bg=self.colors['bg_secondary'])
+        queue_buttons.pack(fill=tk.X, padx=20, pady=(10, 15))
+        
+        self.run_queue_button = tk.Button(
+            queue_buttons,
+            text="▶ RUN QUEUE",
+            command=self.run_queue,
+            font=("Segoe UI", 10, "bold"),
+            bg=self.colors['accent_blue'],
+            fg='white',
+            activebackground='#005a9e',
+            relief='flat',
+            bd=0,
+            padx=15,
+            cursor='hand2'
+        )
+        self.run_queue_button.pack(side=tk.LEFT)
+        
+        for text, command in (("➕ ADD TEXT", self.add_to_queue), ("📂 LOAD JOBS", self.load_job_file),
+                              ("🗑️ CLEAR QUEUE", self.clear_queue)):
+            button = tk.Button(
+                queue_buttons,
+                text=text,
+                command=command,
+                font=("Segoe UI", 10, "bold"),
+                bg=self.colors['bg_accent'],
+                fg=self.colors['text_primary'],
+                activebackground=self.colors['bg_primary'],
+                relief='flat',
+                bd=0,
+                padx=15,
+                cursor='hand2'
+            )
+            button.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Jobs follow each other after this gap, unless the trigger hotkey starts each one
+        self.job_gap_var = tk.DoubleVar(value=1.0)
+        self.job_gap_spin = tk.Spinbox(
+            queue_buttons,
+            from_=0,
+            to=60,
+            increment=0.5,
+            width=5,
+            textvariable=self.job_gap_var,
+            font=("Segoe UI", 10),
+            bg=self.colors['bg_accent'],
+            fg=self.colors['text_primary'],
+            buttonbackground=self.colors['bg_accent'],
+            relief='flat'
+        )
+        self.job_gap_spin.pack(side=tk.RIGHT)
+        
+        gap_label = tk.Label(
+            queue_buttons,
+            text="⏭ Gap between jobs (s)",
+            font=("Segoe UI", 10),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary']
+        )
+        gap_label.pack(side=tk.RIGHT, padx=(0, 10))
+        
     def create_status_section(self, parent):
         """Create status display with modern styling"""
         status_frame = tk.Frame(parent, bg=self.colors['bg_secondary'], relief='flat', bd=2)
@@ -346,158 +823,906 @@ class ModernTextTyperApp:
         )
         self.timer_label.pack(side=tk.RIGHT)
         
-    def create_help_section(self, parent):
-        """Create help section with modern styling"""
-        help_frame = tk.Frame(parent, bg=self.colors['bg_accent'], relief='flat', bd=2)
-        help_frame.pack(fill=tk.X)
+    def create_report_section(self, parent):
+        """Create the timing report of the last run, with export and profiling"""
+        report_container = tk.Frame(parent, bg=self.colors['bg_secondary'])
+        report_container.pack(fill=tk.X, padx=20, pady=15)
         
-        help_title = tk.Label(
-            help_frame,
-            text="💡 HOW TO USE",
-            font=("Segoe UI", 11, "bold"),
+        self.report = None
+        self.profile_report = None
+        self.report_var = tk.StringVar()
+        self.report_label = tk.Label(
+            report_container,
+            textvariable=self.report_var,
+            font=("Consolas", 9),
+            fg=self.colors['text_secondary'],
+            bg=self.colors['bg_secondary'],
+            justify=tk.LEFT
+        )
+        self.report_label.pack(side=tk.LEFT)
+        
+        self.export_button = tk.Button(
+            report_container,
+            text="💾 EXPORT REPORT",
+            command=self.export_report,
+            font=("Segoe UI", 10, "bold"),
+            bg=self.colors['bg_accent'],
             fg=self.colors['text_primary'],
-            bg=self.colors['bg_accent']
+            activebackground=self.colors['accent_blue'],
+            relief='flat',
+            bd=0,
+            padx=10,
+            cursor='hand2',
+            state=tk.DISABLED
+        )
+        self.export_button.pack(side=tk.RIGHT)
+        
+        # Opt-in cProfile of the next runs, saved next to the exported report
+        self.profile_run = tk.BooleanVar(value=False)
+        self.profile_check = tk.Checkbutton(
+            report_container,
+            text="🔬 Profile runs",
+            variable=self.profile_run,
+            font=("Segoe UI", 10),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary'],
+            selectcolor=self.colors['bg_accent'],
+            activebackground=self.colors['bg_secondary'],
+            activeforeground=self.colors['text_primary']
         )
-        help_title.pack(anchor="w", padx=20, pady=(15, 5))
+        self.profile_check.pack(side=tk.RIGHT, padx=(0, 15))
+        
+    def create_help_section(self, parent):
+        """Create help section with modern styling"""
+        help_frame = tk.Frame(parent, bg=self.colors['bg_secondary'])
+        help_frame.pack(fill=tk.BOTH, expand=True)
         
         help_text = ("1. Paste or type your text in the input area above\n"
                     "2. Adjust typing speed and start delay to your preference\n" 
                     "3. Click 'START TYPING' and quickly click where you want the text\n"
-                    "4. The app will type your text at lightning speed!")
+                    "4. The app will type your text at lightning speed!\n"
+                    f"With '{format_hotkey(TRIGGER_KEY)}' ticked, START arms the run and {format_hotkey(TRIGGER_KEY)} "
+                    f"starts it; {format_hotkey(PAUSE_KEY)} pauses and {format_hotkey(CANCEL_KEY)} cancels from any window\n"
+                    "For many snippets: ADD TEXT each one (or LOAD JOBS), then RUN QUEUE\n"
+                    "Runs recorded with 'Record runs' are replayed with their own timing from OPEN FILE")
         
         help_label = tk.Label(
             help_frame,
             text=help_text,
             font=("Segoe UI", 10),
             fg=self.colors['text_secondary'],
-            bg=self.colors['bg_accent'],
+            bg=self.colors['bg_secondary'],
             justify=tk.LEFT
         )
-        help_label.pack(anchor="w", padx=20, pady=(0, 15))
+        help_label.pack(anchor="w", padx=20, pady=15)
         
     def update_speed_label(self, value):
         """Update speed display label"""
         self.wpm_value_label.config(text=f"{value} WPM")
+        self.schedule_estimate()
         
     def update_delay_label(self, value):
         """Update delay display label"""
         self.delay_value_label.config(text=f"{value}s")
         
+    def select_backend(self, name):
+        """Switch the injection backend and measure its per-event cost"""
+        try:
+            backend = create_backend(name)
+            backend.open()
+            backend.measure_cost()
+        except BackendError as e:
+            self.status_var.set(f"❌ Error: {e}")
+            if self.backend is not None:
+                self.backend_var.set(self.backend.name)
+            return
+            
+        if self.backend is not None:
+            self.backend.close()
+        self.backend = backend
+        self.plan_cache.layout = backend.keymap.layout
+        if backend.simulated:
+            self.status_var.set(f"⚠️ Warning: the {backend.name} backend only simulates typing; "
+                                "install pyautogui or python-xlib to type into other windows")
+        self.backend_cost_label.config(text=backend.describe_cost())
+        self.apply_calibrated_wpm()
+        
+    def apply_calibrated_wpm(self):
+        """Default the speed to the backend's calibrated ceiling, if it has one"""
+        wpm = calibrated_wpm(self.backend.name)
+        if wpm is None:
+            return
+        resolution = int(self.wpm_scale.cget("resolution"))
+        wpm = max(resolution, wpm - wpm % resolution)  # never above the measured ceiling
+        if wpm > int(self.wpm_scale.cget("to")):
+            self.wpm_scale.config(to=wpm)
+        if wpm < int(self.wpm_scale.cget("from")):
+            self.wpm_scale.config(from_=wpm)
+        self.wpm_var.set(wpm)
+        self.update_speed_label(wpm)
+        
+    def start_calibration(self):
+        """Type test patterns into a local window at rising rates to find the loss-free ceiling"""
+        if self.typing_active:
+            return
+        self.control = RunControl()
+        self.typing_active = True
+        self.start_button.config(state=tk.DISABLED, bg=self.colors['bg_accent'])
+        self.cancel_button.config(state=tk.NORMAL, bg=self.colors['accent_red'])
+        self.resume_button.config(state=tk.DISABLED, bg=self.colors['bg_accent'])
+        self.backend_menu.config(state=tk.DISABLED)
+        self.calibrate_button.config(state=tk.DISABLED)
+        self.status_var.set("🎯 Calibrating - don't touch the keyboard or mouse")
+        threading.Thread(target=self.run_calibration, daemon=True).start()
+        
+    def run_calibration(self):
+        """Calibration worker: every Tk call goes through the UI pump"""
+        on_trial = lambda wpm: self.ui.post("status", f"🎯 Calibrating: trying {wpm} WPM...")
+        try:
+            result = calibrate_backend(self.root, self.ui, self.backend, self.control, on_trial)
+            self.ui.call(self.calibration_complete, result)
+        except Exception as e:
+            # A backend error, the fail-safe corner or an unanswered Tk call
+            self.ui.post("status", f"❌ Calibration failed ({self.backend.name} backend): {e}")
+        finally:
+            self.ui.call(self.calibration_finished)
+        
+    def calibration_complete(self, result):
+        """Save the measured ceiling as the backend's profile and use it"""
+        if result.wpm is not None and not result.cancelled:
+            save_profile(self.backend.name, result.wpm, trials=result.trials)
+            self.apply_calibrated_wpm()
+            self.status_var.set(f"✅ Calibration: {result.summary()}")
+        else:
+            self.status_var.set(f"❌ Calibration: {result.summary()}")
+        
+    def calibration_finished(self):
+        """Give the controls back, however calibration ended"""
+        self.typing_active = False
+        self.start_button.config(state=tk.NORMAL, bg=self.colors['accent_green'])
+        self.cancel_button.config(state=tk.DISABLED, bg=self.colors['bg_accent'])
+        self.backend_menu.config(state=tk.NORMAL)
+        self.calibrate_button.config(state=tk.NORMAL)
+        self.update_resume_button()
+        
+    def on_text_modified(self, event=None):
+        """Refresh the time estimate when the input text changes"""
+        self.input_text.edit_modified(False)
+        self.schedule_estimate()
+        
+    def schedule_estimate(self, *args):
+        """Debounce estimate updates while the user is still typing or sliding"""
+        if self.estimate_job is not None:
+            self.root.after_cancel(self.estimate_job)
+        self.estimate_job = self.root.after(300, self.update_estimate)
+        
+    def update_estimate(self):
+        """Show how long the current text will take to type"""
+        self.estimate_job = None
+        self.update_resume_button()
+        if self.source_path is None and not self.input_text.get("1.0", tk.END).strip():
+            self.estimate_label.config(text="")
+        elif self.instant_mode.get():
+            self.estimate_label.config(text="⏳ Instant")
+        elif self.replay is not None:
+            wpm = self.replay_wpm()
+            duration = self.replay.duration if wpm is None else self.replay.duration * self.replay.wpm / wpm
+            self.estimate_label.config(text=f"⏳ ~{format_duration(duration)}")
+        elif self.source_path is not None:
+            duration = estimate_duration(self.source_chars, self.wpm_var.get(), MODERN_PROFILE)
+            self.estimate_label.config(text=f"⏳ ~{format_duration(duration)}")
+        else:
+            schedule = self.get_schedule()
+            self.estimate_label.config(text=f"⏳ ~{format_duration(schedule.duration)}")
+        
+    def get_schedule(self):
+        """Compile the typing schedule, reusing the last one if nothing changed"""
+        text = self.input_text.get("1.0", tk.END).rstrip('\n')
+        wpm = self.wpm_var.get()
+        use_variance = self.human_variance.get()
+        settings = (wpm, use_variance, MODERN_PROFILE.name)
+        if self.schedule is None or not self.schedule.matches(text, settings):
+            # Text typed before with the same settings is loaded instead of compiled
+            self.schedule = self.plan_cache.get(text, wpm, use_variance, MODERN_PROFILE)
+            if self.schedule is None:
+                self.schedule = compile_schedule(text, wpm, use_variance, MODERN_PROFILE)
+        return self.schedule
+        
+    def replay_wpm(self):
+        """WPM to replay the open session at, None to keep its recorded timing"""
+        if self.replay_original.get() or self.replay.wpm is None:
+            return None
+        return self.wpm_var.get()
+        
     def clear_text(self):
         """Clear the input text area"""
+        if self.source_path is not None:
+            self.close_file()
         self.input_text.delete("1.0", tk.END)
         self.status_var.set("Text cleared - Ready to type")
         
-    def prepare_typing(self):
-        """Prepare for typing with customizable countdown"""
-        text_content = self.input_text.get("1.0", tk.END).strip()
-        if not text_content:
-            self.status_var.set("❌ Error: No text to type!")
+    def toggle_file(self):
+        """Open a document for large-document mode, or go back to the text area"""
+        if self.source_path is not None:
+            self.close_file()
+            self.status_var.set("Ready to type")
+            return
+        path = filedialog.askopenfilename(title="Choose a text file to type, or a recorded session to replay")
+        if path:
+            self.open_file(path)
+            
+    def open_file(self, path):
+        """Type path by streaming it, or replay it if it is a recorded session; the text area only shows a preview"""
+        replay = None
+        if is_session_file(path):
+            try:
+                replay = SessionReader(path)
+            except (OSError, SessionError) as e:
+                self.status_var.set(f"❌ Error: {e}")
+                return
+        if self.source_path is not None:
+            self.close_file()
+        self.source_path = path
+        self.source_digest = file_digest(path)
+        self.replay = replay
+        if replay is not None:
+            self.source_chars = len(replay)
+        else:
+            self.source_chars = count_chars(rstrip_chunks(iter_file_chunks(path)))
+        self.input_text.config(state=tk.NORMAL)
+        self.input_text.delete("1.0", tk.END)
+        self.input_text.insert("1.0", next(replay.chunks(), '') if replay is not None else read_preview(path))
+        self.input_text.config(state=tk.DISABLED)
+        self.file_button.config(text="📂 CLOSE FILE")
+        if replay is not None:
+            self.status_var.set(f"🎞 {os.path.basename(path)}: {replay.summary()} - replayed from disk")
+        else:
+            self.status_var.set(f"📄 {os.path.basename(path)} ({self.source_chars:,} characters) - preview only, typed from disk")
+        self.schedule_estimate()
+        self.update_resume_button()
+        
+    def close_file(self):
+        """Leave large-document mode"""
+        self.source_path = None
+        self.source_digest = None
+        self.source_chars = None
+        if self.replay is not None:
+            self.replay.close()
+            self.replay = None
+        self.input_text.config(state=tk.NORMAL)
+        self.input_text.delete("1.0", tk.END)
+        self.file_button.config(text="📂 OPEN FILE")
+        self.schedule_estimate()
+        self.update_resume_button()
+        
+    def update_resume_button(self):
+        """Enable resume only if the checkpoint belongs to the current text or an existing document"""
+        checkpoint = self.checkpoint
+        if self.typing_active or checkpoint is None:
+            resumable = False
+        elif checkpoint.path is not None:
+            resumable = os.path.exists(checkpoint.path)
+        else:
+            text = self.input_text.get("1.0", tk.END).rstrip('\n')
+            resumable = self.source_path is None and checkpoint.matches(text_digest(text))
+        if resumable:
+            self.resume_button.config(state=tk.NORMAL, text=f"↩ RESUME {checkpoint.percent}%", bg=self.colors['accent_blue'])
+        else:
+            self.resume_button.config(state=tk.DISABLED, text="↩ RESUME LAST", bg=self.colors['bg_accent'])
+        
+    def resume_typing(self):
+        """Continue the interrupted run from the character where it stopped"""
+        checkpoint = self.checkpoint
+        if checkpoint.path is not None and checkpoint.path != self.source_path:
+            self.open_file(checkpoint.path)
+        if self.source_path is not None:
+            digest = self.source_digest
+        else:
+            digest = text_digest(self.input_text.get("1.0", tk.END).rstrip('\n'))
+        if not checkpoint.matches(digest, self.source_path):
+            self.status_var.set("❌ Error: Text changed since the run was interrupted")
+            self.update_resume_button()
+            return
+        self.prepare_typing(checkpoint.offset)
+        
+    def typing_interrupted(self, offset):
+        """Save exactly where an interrupted run stopped, so it can be resumed"""
+        # The target now holds an unknown part of the text, so the next run types it all
+        self.last_typed_text = None
+        if self.edit_plan is not None:
             return
+        self.recorder.update(offset, force=True)
+        self.checkpoint = self.recorder.checkpoint
+        self.update_resume_button()
+        
+    def add_to_queue(self):
+        """Queue the text area's text with the current settings, compiled now"""
+        if self.source_path is not None:
+            self.status_var.set("❌ Error: Close the file first - the queue holds text snippets")
+            return
+        text = self.input_text.get("1.0", tk.END).rstrip('\n')
+        if not text.strip():
+            self.status_var.set("❌ Error: No text to queue!")
+            return
+        job = self.queue.add(text, self.wpm_var.get(), self.human_variance.get(), MODERN_PROFILE,
+                             self.instant_mode.get())
+        self.refresh_queue()
+        self.status_var.set(f"➕ Queued '{job.label}'")
+        
+    def load_job_file(self):
+        """Queue every snippet of a job file; its settings lines override the current ones"""
+        path = filedialog.askopenfilename(title="Choose a job file ('---' lines separate snippets)")
+        if not path:
+            return
+        try:
+            jobs = load_jobs(path, self.wpm_var.get(), self.human_variance.get(), MODERN_PROFILE,
+                             self.instant_mode.get(), self.plan_cache)
+        except (OSError, ValueError) as e:
+            self.status_var.set(f"❌ Error: {e}")
+            return
+        self.queue.extend(jobs)
+        self.refresh_queue()
+        self.status_var.set(f"📂 Queued {len(jobs)} jobs from {os.path.basename(path)}")
+        
+    def clear_queue(self):
+        if self.typing_active:
+            return
+        self.queue.clear()
+        self.refresh_queue()
+        
+    def refresh_queue(self):
+        """Redraw the job list and the queue totals"""
+        self.queue_list.delete(0, tk.END)
+        for job in self.queue:
+            self.queue_list.insert(tk.END, job.summary())
+        if len(self.queue):
+            self.queue_var.set(self.queue.summary())
+        else:
+            self.queue_var.set("Empty - add the text above with its current settings, or load a job file")
+        
+    def run_queue(self):
+        """Type the pending jobs back to back: after the countdown and a gap each, or on every trigger press"""
+        if self.typing_active:
+            return
+        if not self.queue.pending:
+            self.status_var.set("❌ Error: No jobs left in the queue!")
+            return
+        try:
+            gap = float(self.job_gap_var.get())
+        except (tk.TclError, ValueError):
+            self.status_var.set("❌ Error: The gap between jobs must be a number of seconds")
+            return
+        self.control = RunControl()
+        self.engine = TypingEngine(self.backend, self.control)
+        if self.use_hotkeys.get() and not self.start_hotkeys():
+            return
+        self.delay_seconds = self.delay_var.get()
+        self.typing_active = True
+        self.start_button.config(state=tk.DISABLED, bg=self.colors['bg_accent'])
+        self.pause_button.config(state=tk.NORMAL, text="⏸ PAUSE", bg=self.colors['accent_orange'])
+        self.cancel_button.config(state=tk.NORMAL, bg=self.colors['accent_red'])
+        self.resume_button.config(state=tk.DISABLED, bg=self.colors['bg_accent'])
+        self.backend_menu.config(state=tk.DISABLED)
+        self.file_button.config(state=tk.DISABLED)
+        self.calibrate_button.config(state=tk.DISABLED)
+        self.clear_button.config(state=tk.DISABLED)
+        self.typing_thread = threading.Thread(target=self.type_queue, args=(gap,), daemon=True)
+        self.typing_thread.start()
+        
+    def type_queue(self, gap):
+        """Queue worker: every job is already compiled, so each one starts the moment it is due"""
+        control = self.control
+        engine = self.engine
+        hotkeys = self.hotkeys
+        
+        def on_job(position, count, job):
+            self.ui.post("timer", f"📋 {position}/{count}")
+            self.ui.post("status", f"🚀 Job {position}/{count}: {job.label}")
+            # Read by show_job_progress; progress is only posted after this
+            self.job_label = f"Job {position}/{count}: {job.label}"
             
+        def on_done(position, count, job):
+            self.ui.call(self.refresh_queue)
+            if hotkeys is not None and position < count and job.done:
+                self.ui.post("timer", "🎯 ARMED")
+                self.ui.post("status", f"✅ Job {position}/{count} done - press {format_hotkey(TRIGGER_KEY)} for the next")
+                
+        finished = False
+        try:
+            if hotkeys is not None:
+                self.backend.probe()
+                self.ui.post("timer", "🎯 ARMED")
+                self.ui.post("status", f"⌨️ Press {format_hotkey(TRIGGER_KEY)} in the target window for each job")
+            elif not self.wait_for_delay(control):
+                return
+            finished = self.queue.run(engine, gap, hotkeys, on_job, partial(self.ui.post, "job_progress"), on_done)
+        except Exception as e:
+            self.ui.call(self.typing_failed, e)
+        finally:
+            # Resets the UI unless a cancel or the error above already has
+            self.ui.call(self.queue_complete, finished)
+        
+    def show_job_progress(self, chars_typed, total_chars):
+        """Progress of the job being typed (main thread, rate-limited by the UI pump)"""
+        if not self.typing_active:
+            return
+        progress = min(100, int((chars_typed / total_chars) * 100))
+        self.status_var.set(f"🚀 {self.job_label}: {progress}% ({chars_typed}/{total_chars})")
+        
+    def queue_complete(self, finished):
+        """Reset the UI after a queue run; cancel_typing has already done it if it was cancelled"""
+        self.refresh_queue()
+        if not self.typing_active:
+            return
+        self.typing_active = False
+        self.stop_hotkeys()
+        if finished:
+            self.status_var.set(f"✅ Queue done: {self.queue.summary()}")
+            self.timer_var.set("🎉 DONE!")
+        else:
+            self.status_var.set(f"⏸ Queue stopped: {self.queue.summary()} - RUN QUEUE continues it")
+            self.timer_var.set("")
+        self.start_button.config(state=tk.NORMAL, bg=self.colors['accent_green'])
+        self.pause_button.config(state=tk.DISABLED, text="⏸ PAUSE", bg=self.colors['bg_accent'])
+        self.cancel_button.config(state=tk.DISABLED, bg=self.colors['bg_accent'])
+        self.backend_menu.config(state=tk.NORMAL)
+        self.file_button.config(state=tk.NORMAL)
+        self.calibrate_button.config(state=tk.NORMAL)
+        self.clear_button.config(state=tk.NORMAL)
+        self.update_resume_button()
+        
+    def prepare_typing(self, start_offset=0):
+        """Prepare for typing with customizable countdown, optionally resuming at start_offset"""
+        if self.source_path is not None:
+            # The file is compiled chunk by chunk while typing
+            self.schedule = None
+        elif not self.input_text.get("1.0", tk.END).strip():
+            self.status_var.set("❌ Error: No text to type!")
+            return
+        else:
+            self.schedule = self.get_schedule()
+            if not self.instant_mode.get():
+                self.plan_cache.put(self.schedule, MODERN_PROFILE)
+        if self.schedule is None:
+            checkpoint = Checkpoint(self.source_digest, start_offset, self.source_chars, self.source_path)
+        else:
+            checkpoint = Checkpoint(text_digest(self.schedule.text), start_offset, len(self.schedule))
+        self.recorder = CheckpointRecorder(checkpoint)
+        self.start_offset = start_offset
+        
+        self.profiler = None
+        if self.profile_run.get():
+            # Imported here: cProfile is only loaded when profiling is switched on
+            from profiling import RunProfiler
+            self.profiler = RunProfiler()
+        
+        # Optional read-back through the clipboard once typing is done
+        self.verifier = None
+        if self.verify_after.get():
+            try:
+                select_chord, copy_chord = (parse_chord(chord) for chord in self.verify_chords_var.get().split(','))
+            except ValueError:
+                self.status_var.set("❌ Error: Verify keys must look like ctrl+a, ctrl+c")
+                return
+            read_clipboard = partial(self.ui.call_sync, read_tk_clipboard, self.root)
+            self.verifier = Verifier(read_clipboard, select_chord, copy_chord)
+        self.typed_text = None if self.schedule is None else self.schedule.text
+        
+        # Only type the differences from the last completed run, if it is known,
+        # and leave indentation and closing brackets the target editor adds to it
+        self.edit_plan = None
+        editor = EDITOR_PRESETS[self.editor_var.get()]
+        if self.changes_only.get() and self.typed_text is not None and self.last_typed_text is not None and not start_offset:
+            plan = plan_edits(self.last_typed_text, self.typed_text)
+            if not plan.steps:
+                self.status_var.set("✅ Nothing changed since the last run")
+                return
+            self.edit_plan = plan
+        elif editor.name != DEFAULT_EDITOR and self.typed_text is not None and not start_offset:
+            self.edit_plan = plan_for_editor(self.typed_text, editor)
+        if self.edit_plan is not None:
+            self.edit_steps = self.edit_plan.compile(self.wpm_var.get(), self.human_variance.get(), MODERN_PROFILE)
+        self.control = RunControl()
+        # Record what this run types, with its timing; the file is created when typing starts
+        self.capture = None
+        if self.record_runs.get():
+            self.capture = SessionCapture(self.backend, SessionWriter(new_session_path()))
+        backend = self.capture or self.backend
+        # Every injected batch is timestamped for the run report
+        self.engine = TypingEngine(backend, self.control, trace=KeystrokeTrace())
+        # Text runs can be typed from a worker process; files, edit plans and recorded runs stay in this one
+        self.runner = None
+        if self.isolate_typing.get() and self.schedule is not None and self.edit_plan is None and self.capture is None:
+            # Imported here: multiprocessing is only loaded when isolation is switched on
+            from procworker import ProcessEngine
+            self.runner = ProcessEngine(self.backend.name, self.control, trace=KeystrokeTrace())
+        # Plain text runs can instead be a coroutine on the Tk thread; the rest need threads
+        self.loop_engine = None
+        if (self.loop_typing.get() and self.runner is None and self.schedule is not None and self.edit_plan is None
+                and self.verifier is None and self.profiler is None and not self.use_hotkeys.get()):
+            # Imported here: asyncio is only loaded when the event-loop engine is switched on
+            from aio_engine import AsyncRunControl, AsyncTypingEngine, TkLoopDriver
+            if self.loop_driver is None:
+                self.loop_driver = TkLoopDriver(self.root)
+                self.loop_driver.start()
+            self.control = AsyncRunControl()
+            self.loop_engine = AsyncTypingEngine(backend, self.control, trace=KeystrokeTrace())
+        if self.use_hotkeys.get() and not self.start_hotkeys():
+            return
+        # Snapshot Tk settings here; the worker threads must not read Tk variables
+        self.delay_seconds = self.delay_var.get()
+        self.use_instant_mode = self.instant_mode.get()
+        self.stream_settings = (self.wpm_var.get(), self.human_variance.get())
+        self.replay_speed = self.replay_wpm() if self.replay is not None else None
         self.typing_active = True
         self.start_button.config(state=tk.DISABLED, bg=self.colors['bg_accent'])
+        self.pause_button.config(state=tk.NORMAL, text="⏸ PAUSE", bg=self.colors['accent_orange'])
         self.cancel_button.config(state=tk.NORMAL, bg=self.colors['accent_red'])
+        self.resume_button.config(state=tk.DISABLED, bg=self.colors['bg_accent'])
+        self.backend_menu.config(state=tk.DISABLED)
+        self.file_button.config(state=tk.DISABLED)
+        self.calibrate_button.config(state=tk.DISABLED)
+        self.clear_button.config(state=tk.DISABLED)
+        
+        if self.loop_engine is not None:
+            self.loop_driver.submit(self.type_on_loop(self.loop_engine))
+            return
         
         # Start countdown with custom delay
         self.countdown_thread = threading.Thread(target=self.countdown, daemon=True)
         self.countdown_thread.start()
         
     def countdown(self):
-        """Countdown with customizable delay"""
-        delay_seconds = self.delay_var.get()
+        """Countdown with customizable delay, or wait for the trigger hotkey"""
+        control = self.control
+        hotkeys = self.hotkeys
+        if self.runner is not None:
+            # Spawning the worker takes a while; do it while the countdown runs
+            try:
+                self.runner.start()
+            except BackendError as e:
+                self.runner = None
+                self.ui.post("status", f"⚠️ Worker process failed ({e}) - typing in-process")
         
-        for i in range(delay_seconds, 0, -1):
-            if not self.typing_active:
-                return
-            self.timer_var.set(f"⏰ {i}")
-            self.status_var.set(f"🎯 Starting in {i} seconds - Click where you want to type!")
-            self.root.update()
-            time.sleep(1)
+        if hotkeys is not None:
+            # Armed - the schedule is compiled and the backend warm, so the trigger starts typing at once
+            if self.runner is None:
+                self.backend.probe()
+            self.ui.post("timer", "🎯 ARMED")
+            self.ui.post("status", f"⌨️ Press {format_hotkey(TRIGGER_KEY)} in the target window to start typing")
+            ready = control.wait_for_trigger()
+            if ready:
+                # Typing while Ctrl or Alt is still down would send shortcuts
+                hotkeys.wait_for_release()
+        else:
+            ready = self.wait_for_delay(control)
+        if not ready:
+            if self.runner is not None:
+                self.runner.close()
+            return
             
-        self.timer_var.set("⚡ TYPING NOW!")
-        self.status_var.set("🚀 Ultra-fast typing in progress...")
+        self.ui.post("timer", "⚡ TYPING NOW!")
+        self.ui.post("status", "🚀 Ultra-fast typing in progress...")
         
         # Start typing
         self.typing_thread = threading.Thread(target=self.start_typing, daemon=True)
         self.typing_thread.start()
         
-    def start_typing(self):
-        """Ultra-fast typing with minimal delays"""
-        text = self.input_text.get("1.0", tk.END).rstrip('\n')
-        wpm = self.wpm_var.get()
-        use_variance = self.human_variance.get()
-        instant_mode = self.instant_mode.get()
+    async def type_on_loop(self, engine):
+        """Event-loop counterpart of start_typing: an error mid-run resets the UI and says what failed"""
+        try:
+            await self.type_text_on_loop(engine)
+        except Exception as e:
+            if self.capture is not None:
+                self.capture.close()
+            self.typing_failed(e)
+            
+    async def type_text_on_loop(self, engine):
+        """Countdown and typing as one task on the Tk thread's event loop, so it may touch Tk directly"""
+        schedule = self.schedule
+        start = self.start_offset
+        
+        def tick(remaining):
+            self.timer_var.set(f"⏰ {remaining}")
+            self.status_var.set(f"🎯 Starting in {remaining} seconds - Click where you want to type!")
+            
+        if not await engine.countdown(self.delay_seconds, tick):
+            return
+        self.timer_var.set("⚡ TYPING NOW!")
+        self.status_var.set("🚀 Ultra-fast typing in progress...")
+        if not await engine.control.hold(0.3):
+            return
+        if self.capture is not None:
+            try:
+                self.capture.open()
+            except OSError as e:
+                self.cancel_typing()
+                self.status_var.set(f"❌ Error: Cannot record the session: {e}")
+                return
+        if self.use_instant_mode:
+            result = await engine.run_instant(schedule.text, self.show_progress, start)
+        else:
+            result = await engine.run(schedule, start, self.show_progress)
+        if self.capture is not None:
+            self.capture.close()
         
-        # Give time to switch focus
-        time.sleep(0.3)
+        self.show_report(engine.trace.report(result.elapsed))
+        if result.completed:
+            self.typing_complete(result)
+            return
+        self.typing_interrupted(start + result.chars_typed)
+        if result.cancel_latency is not None:
+            self.status_var.set(f"❌ Typing cancelled (stopped {result.cancel_latency * 1000:.2f} ms after cancel)")
+            
+    def wait_for_delay(self, control):
+        """Count down the start delay; returns False if cancelled"""
+        for i in range(self.delay_seconds, 0, -1):
+            self.ui.post("timer", f"⏰ {i}")
+            self.ui.post("status", f"🎯 Starting in {i} seconds - Click where you want to type!")
+            # Wakes immediately on cancel and holds while paused
+            if not control.hold(1):
+                return False
+        return True
+        
+    def start_hotkeys(self):
+        """Listen for the trigger, pause and cancel hotkeys of the run; False if unavailable"""
+        hotkeys = HotkeyListener({
+            TRIGGER_KEY: self.control.trigger,
+            PAUSE_KEY: self.hotkey_pause,
+            CANCEL_KEY: self.hotkey_cancel,
+        })
+        try:
+            hotkeys.start()
+        except HotkeyError as e:
+            self.status_var.set(f"❌ Error: {e}")
+            return False
+        self.hotkeys = hotkeys
+        return True
         
-        if instant_mode:
-            # Instant mode - type everything at once
-            pyautogui.write(text)
-            self.typing_complete()
+    def hotkey_pause(self):
+        """Pause hotkey (listener thread); resuming waits until Ctrl and Alt are let go"""
+        if not self.typing_active:
             return
+        if self.control.paused:
+            threading.Thread(target=self.resume_after_release, args=(self.hotkeys,), daemon=True).start()
+        else:
+            self.ui.call(self.toggle_pause)
             
-        # Calculate ultra-fast delays
-        chars_per_minute = wpm * 5
-        base_delay = 60.0 / chars_per_minute
+    def resume_after_release(self, hotkeys):
+        if hotkeys is not None:
+            hotkeys.wait_for_release()
+        self.ui.call(self.toggle_pause)
         
-        # Make it even faster by reducing the base delay
-        base_delay *= 0.5  # 50% faster than calculated
+    def hotkey_cancel(self):
+        """Cancel hotkey (listener thread): stop typing at once, then reset the UI"""
+        self.control.cancel()
+        self.ui.call(self.cancel_typing)
         
-        chars_typed = 0
-        total_chars = len(text)
+    def stop_hotkeys(self):
+        if self.hotkeys is not None:
+            self.hotkeys.stop()
+            self.hotkeys = None
         
-        for char in text:
-            if not self.typing_active:
-                break
-                
-            pyautogui.write(char)
-            chars_typed += 1
-            
-            # Update progress less frequently for better performance
-            if chars_typed % 50 == 0 or chars_typed == total_chars:
-                progress = int((chars_typed / total_chars) * 100)
-                self.status_var.set(f"🚀 Typing: {progress}% ({chars_typed}/{total_chars})")
-                self.root.update_idletasks()
+    def start_typing(self):
+        """Typing worker: an error mid-run resets the UI and says what failed"""
+        try:
+            self.type_text()
+        except Exception as e:
+            profiler = self.profiler
+            if profiler is not None and "typing" in profiler.profiles:
+                profiler.stop("typing")
+                self.ui.call(profiler.stop, "ui")
+            if self.capture is not None:
+                self.capture.close()
+            if self.runner is not None:
+                self.runner.close()
+            self.ui.call(self.typing_failed, e)
             
-            # Minimal delay calculation
-            if use_variance and not instant_mode:
-                variance = random.uniform(0.9, 1.1)  # Less variance for speed
-                delay = base_delay * variance
-                if char in ['.', '\n']:
-                    delay *= 1.2  # Minimal pause for punctuation
+    def type_text(self):
+        """Ultra-fast typing with minimal delays"""
+        schedule = self.schedule
+        engine = self.engine
+        # Runs text in the worker process when isolation is on
+        runner = self.runner or engine
+        start = self.start_offset
+        profiler = self.profiler
+        on_progress = partial(self.ui.post, "progress")
+        
+        # Give time to switch focus, unless the hotkey was pressed there
+        if self.hotkeys is None and not engine.control.hold(0.3):
+            if self.runner is not None:
+                self.runner.close()
+            return
+        if self.capture is not None:
+            # The session file is only created once typing really starts
+            try:
+                self.capture.open()
+            except OSError as e:
+                self.ui.call(self.cancel_typing)
+                self.ui.call(self.status_var.set, f"❌ Error: Cannot record the session: {e}")
+                return
+        
+        if profiler is not None:
+            # One profiler per thread: this worker, and the Tk thread for the UI updates
+            self.ui.call_sync(profiler.start, "ui")
+            profiler.start("typing")
+        if self.edit_plan is not None:
+            # Only the changes - navigation keys, deletions and paced insertions
+            result = engine.run_edits(self.edit_steps, on_progress, self.edit_plan.keystrokes)
+        elif self.replay is not None:
+            # Recorded session - streamed from the memory-mapped file with its own timing
+            if self.use_instant_mode:
+                result = engine.run_instant_stream(self.replay.chunks(start), on_progress, len(self.replay), start=start)
             else:
-                delay = base_delay
-                
-            # Ensure minimum speed
-            delay = max(delay, 0.001)  # Minimum 1ms delay
-            time.sleep(delay)
+                schedules = self.replay.schedules(self.replay_speed, start)
+                result = engine.run_stream(schedules, on_progress, len(self.replay), start)
+        elif schedule is None:
+            # Large-document mode - stream the file in bounded chunks
+            chunks = skip_chars(rstrip_chunks(iter_file_chunks(self.source_path)), start)
+            size = self.source_chars
+            if self.use_instant_mode:
+                result = engine.run_instant_stream(chunks, on_progress, size, start=start)
+            else:
+                wpm, use_variance = self.stream_settings
+                schedules = compile_stream(chunks, wpm, use_variance, MODERN_PROFILE)
+                result = engine.run_stream(schedules, on_progress, size, start)
+        else:
+            try:
+                if self.use_instant_mode:
+                    # Instant mode - stream the text at the backend's maximum rate,
+                    # in short bursts so cancel and progress stay responsive
+                    result = runner.run_instant(schedule.text, on_progress, start)
+                else:
+                    # Pace every keystroke against the schedule's absolute deadlines
+                    result = runner.run(schedule, start, on_progress)
+            finally:
+                if self.runner is not None:
+                    self.runner.close()
         
-        if self.typing_active:
-            self.typing_complete()
+        if self.capture is not None:
+            self.capture.close()
+        
+        profile_report = None
+        if profiler is not None:
+            profiler.stop("typing")
+            self.ui.call_sync(profiler.stop, "ui")
+            profile_report = profiler.report()
+        
+        # Report on the run itself; verification's read-back pauses are not part of it
+        self.ui.call(self.show_report, runner.trace.report(result.elapsed), profile_report)
+        engine.trace = None
+        if result.completed:
+            verification = None
+            if self.verifier is not None:
+                # Read back what landed and retype only the ranges that differ
+                self.ui.post("status", "🔍 Verifying typed text...")
+                wpm, use_variance = self.stream_settings
+                verification = self.verifier.run(engine, self.expected_text(), wpm, use_variance, MODERN_PROFILE)
+            self.ui.call(self.typing_complete, result, verification)
+            return
+        # Interrupted - remember the exact offset so the run can be resumed
+        self.ui.call(self.typing_interrupted, start + result.chars_typed)
+        if result.cancel_latency is not None:
+            self.ui.post("status", f"❌ Typing cancelled (stopped {result.cancel_latency * 1000:.2f} ms after cancel)")
             
-    def typing_complete(self):
+    def show_progress(self, chars_typed, total_chars):
+        """Show typing progress (main thread, rate-limited by the UI pump)"""
+        if not self.typing_active:
+            return
+        if self.edit_plan is None:
+            self.recorder.update(chars_typed)
+        progress = min(100, int((chars_typed / total_chars) * 100))
+        self.status_var.set(f"🚀 Typing: {progress}% ({chars_typed}/{total_chars})")
+            
+    def show_report(self, report, profile_report=None):
+        """Show the last run's timing report, and profile if there is one, in the status section"""
+        self.report = report
+        self.profile_report = profile_report
+        summary = report.summary()
+        if profile_report is not None:
+            summary += "\n" + profile_report.summary()
+        self.report_var.set(summary)
+        self.export_button.config(state=tk.NORMAL)
+        
+    def export_report(self):
+        """Save the last run's timing report as JSON or per-batch CSV, and its profile alongside"""
+        path = filedialog.asksaveasfilename(
+            title="Export timing report",
+            defaultextension=".json",
+            filetypes=[("JSON report", "*.json"), ("CSV per batch", "*.csv")]
+        )
+        if not path:
+            return
+        try:
+            self.report.export(path)
+            if self.profile_report is not None:
+                # Imported here: only loaded once a run has been profiled
+                from profiling import profile_stem
+                self.profile_report.save(profile_stem(path))
+        except OSError as e:
+            self.status_var.set(f"❌ Error: {e}")
+            return
+        saved = "Report and profile" if self.profile_report is not None else "Report"
+        self.status_var.set(f"💾 {saved} saved to {os.path.basename(path)}")
+        
+    def expected_text(self):
+        """Everything the target should hold once this run is done"""
+        if self.typed_text is not None:
+            return self.typed_text
+        if self.replay is not None:
+            return self.replay.text()
+        return ''.join(rstrip_chunks(iter_file_chunks(self.source_path)))
+        
+    def typing_complete(self, result=None, verification=None):
         """Reset UI after typing completion"""
         self.typing_active = False
-        self.status_var.set("✅ Typing completed successfully!")
+        self.stop_hotkeys()
+        self.last_typed_text = self.typed_text
+        clear_checkpoint()
+        self.checkpoint = None
+        self.update_resume_button()
+        status = "✅ Typing completed successfully!" if not self.backend.simulated else "🧪 Dry run complete - nothing was typed"
+        if result is not None:
+            status += f" ({result.summary()})"
+        if self.edit_plan is not None:
+            status += f" - {self.edit_plan.saved} keystrokes saved"
+        if verification is not None:
+            status += f" - {verification.summary()}"
+        if self.capture is not None:
+            status += f" - recorded to {os.path.basename(self.capture.writer.path)}"
+        self.status_var.set(status)
         self.timer_var.set("🎉 DONE!")
         self.start_button.config(state=tk.NORMAL, bg=self.colors['accent_green'])
+        self.pause_button.config(state=tk.DISABLED, text="⏸ PAUSE", bg=self.colors['bg_accent'])
         self.cancel_button.config(state=tk.DISABLED, bg=self.colors['bg_accent'])
+        self.backend_menu.config(state=tk.NORMAL)
+        self.file_button.config(state=tk.NORMAL)
+        self.calibrate_button.config(state=tk.NORMAL)
+        self.clear_button.config(state=tk.NORMAL)
+        
+    def toggle_pause(self):
+        """Pause or resume the countdown or typing"""
+        if self.control.paused:
+            self.control.resume()
+            self.pause_button.config(text="⏸ PAUSE")
+            self.status_var.set("▶️ Typing resumed")
+        else:
+            self.control.pause()
+            self.pause_button.config(text="▶️ RESUME")
+            self.status_var.set("⏸ Typing paused")
+        
+    def typing_failed(self, error):
+        """Reset the UI after typing stopped on an error, naming the backend it came from"""
+        self.cancel_typing()
+        self.status_var.set(f"❌ Error: typing through the {self.backend.name} backend failed: {error}")
         
     def cancel_typing(self):
         """Cancel typing process"""
         self.typing_active = False
+        self.stop_hotkeys()
+        if self.control is not None:
+            self.control.cancel()
         self.status_var.set("❌ Typing cancelled")
         self.timer_var.set("")
         self.start_button.config(state=tk.NORMAL, bg=self.colors['accent_green'])
+        self.pause_button.config(state=tk.DISABLED, text="⏸ PAUSE", bg=self.colors['bg_accent'])
         self.cancel_button.config(state=tk.DISABLED, bg=self.colors['bg_accent'])
+        self.backend_menu.config(state=tk.NORMAL)
+        self.file_button.config(state=tk.NORMAL)
+        self.calibrate_button.config(state=tk.NORMAL)
+        self.clear_button.config(state=tk.NORMAL)
 
 if __name__ == "__main__":
+    app = None
     try:
         root = tk.Tk()
         app = ModernTextTyperApp(root)
+        
+        # Optional document to type in large-document mode ("-" reads stdin)
+        if len(sys.argv) > 1:
+            app.open_file(spool_stdin() if sys.argv[1] == "-" else sys.argv[1])
         root.mainloop()
     except Exception as e:
         import tkinter.messagebox as messagebox
-        messagebox.showerror("Error", f"Application error: {str(e)}\n\nEnsure pyautogui is installed: pip install pyautogui")
+        backend = app.backend_var.get() if app is not None else default_backend(available_backends())
+        messagebox.showerror("Error", f"Application error: {str(e)}\n\nTyping backend: {backend}")
@@ -0,0 +1,244 @@
+import asyncio
+import time
+
+from control import ControlState
+from engine import Pacing, RunResult, next_burst
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AsyncRunControl(ControlState):
+    """Cancel, pause and resume for runs on an asyncio loop
+
+    Same attributes and methods as control.RunControl, but the waits are
+    coroutines. Everything must be called on the loop's thread; other
+    threads (such as a hotkey listener) go through loop.call_soon_threadsafe.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        super().__init__(clock)
+        self.waiters = set()  # futures of the coroutines waiting on this control
+
+    def changed(self):
+        """Wake every waiter, which then re-checks the flags"""
+        for waiter in self.waiters:
+            _wake(waiter)
+
+    def cancel(self):
+        self.mark_cancelled()
+        self.changed()
+
+    def pause(self):
+        self.paused = True
+        self.changed()
+
+    def resume(self):
+        self.paused = False
+        self.changed()
+
+    async def wait(self, timeout=None):
+        """Sleep until the next change, or timeout seconds"""
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self.waiters.add(waiter)
+        timer = loop.call_later(timeout, _wake, waiter) if timeout is not None else None
+        try:
+            await waiter
+        finally:
+            self.waiters.discard(waiter)
+            if timer is not None:
+                timer.cancel()
+
+    async def sleep_until(self, deadline):
+        """Sleep until deadline; returns False early if cancelled or paused"""
+        while not (self.cancelled or self.paused):
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                return True
+            await self.wait(remaining)
+        return False
+
+    async def wait_while_paused(self):
+        """Wait while paused; returns the seconds spent waiting"""
+        started = self.clock()
+        while self.paused and not self.cancelled:
+            await self.wait()
+        return self.clock() - started
+
+    async def hold(self, seconds):
+        """Sleep for seconds of un-paused time; returns False if cancelled"""
+        remaining = seconds
+        while not self.cancelled:
+            started = self.clock()
+            if await self.sleep_until(started + remaining):
+                return True
+            remaining -= self.clock() - started
+            await self.wait_while_paused()
+        return False
+
+
+class AsyncTypingEngine:
+    """TypingEngine's runs as coroutines, so any number of them can share one thread
+
+    The deadlines and catch-up come from the same engine.Pacing as
+    TypingEngine; only the waits differ. They are loop timers rather than
+    a sleeping thread, and every batch is followed by a yield, so a run
+    never holds the loop for longer than one backend call. Progress is
+    reported at most every progress_interval seconds, and always for the
+    last batch.
+    """
+
+    def __init__(self, backend, control=None, max_catchup=0.05, batch_limit=64, burst_time=0.005,
+                 trace=None, progress_interval=0.05):
+        self.backend = backend
+        self.control = control or AsyncRunControl()
+        self.clock = self.control.clock
+        self.max_catchup = max_catchup
+        self.batch_limit = batch_limit
+        self.burst_time = burst_time
+        self.trace = trace  # optional instrument.KeystrokeTrace
+        self.progress_interval = progress_interval
+
+    async def run(self, schedule, start_index=0, on_progress=None):
+        """Type schedule from start_index, pacing every keystroke against absolute deadlines"""
+        offsets = schedule.offsets
+        total = len(schedule)
+        clock = self.clock
+        control = self.control
+
+        started = reported = clock()
+        pacing = Pacing(self, schedule, start_index, started - offsets[start_index])
+        while pacing.index < total and not control.cancelled:
+            if control.paused:
+                # Slide the remaining timeline by however long the pause lasted
+                pacing.origin += await control.wait_while_paused()
+                continue
+            deadline = pacing.due()
+            if deadline is not None:
+                if not await control.sleep_until(deadline):
+                    continue
+            else:
+                # Already due: still let the other tasks and Tk have the loop between batches
+                await asyncio.sleep(0)
+                if control.cancelled or control.paused:
+                    continue
+            index = pacing.send()
+            if on_progress is not None and (index == total
+                                            or control.last_keystroke - reported >= self.progress_interval):
+                reported = control.last_keystroke
+                on_progress(index, total)
+        pacing.finish()
+
+        index = pacing.index
+        completed = index >= total and not control.cancelled
+        if completed:
+            await control.sleep_until(pacing.origin + offsets[total])
+        return RunResult(
+            index - start_index,
+            total - start_index,
+            offsets[total] - offsets[start_index],
+            clock() - started,
+            completed,
+            pacing.stalls,
+            control.cancel_latency,
+        )
+
+    async def run_instant(self, text, on_progress=None, start_index=0, max_burst=4096):
+        """Type text from start_index as fast as the backend allows, yielding after every burst"""
+        clock = self.clock
+        write = self.backend.write
+        control = self.control
+        trace = self.trace
+        total = len(text)
+        index = start_index
+        burst = 16
+
+        started = reported = clock()
+        while index < total and not control.cancelled:
+            if control.paused:
+                await control.wait_while_paused()
+                continue
+            end = min(total, index + burst)
+            burst_started = clock()
+            write(text[index:end])
+            control.last_keystroke = clock()
+            if trace is not None:
+                trace.record(burst_started, control.last_keystroke, end - index)
+            burst = next_burst(burst, control.last_keystroke - burst_started, self.burst_time, max_burst)
+            index = end
+            if on_progress is not None and (index == total
+                                            or control.last_keystroke - reported >= self.progress_interval):
+                reported = control.last_keystroke
+                on_progress(index, total)
+            await asyncio.sleep(0)
+
+        return RunResult(index - start_index, total - start_index, None, clock() - started,
+                         not control.cancelled, cancel_latency=control.cancel_latency)
+
+    async def countdown(self, seconds, on_tick=None):
+        """Count whole seconds down, calling on_tick(remaining) each one; False if cancelled"""
+        for remaining in range(seconds, 0, -1):
+            if on_tick is not None:
+                on_tick(remaining)
+            if not await self.control.hold(1):
+                return False
+        return True
+
+
+class TkLoopDriver:
+    """Steps an asyncio loop from Tk's mainloop with root.after, on the Tk thread
+
+    Each tick runs one loop iteration: the ready callbacks and the timers
+    that are due, without blocking. While tasks are running the next tick
+    is busy_ms away, otherwise idle_ms, so an idle driver costs next to
+    nothing. Coroutines on the loop may touch Tk directly. A long Tk
+    callback delays every task; TypingEngine in a worker process is the
+    cure for that, not this.
+    """
+
+    def __init__(self, root, loop=None, busy_ms=1, idle_ms=50):
+        self.root = root
+        self.loop = loop or asyncio.new_event_loop()
+        self.busy_ms = busy_ms
+        self.idle_ms = idle_ms
+        self.job = None
+        self.ticking = False
+
+    def start(self):
+        if self.job is None:
+            self.job = self.root.after(0, self.tick)
+
+    def stop(self):
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+
+    def close(self):
+        self.stop()
+        for task in asyncio.all_tasks(self.loop):
+            task.cancel()
+        self.loop.close()
+
+    def submit(self, coroutine):
+        """Run coroutine as a task on the loop; returns the asyncio.Task"""
+        task = self.loop.create_task(coroutine)
+        if not self.ticking:
+            # Take its first step on the next pass of the Tk loop, not after an idle tick
+            self.stop()
+            self.job = self.root.after(0, self.tick)
+        return task
+
+    def tick(self):
+        loop = self.loop
+        self.job = None
+        self.ticking = True
+        try:
+            loop.call_soon(loop.stop)
+            loop.run_forever()
+        finally:
+            self.ticking = False
+        busy = any(not task.done() for task in asyncio.all_tasks(loop))
+        self.job = self.root.after(self.busy_ms if busy else self.idle_ms, self.tick)
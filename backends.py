@@ -0,0 +1,465 @@
+import os
+import struct
+import time
+from collections import OrderedDict
+
+from keymap import DEFAULT_LAYOUT, PRESS, RELEASE, TAP, UNICODE, get_keymap, register_layout
+
+
+class BackendError(RuntimeError):
+    """Raised when an injection backend cannot be opened or used"""
+
+
+class InjectionBackend:
+    """Base class for everything the typing engine can send keystrokes through"""
+    name = "base"
+    requires = None  # importable module the backend depends on
+    simulated = False  # True if keystrokes never reach the screen
+
+    def __init__(self, layout=DEFAULT_LAYOUT):
+        self.per_event_cost = None
+        self.is_open = False
+        self.keymap = get_keymap(layout)
+
+    @classmethod
+    def is_available(cls):
+        """Check the backend's dependency without importing it"""
+        import importlib.util
+        return cls.requires is None or importlib.util.find_spec(cls.requires) is not None
+
+    def open(self):
+        """Acquire whatever the backend needs before the first keystroke"""
+        self.is_open = True
+
+    def close(self):
+        """Release the backend's resources"""
+        self.is_open = False
+
+    def write(self, text):
+        """Type every character in text as a single batch"""
+        self.send(self.keymap.events(text))
+
+    def send(self, events):
+        """Inject a batch of (kind, key) events from KeyMap.events()"""
+        raise NotImplementedError
+
+    def expand_unicode(self, events):
+        """Replace UNICODE events with the keymap's generic key-sequence fallback"""
+        for kind, key in events:
+            if kind == UNICODE:
+                yield from self.keymap.unicode_events(key)
+            else:
+                yield kind, key
+
+    def press(self, key, count=1):
+        """Press a named key (e.g. 'backspace', 'left') count times"""
+        raise NotImplementedError
+
+    def hotkey(self, *keys):
+        """Hold keys down in order and release them in reverse"""
+        raise NotImplementedError
+
+    def probe(self):
+        """Inject one event that has no visible effect on the target"""
+        self.press('shift')
+
+    def measure_cost(self, samples=100):
+        """Measure and remember the average cost of one injected event"""
+        start = time.perf_counter()
+        for _ in range(samples):
+            self.probe()
+        self.per_event_cost = (time.perf_counter() - start) / samples
+        return self.per_event_cost
+
+    def describe_cost(self):
+        """Human readable per-event cost for status displays"""
+        if self.per_event_cost is None:
+            return "not measured"
+        return f"{self.per_event_cost * 1e6:.1f} µs/event"
+
+
+# Keymap key names that pyautogui spells differently
+PYAUTOGUI_KEY_NAMES = {
+    'minus': '-', 'equal': '=', 'leftbrace': '[', 'rightbrace': ']',
+    'backslash': '\\', 'semicolon': ';', 'apostrophe': "'", 'grave': '`',
+    'comma': ',', 'dot': '.', 'slash': '/', '102nd': '\\',
+}
+
+
+class PyAutoGUIBackend(InjectionBackend):
+    """Portable backend built on pyautogui"""
+    name = "pyautogui"
+    requires = "pyautogui"
+
+    def open(self):
+        try:
+            import pyautogui
+        except ImportError as e:
+            raise BackendError("pyautogui is not installed: pip install pyautogui") from e
+        self._pyautogui = pyautogui
+        # pyautogui sleeps PAUSE seconds after every call; pacing is the engine's job
+        self._saved_pause = pyautogui.PAUSE
+        pyautogui.PAUSE = 0
+        super().open()
+
+    def close(self):
+        if self.is_open:
+            self._pyautogui.PAUSE = self._saved_pause
+        super().close()
+
+    def send(self, events):
+        pyautogui = self._pyautogui
+        for kind, key in self.expand_unicode(events):
+            key = PYAUTOGUI_KEY_NAMES.get(key, key)
+            if kind == TAP:
+                pyautogui.press(key)
+            elif kind == PRESS:
+                pyautogui.keyDown(key)
+            else:
+                pyautogui.keyUp(key)
+
+    def press(self, key, count=1):
+        self._pyautogui.press(key, presses=count)
+
+    def hotkey(self, *keys):
+        self._pyautogui.hotkey(*keys)
+
+    def probe(self):
+        self._pyautogui.keyDown('shift')
+        self._pyautogui.keyUp('shift')
+
+
+# Key names shared by the backends -> X11 keysym names
+X11_KEY_NAMES = {
+    'enter': 'Return', 'tab': 'Tab', 'space': 'space', 'backspace': 'BackSpace',
+    'delete': 'Delete', 'escape': 'Escape', 'left': 'Left', 'right': 'Right',
+    'up': 'Up', 'down': 'Down', 'home': 'Home', 'end': 'End',
+    'pageup': 'Prior', 'pagedown': 'Next', 'shift': 'Shift_L',
+    'ctrl': 'Control_L', 'alt': 'Alt_L', 'super': 'Super_L',
+    'minus': 'minus', 'equal': 'equal', 'leftbrace': 'bracketleft',
+    'rightbrace': 'bracketright', 'backslash': 'backslash',
+    'semicolon': 'semicolon', 'apostrophe': 'apostrophe', 'grave': 'grave',
+    'comma': 'comma', 'dot': 'period', 'slash': 'slash',
+}
+
+
+# X11 keysyms that stand for control characters
+X11_CONTROL_KEYSYMS = {0xff0d: '\n', 0xff09: '\t'}
+
+
+def keysym_to_char(keysym):
+    """Character an X11 keysym types, or None"""
+    if 0x20 <= keysym <= 0x7e or 0xa0 <= keysym <= 0xff:
+        return chr(keysym)  # Latin-1 keysyms equal their code points
+    if keysym & 0xff000000 == 0x01000000:
+        return chr(keysym & 0x00ffffff)
+    return X11_CONTROL_KEYSYMS.get(keysym)
+
+
+class XTestBackend(InjectionBackend):
+    """X11 backend that queues XTest fake key events and flushes them once per batch
+
+    The layout is read from the X server's keyboard mapping when the backend
+    is opened, and characters the mapping lacks are typed by temporarily
+    binding their keysym to one of the unused keycodes. close() unbinds them.
+    """
+    name = "xtest"
+    requires = "Xlib"
+    # Seconds a spare keycode keeps its binding after a tap before it may be
+    # rebound, so the target has handled the tap before its MappingNotify
+    unicode_settle = 0.01
+
+    def open(self):
+        try:
+            from Xlib import X, XK, display
+            from Xlib.ext import xtest
+        except ImportError as e:
+            raise BackendError("python-xlib is not installed: pip install python-xlib") from e
+        try:
+            self._display = display.Display()
+        except Exception as e:
+            raise BackendError(f"Cannot connect to the X server: {e}") from e
+        if not self._display.has_extension('XTEST'):
+            raise BackendError("The X server does not support the XTEST extension")
+        self._X = X
+        self._XK = XK
+        self._fake_input = xtest.fake_input
+        self._keycodes = {}
+        self._unicode_keys = OrderedDict()  # char -> spare keycode bound to it, least recently used first
+        self._tapped = {}  # spare keycode -> time of its last tap
+        self.keymap = get_keymap(self._load_server_layout())
+        self._shift = self._keycode('shift')
+        super().open()
+
+    def close(self):
+        if self.is_open:
+            if self._unicode_keys:
+                self._settle(*self._unicode_keys.values())
+                # Give the spare keycodes back the bindings they had when the backend opened
+                for keycode in self._unicode_keys.values():
+                    self._display.change_keyboard_mapping(keycode, [self._spare_mappings[keycode]])
+                self._display.sync()
+                self._unicode_keys.clear()
+            self._display.close()
+        super().close()
+
+    def _load_server_layout(self):
+        """Register the server's keyboard mapping as a layout; returns its name"""
+        first = self._display.display.info.min_keycode
+        count = self._display.display.info.max_keycode - first + 1
+        table = {}
+        self._spares = []
+        self._spare_mappings = {}  # spare keycode -> its keysyms, restored by close()
+        for offset, keysyms in enumerate(self._display.get_keyboard_mapping(first, count)):
+            keycode = first + offset
+            if not any(keysyms):
+                # Unbound: free for temporary Unicode bindings
+                self._spares.append(keycode)
+                self._spare_mappings[keycode] = list(keysyms)
+                continue
+            for level, keysym in enumerate(keysyms[:2]):
+                char = keysym_to_char(keysym)
+                if char is not None and char not in table:
+                    table[char] = (keycode, level == 1)
+            # Letters are often listed only in lower case; Shift gives the capital
+            char = keysym_to_char(keysyms[0])
+            if char is not None and char.isalpha() and char.upper() not in table:
+                table[char.upper()] = (keycode, True)
+        layout = f"x11:{self._display.get_display_name()}"
+        register_layout(layout, table)
+        return layout
+
+    def _keycode(self, key):
+        """Keycode for a keymap key: keycodes pass through, names are resolved once"""
+        if isinstance(key, int):
+            return key
+        keycode = self._keycodes.get(key)
+        if keycode is None:
+            keysym = self._XK.string_to_keysym(X11_KEY_NAMES.get(key, key))
+            keycode = self._display.keysym_to_keycode(keysym)
+            if not keycode:
+                raise BackendError(f"No keycode for key '{key}'")
+            self._keycodes[key] = keycode
+        return keycode
+
+    def _tap(self, keycode):
+        self._fake_input(self._display, self._X.KeyPress, keycode)
+        self._fake_input(self._display, self._X.KeyRelease, keycode)
+
+    def _settle(self, *keycodes):
+        """Wait until the server has processed every tap so far and keycodes have settled"""
+        self._display.sync()
+        wait = max(self._tapped.get(keycode, 0.0) for keycode in keycodes) + self.unicode_settle - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _type_unicode(self, char):
+        """Tap char on a spare keycode bound to its keysym
+
+        Spare keycodes are used in turn and keep their character while
+        others are free, so repeated characters are not rebound. Only the
+        least recently used one is ever rebound, and only once its last tap
+        has settled: the target reads each key with the mapping current when
+        it handles the event, not when the key was sent.
+        """
+        if not self._spares:
+            self.send(self.keymap.unicode_events(char))
+            return
+        keycode = self._unicode_keys.pop(char, None)
+        if keycode is None:
+            if len(self._unicode_keys) < len(self._spares):
+                keycode = self._spares[len(self._unicode_keys)]
+            else:
+                _, keycode = self._unicode_keys.popitem(last=False)
+                self._settle(keycode)
+            keysym = 0x01000000 | ord(char)
+            self._display.change_keyboard_mapping(keycode, [(keysym, keysym)])
+            self._display.sync()
+        self._unicode_keys[char] = keycode
+        self._tapped[keycode] = time.perf_counter()
+        self._tap(keycode)
+
+    def send(self, events):
+        display = self._display
+        fake_input = self._fake_input
+        key_press, key_release = self._X.KeyPress, self._X.KeyRelease
+        for kind, key in events:
+            if kind == UNICODE:
+                self._type_unicode(key)
+                continue
+            keycode = self._keycode(key)
+            if kind != RELEASE:
+                fake_input(display, key_press, keycode)
+            if kind != PRESS:
+                fake_input(display, key_release, keycode)
+        # The fake_input requests sit in Xlib's output buffer until this single flush
+        display.sync()
+
+    def press(self, key, count=1):
+        keycode = self._keycode(key)
+        for _ in range(count):
+            self._tap(keycode)
+        self._display.sync()
+
+    def hotkey(self, *keys):
+        X = self._X
+        keycodes = [self._keycode(key) for key in keys]
+        for keycode in keycodes:
+            self._fake_input(self._display, X.KeyPress, keycode)
+        for keycode in reversed(keycodes):
+            self._fake_input(self._display, X.KeyRelease, keycode)
+        self._display.sync()
+
+    def probe(self):
+        self._tap(self._shift)
+        self._display.sync()
+
+
+class UInputBackend(InjectionBackend):
+    """Linux kernel backend that writes a whole batch of input_events in one syscall"""
+    name = "uinput"
+    requires = "evdev"
+
+    # struct input_event: struct timeval, __u16 type, __u16 code, __s32 value
+    EVENT_FORMAT = 'llHHi'
+    # Keymap key names whose evdev KEY_* constant is spelled differently
+    KEY_NAMES = {'shift': 'LEFTSHIFT', 'ctrl': 'LEFTCTRL', 'alt': 'LEFTALT',
+                 'super': 'LEFTMETA', 'escape': 'ESC'}
+
+    def open(self):
+        try:
+            from evdev import UInput, ecodes
+        except ImportError as e:
+            raise BackendError("python-evdev is not installed: pip install evdev") from e
+        try:
+            self._uinput = UInput(name="ultra-fast-text-typer")
+        except Exception as e:
+            raise BackendError(f"Cannot open /dev/uinput (check permissions): {e}") from e
+        self._ecodes = ecodes
+        self._codes = {}
+        self._event = struct.Struct(self.EVENT_FORMAT)
+        self._syn = self._event.pack(0, 0, ecodes.EV_SYN, ecodes.SYN_REPORT, 0)
+        self._shift = self._code('shift')
+        # Give the input stack a moment to pick up the new device
+        time.sleep(0.1)
+        super().open()
+
+    def close(self):
+        if self.is_open:
+            self._uinput.close()
+        super().close()
+
+    def _code(self, key):
+        code = self._codes.get(key)
+        if code is None:
+            code = getattr(self._ecodes, 'KEY_' + self.KEY_NAMES.get(key, key.upper()), None)
+            if code is None:
+                raise BackendError(f"No uinput key code for key '{key}'")
+            self._codes[key] = code
+        return code
+
+    def _key_event(self, code, value):
+        return self._event.pack(0, 0, self._ecodes.EV_KEY, code, value) + self._syn
+
+    def _tap(self, code):
+        return self._key_event(code, 1) + self._key_event(code, 0)
+
+    def send(self, events):
+        batch = []
+        for kind, key in self.expand_unicode(events):
+            code = self._code(key)
+            if kind != RELEASE:
+                batch.append(self._key_event(code, 1))
+            if kind != PRESS:
+                batch.append(self._key_event(code, 0))
+        os.write(self._uinput.fd, b''.join(batch))
+
+    def press(self, key, count=1):
+        os.write(self._uinput.fd, self._tap(self._code(key)) * count)
+
+    def hotkey(self, *keys):
+        codes = [self._code(key) for key in keys]
+        events = [self._key_event(code, 1) for code in codes]
+        events += [self._key_event(code, 0) for code in reversed(codes)]
+        os.write(self._uinput.fd, b''.join(events))
+
+    def probe(self):
+        os.write(self._uinput.fd, self._tap(self._shift))
+
+
+class RecordingBackend(InjectionBackend):
+    """In-memory stand-in that timestamps every event instead of typing it"""
+    name = "recording"
+    simulated = True
+
+    def __init__(self, clock=time.perf_counter, event_cost=0.0, layout=DEFAULT_LAYOUT):
+        super().__init__(layout)
+        self.clock = clock
+        self.event_cost = event_cost  # simulated seconds spent per event
+        self.events = []  # (timestamp, key) or (timestamp, (kind, key)) from send()
+
+    def _spend(self, count):
+        if self.event_cost:
+            end = self.clock() + self.event_cost * count
+            while self.clock() < end:
+                pass
+
+    def write(self, text):
+        self._spend(len(text))
+        now = self.clock()
+        self.events.extend((now, char) for char in text)
+
+    def send(self, events):
+        events = list(events)
+        self._spend(len(events))
+        now = self.clock()
+        self.events.extend((now, event) for event in events)
+
+    def press(self, key, count=1):
+        self._spend(count)
+        now = self.clock()
+        self.events.extend((now, key) for _ in range(count))
+
+    def hotkey(self, *keys):
+        self._spend(1)
+        self.events.append((self.clock(), '+'.join(keys)))
+
+    def probe(self):
+        self._spend(1)
+
+    @property
+    def text(self):
+        """Everything typed so far, ignoring named keys"""
+        return ''.join(key for _, key in self.events if isinstance(key, str) and len(key) == 1)
+
+    def clear(self):
+        self.events = []
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (PyAutoGUIBackend, XTestBackend, UInputBackend, RecordingBackend)
+}
+DEFAULT_BACKEND = PyAutoGUIBackend.name
+
+
+def available_backends():
+    """Names of the backends whose dependencies are installed"""
+    return [name for name, backend in BACKENDS.items() if backend.is_available()]
+
+
+def default_backend(names):
+    """The backend to start on out of names: DEFAULT_BACKEND, else the first that really types"""
+    if DEFAULT_BACKEND in names:
+        return DEFAULT_BACKEND
+    real = [name for name in names if not BACKENDS[name].simulated]
+    return real[0] if real else names[0]
+
+
+def create_backend(name, **kwargs):
+    """Instantiate a backend by name"""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise BackendError(f"Unknown backend '{name}'") from None
+    return backend_class(**kwargs)
@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import threading
+import time
+
+from aio_engine import AsyncTypingEngine, TkLoopDriver
+from backends import RecordingBackend
+from bench_typing import sample_text
+from engine import TypingEngine
+from instrument import KeystrokeTrace
+from schedule import MODERN_PROFILE, compile_schedule
+
+
+def session_stats(engines, results):
+    """Worst jitter and total stalls over the sessions"""
+    reports = [engine.trace.report(result.elapsed) for engine, result in zip(engines, results)]
+    return {
+        'jitter_p50_ms': max(report.jitter_ms['p50'] for report in reports),
+        'jitter_p99_ms': max(report.jitter_ms['p99'] for report in reports),
+        'jitter_max_ms': max(report.jitter_ms['max'] for report in reports),
+        'stalls': sum(len(report.stalls) for report in reports),
+        'completed': all(result.completed for result in results),
+    }
+
+
+def bench_threaded(schedule, sessions):
+    """The current design: per START a countdown thread, which starts a typing thread"""
+    engines = [TypingEngine(RecordingBackend(), trace=KeystrokeTrace()) for _ in range(sessions)]
+    results = [None] * sessions
+    typing_threads = []
+
+    def countdown(index):
+        thread = threading.Thread(target=lambda: results.__setitem__(index, engines[index].run(schedule)))
+        typing_threads.append(thread)
+        thread.start()
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    countdowns = [threading.Thread(target=countdown, args=(index,)) for index in range(sessions)]
+    for thread in countdowns:
+        thread.start()
+    for thread in countdowns:
+        thread.join()
+    for thread in typing_threads:
+        thread.join()
+    case = session_stats(engines, results)
+    case['start_ms'] = statistics.median((next(engine.trace.rows())[0] - wall) * 1000 for engine in engines)
+    case['cpu_s'] = time.process_time() - cpu
+    case['wall_s'] = time.perf_counter() - wall
+    case['threads'] = 2 * sessions
+    return case
+
+
+async def run_tasks(schedule, sessions):
+    engines = [AsyncTypingEngine(RecordingBackend(), trace=KeystrokeTrace()) for _ in range(sessions)]
+    cpu, wall = time.process_time(), time.perf_counter()
+    results = await asyncio.gather(*(engine.run(schedule) for engine in engines))
+    case = session_stats(engines, results)
+    case['start_ms'] = statistics.median((next(engine.trace.rows())[0] - wall) * 1000 for engine in engines)
+    case['cpu_s'] = time.process_time() - cpu
+    case['wall_s'] = time.perf_counter() - wall
+    case['threads'] = 0
+    return case
+
+
+def bench_asyncio(schedule, sessions):
+    """The same sessions as tasks on a plain asyncio loop"""
+    return asyncio.run(run_tasks(schedule, sessions))
+
+
+def bench_tk(schedule, sessions):
+    """The same sessions as tasks on a loop stepped by TkLoopDriver inside mainloop()"""
+    # Imported here: only this case needs tkinter and a display
+    import tkinter as tk
+    root = tk.Tk()
+    root.withdraw()
+    driver = TkLoopDriver(root)
+    outcome = {}
+
+    async def main():
+        outcome['case'] = await run_tasks(schedule, sessions)
+        root.quit()
+
+    driver.submit(main())
+    root.mainloop()
+    driver.close()
+    root.destroy()
+    return outcome['case']
+
+
+def print_case(case):
+    print(f"{case['mode']:<9} x{case['sessions']:<3} start {case['start_ms']:7.3f}ms  "
+          f"jitter p50 {case['jitter_p50_ms']:.3f} p99 {case['jitter_p99_ms']:.3f} max {case['jitter_max_ms']:.3f}ms  "
+          f"cpu {case['cpu_s']:.2f}s / wall {case['wall_s']:.2f}s  threads {case['threads']}"
+          f"{'' if case['completed'] else '  INCOMPLETE'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare scheduling overhead of thread-per-phase typing and asyncio tasks on one loop")
+    parser.add_argument('--wpm', type=int, default=3000)
+    parser.add_argument('--size', type=int, default=1000, help="characters each session types")
+    parser.add_argument('--sessions', nargs='+', type=int, default=[1, 4, 16],
+                        help="numbers of concurrent typing sessions to run")
+    parser.add_argument('--tk', action='store_true', help="also run the tasks inside Tk's mainloop (needs a display)")
+    parser.add_argument('--output', help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    schedule = compile_schedule(sample_text(args.size), args.wpm, False, MODERN_PROFILE)
+    modes = [('threaded', bench_threaded), ('asyncio', bench_asyncio)]
+    if args.tk:
+        modes.append(('tk-loop', bench_tk))
+    cases = []
+    for sessions in args.sessions:
+        for mode, bench in modes:
+            case = {'mode': mode, 'sessions': sessions, 'wpm': args.wpm}
+            case.update(bench(schedule, sessions))
+            cases.append(case)
+            print_case(case)
+    if args.output:
+        results = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cases': cases,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
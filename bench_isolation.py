@@ -0,0 +1,105 @@
+import argparse
+import json
+import platform
+import threading
+import time
+
+from backends import RecordingBackend
+from bench_typing import sample_text
+from engine import TypingEngine
+from instrument import KeystrokeTrace
+from procworker import ProcessEngine
+from schedule import MODERN_PROFILE, compile_schedule
+
+
+def ui_load(done, busy, period):
+    """Stand-in for Tk redraws and status updates: hold the GIL for busy seconds every period"""
+    while not done.is_set():
+        end = time.perf_counter() + busy
+        while time.perf_counter() < end:
+            pass
+        time.sleep(max(0.0, period - busy))
+
+
+def timed_run(engine, schedule, busy, period):
+    """Run schedule on a worker thread while this thread plays the Tk main loop"""
+    done = threading.Event()
+    outcome = {}
+
+    def worker():
+        outcome['sent'] = time.perf_counter()
+        outcome['result'] = engine.run(schedule)
+        done.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    ui_load(done, busy, period)
+    thread.join()
+    report = engine.trace.report(outcome['result'].elapsed)
+    return {
+        'start_latency_ms': (report.rows[0][0] - outcome['sent']) * 1000 if report.rows else None,
+        'jitter_ms': report.jitter_ms,
+        'stalls': len(report.stalls),
+        'achieved_wpm': outcome['result'].achieved_wpm,
+    }
+
+
+def bench_threaded(schedule, busy, period):
+    engine = TypingEngine(RecordingBackend(), trace=KeystrokeTrace())
+    return timed_run(engine, schedule, busy, period)
+
+
+def bench_process(schedule, busy, period):
+    engine = ProcessEngine(RecordingBackend.name, trace=KeystrokeTrace())
+    engine.start()
+    try:
+        case = timed_run(engine, schedule, busy, period)
+    finally:
+        engine.close()
+    case['worker_startup_ms'] = engine.startup_time * 1000
+    return case
+
+
+def print_case(case):
+    jitter = case['jitter_ms']
+    line = (f"{case['mode']:<8} load={case['load_ms']:>4}ms/{case['period_ms']}ms  "
+            f"start {case['start_latency_ms']:.3f}ms  jitter p50 {jitter['p50']:.3f} p99 {jitter['p99']:.3f} "
+            f"max {jitter['max']:.3f}ms  stalls {case['stalls']}")
+    if 'worker_startup_ms' in case:
+        line += f"  (worker startup {case['worker_startup_ms']:.0f}ms)"
+    print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare keystroke timing of the threaded engine and the worker process under Tk-like GIL load")
+    parser.add_argument('--wpm', type=int, default=3000)
+    parser.add_argument('--size', type=int, default=2000, help="characters to type per case")
+    parser.add_argument('--loads', nargs='+', type=float, default=[0, 2, 4, 8],
+                        help="milliseconds of GIL-holding UI work per period")
+    parser.add_argument('--period', type=float, default=16, help="UI work period in milliseconds (default: 16)")
+    parser.add_argument('--output', help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    schedule = compile_schedule(sample_text(args.size), args.wpm, False, MODERN_PROFILE)
+    cases = []
+    for load in args.loads:
+        for mode, bench in (('threaded', bench_threaded), ('process', bench_process)):
+            case = {'mode': mode, 'load_ms': load, 'period_ms': args.period, 'wpm': args.wpm}
+            case.update(bench(schedule, load / 1000, args.period / 1000))
+            cases.append(case)
+            print_case(case)
+    if args.output:
+        results = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cases': cases,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
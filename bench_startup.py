@@ -0,0 +1,75 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Startup paths to compare: the headless CLI against importing and launching the GUIs
+CASES = {
+    'cli import': "import cli",
+    'cli --list-backends': "import cli; cli.main(['--list-backends'])",
+    'main.py import': "import main",
+    'Improved.py import': "import Improved",
+}
+GUI_CASES = {
+    'Improved.py window': "import tkinter, Improved; root = tkinter.Tk(); "
+                          "Improved.ModernTextTyperApp(root); root.update(); root.destroy()",
+}
+
+
+def wall_time(code, runs):
+    """Median wall-clock milliseconds for a fresh interpreter to run code"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=HERE, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def import_time(code):
+    """Cumulative import microseconds reported by -X importtime, and whether tkinter was loaded"""
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=HERE,
+                            capture_output=True, text=True).stderr
+    total = 0
+    tkinter_loaded = False
+    for line in output.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not name.startswith('  ') and cumulative.strip().isdigit():
+            total += int(cumulative)  # top-level imports only, nested ones are included
+        if name.strip() == 'tkinter':
+            tkinter_loaded = True
+    return total, tkinter_loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare CLI and GUI startup times")
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    cases = dict(CASES)
+    if os.environ.get('DISPLAY') or sys.platform in ('win32', 'darwin'):
+        cases.update(GUI_CASES)
+
+    baseline = wall_time("pass", args.runs)
+    print(f"{'case':<24} {'wall ms':>9} {'over bare':>10} {'imports ms':>11}  tkinter")
+    print(f"{'bare interpreter':<24} {baseline:9.1f} {0:10.1f} {'':>11}")
+    for name, code in cases.items():
+        try:
+            elapsed = wall_time(code, args.runs)
+        except subprocess.CalledProcessError:
+            print(f"{name:<24} failed (missing dependency or display?)")
+            continue
+        imports, tkinter_loaded = import_time(code)
+        print(f"{name:<24} {elapsed:9.1f} {elapsed - baseline:10.1f} {imports / 1000:11.1f}  "
+              f"{'yes' if tkinter_loaded else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
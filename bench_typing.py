@@ -0,0 +1,221 @@
+import argparse
+import json
+import platform
+import random
+import string
+import threading
+import time
+
+from backends import RecordingBackend
+from engine import TypingEngine
+from instrument import KeystrokeTrace
+from schedule import CLASSIC_PROFILE, MODERN_PROFILE, compile_schedule
+
+# Typing settings of TextTyperApp (main.py) and ModernTextTyperApp (Improved.py)
+APPS = {
+    'classic': (CLASSIC_PROFILE, (200, 1000, 1500)),
+    'modern': (MODERN_PROFILE, (1000, 3000, 10000)),
+}
+
+
+def sample_text(size, seed=0):
+    """Deterministic prose-like text with punctuation and newlines"""
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size:
+        word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(1, 9)))
+        word += rng.choice(['', '', '', '', ',', '.', '.\n'])
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)[:size]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def keystroke_stats(events, offsets, started):
+    """Throughput, jitter and first-keystroke latency of one recorded run"""
+    times = [timestamp for timestamp, _ in events]
+    if not times:
+        return {'chars': 0}
+    first = times[0]
+    # Jitter: how far each keystroke landed from its scheduled offset
+    jitter = sorted(abs((t - first) - (offsets[i] - offsets[0])) * 1000 for i, t in enumerate(times))
+    span = times[-1] - first
+    return {
+        'chars': len(times),
+        'chars_per_sec': (len(times) - 1) / span if span else None,
+        'time_to_first_keystroke_ms': (first - started) * 1000,
+        'jitter_ms': {
+            'p50': percentile(jitter, 0.50),
+            'p90': percentile(jitter, 0.90),
+            'p99': percentile(jitter, 0.99),
+            'max': jitter[-1],
+        },
+    }
+
+
+def bench_schedule(profile, text, wpm, use_variance, event_cost):
+    """Type a schedule into a recording backend and measure it"""
+    schedule = compile_schedule(text, wpm, use_variance, profile, seed=0)
+    backend = RecordingBackend(event_cost=event_cost)
+    engine = TypingEngine(backend)
+    started = time.perf_counter()
+    result = engine.run(schedule)
+    stats = keystroke_stats(backend.events, schedule.offsets, started)
+    stats['target_wpm'] = result.target_wpm
+    stats['achieved_wpm'] = result.achieved_wpm
+    stats['stalls'] = result.stalls
+    return stats
+
+
+def bench_instant(text, event_cost, trace=None):
+    """Stream the whole text through INSTANT MODE"""
+    backend = RecordingBackend(event_cost=event_cost)
+    engine = TypingEngine(backend, trace=trace)
+    started = time.perf_counter()
+    result = engine.run_instant(text)
+    return {
+        'chars': len(backend.events),
+        'chars_per_sec': result.achieved_cps,
+        'time_to_first_keystroke_ms': (backend.events[0][0] - started) * 1000,
+    }
+
+
+def bench_cancel(profile, text, wpm, event_cost, cancel_after=0.2):
+    """Cancel a run mid-way and measure how long typing continues afterwards"""
+    backend = RecordingBackend(event_cost=event_cost)
+    engine = TypingEngine(backend)
+    if wpm is None:
+        worker = threading.Thread(target=engine.run_instant, args=(text,))
+    else:
+        schedule = compile_schedule(text, wpm, False, profile)
+        worker = threading.Thread(target=engine.run, args=(schedule,))
+    worker.start()
+    time.sleep(cancel_after)
+    cancelled = time.perf_counter()
+    engine.cancel()
+    worker.join()
+    stopped = time.perf_counter()
+    last_keystroke = backend.events[-1][0] if backend.events else cancelled
+    return {
+        'cancel_to_stop_ms': (stopped - cancelled) * 1000,
+        'cancel_to_last_keystroke_ms': max(0.0, last_keystroke - cancelled) * 1000,
+    }
+
+
+def run_suite(apps, sizes, max_seconds, event_cost):
+    """Run every app/size/WPM/variance combination that fits in max_seconds"""
+    cases = []
+    for app in apps:
+        profile, wpms = APPS[app]
+        for size in sizes:
+            text = sample_text(size)
+            for wpm in wpms:
+                for use_variance in (False, True):
+                    estimate = compile_schedule(text, wpm, use_variance, profile).duration
+                    if estimate > max_seconds:
+                        continue
+                    case = {'app': app, 'size': size, 'wpm': wpm, 'variance': use_variance}
+                    case.update(bench_schedule(profile, text, wpm, use_variance, event_cost))
+                    cases.append(case)
+                    print_case(case)
+            if app == 'modern':
+                case = {'app': app, 'size': size, 'mode': 'instant'}
+                case.update(bench_instant(text, event_cost))
+                cases.append(case)
+                print_case(case)
+                # Same again with every batch recorded, to keep the tracing overhead visible
+                case = {'app': app, 'size': size, 'mode': 'traced'}
+                case.update(bench_instant(text, event_cost, KeystrokeTrace()))
+                cases.append(case)
+                print_case(case)
+        case = {'app': app, 'mode': 'cancel', 'wpm': wpms[0]}
+        case.update(bench_cancel(profile, sample_text(100000), wpms[0], event_cost))
+        cases.append(case)
+        print_case(case)
+        if app == 'modern':
+            # Instant mode needs a real per-event cost to still be running when cancelled
+            case = {'app': app, 'mode': 'cancel', 'wpm': 'instant'}
+            case.update(bench_cancel(profile, sample_text(100000), None, max(event_cost, 10e-6)))
+            cases.append(case)
+            print_case(case)
+    return cases
+
+
+def case_key(case):
+    return (case['app'], case.get('mode', 'typing'), case.get('size'), case.get('wpm'), case.get('variance'))
+
+
+def print_case(case):
+    """Print one result line"""
+    label = f"{case['app']:<8} {case.get('mode', 'typing'):<7} size={case.get('size', '-')!s:<6} " \
+            f"wpm={case.get('wpm', '-')!s:<6} var={case.get('variance', '-')!s:<5}"
+    if 'cancel_to_stop_ms' in case:
+        print(f"{label} cancel->stop {case['cancel_to_stop_ms']:.2f}ms "
+              f"cancel->last key {case['cancel_to_last_keystroke_ms']:.2f}ms")
+        return
+    cps = case.get('chars_per_sec') or 0.0
+    line = f"{label} {cps:10.1f} chars/s  first key {case['time_to_first_keystroke_ms']:.3f}ms"
+    if 'jitter_ms' in case:
+        jitter = case['jitter_ms']
+        line += f"  jitter p50 {jitter['p50']:.3f} p99 {jitter['p99']:.3f} max {jitter['max']:.3f}ms"
+    print(line)
+
+
+def compare(cases, baseline_path):
+    """Print throughput and jitter changes against an earlier results file"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {case_key(case): case for case in json.load(f)['cases']}
+    print(f"\nChanges vs {baseline_path}:")
+    for case in cases:
+        old = baseline.get(case_key(case))
+        if old is None:
+            continue
+        parts = []
+        if case.get('chars_per_sec') and old.get('chars_per_sec'):
+            parts.append(f"chars/s {100 * (case['chars_per_sec'] / old['chars_per_sec'] - 1):+.1f}%")
+        if 'jitter_ms' in case and 'jitter_ms' in old:
+            parts.append(f"p99 jitter {case['jitter_ms']['p99'] - old['jitter_ms']['p99']:+.3f}ms")
+        if 'cancel_to_stop_ms' in case and 'cancel_to_stop_ms' in old:
+            parts.append(f"cancel {case['cancel_to_stop_ms'] - old['cancel_to_stop_ms']:+.2f}ms")
+        if parts:
+            print(f"  {' '.join(str(k) for k in case_key(case) if k is not None)}: {', '.join(parts)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the typing engines against a recording backend")
+    parser.add_argument('--apps', nargs='+', choices=sorted(APPS), default=sorted(APPS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[100, 1000])
+    parser.add_argument('--max-seconds', type=float, default=10.0,
+                        help="skip cases whose schedule is longer than this")
+    parser.add_argument('--event-cost', type=float, default=0.0,
+                        help="simulated backend cost per event, in microseconds")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', help="earlier JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    cases = run_suite(args.apps, args.sizes, args.max_seconds, args.event_cost / 1e6)
+    if args.output:
+        results = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'event_cost_us': args.event_cost,
+            'cases': cases,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare(cases, args.compare)
+
+
+if __name__ == "__main__":
+    main()
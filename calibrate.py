@@ -0,0 +1,169 @@
+import argparse
+import sys
+import threading
+
+from backends import BackendError, DEFAULT_BACKEND, available_backends, create_backend
+from control import RunControl
+from engine import TypingEngine
+from profiles import save_profile
+from schedule import TypingProfile, compile_schedule
+
+# Even pacing with no punctuation pauses, so the schedule rate is the rate under test
+CALIBRATION_PROFILE = TypingProfile("calibration", 0.0, "", 1.0)
+
+# Lower and upper case, digits, shifted symbols and newlines: everything that costs extra keys
+PATTERN = ("Pack my box with five dozen liquor jugs. THE QUICK BROWN FOX 0123456789\n"
+           "!@#$%^&*()_+ {}[]|:;'<>,.?/ ~`\"= -\n")
+
+
+class CalibrationResult:
+    """Highest WPM that arrived intact, and every rate that was tried"""
+
+    def __init__(self, wpm, trials, cancelled=False):
+        self.wpm = wpm  # None if even the slowest rate lost keys
+        self.trials = trials  # (wpm, arrived intact) in the order they ran
+        self.cancelled = cancelled
+
+    def summary(self):
+        if self.cancelled:
+            return "calibration cancelled"
+        if self.wpm is None:
+            return f"keys were lost even at {self.trials[-1][0]} WPM"
+        return f"{self.wpm} WPM with zero loss ({len(self.trials)} trials)"
+
+
+def find_max_wpm(trial, start=1000, minimum=100, maximum=60000, tolerance=0.05):
+    """Ramp the rate up until trial(wpm) loses keys, then bisect down to the edge
+
+    trial returns True when everything typed at wpm arrived intact, or None
+    if it was cancelled. The result is within tolerance of the true ceiling.
+    """
+    trials = []
+
+    def run(wpm):
+        ok = trial(wpm)
+        if ok is not None:
+            trials.append((wpm, ok))
+        return ok
+
+    good = bad = None
+    wpm = start
+    while good is None or bad is None:
+        ok = run(wpm)
+        if ok is None:
+            return CalibrationResult(good, trials, cancelled=True)
+        if ok:
+            good = wpm
+            if wpm >= maximum:
+                return CalibrationResult(good, trials)
+            wpm = min(maximum, wpm * 2) if bad is None else wpm
+        else:
+            bad = wpm
+            if wpm <= minimum:
+                return CalibrationResult(None, trials)
+            wpm = max(minimum, wpm // 2) if good is None else wpm
+
+    while bad - good > good * tolerance:
+        wpm = (good + bad) // 2
+        ok = run(wpm)
+        if ok is None:
+            return CalibrationResult(good, trials, cancelled=True)
+        if ok:
+            good = wpm
+        else:
+            bad = wpm
+    return CalibrationResult(good, trials)
+
+
+class SinkTrial:
+    """One calibration trial: type PATTERN into a TextSink and check it all arrived
+
+    Runs on a worker thread; every sink access goes through the UI pump.
+    """
+
+    def __init__(self, engine, sink, ui, repeats=3, settle=0.3):
+        self.engine = engine
+        self.sink = sink
+        self.ui = ui
+        self.text = PATTERN * repeats
+        self.settle = settle  # seconds for the sink to process queued events
+
+    def __call__(self, wpm):
+        control = self.engine.control
+        self.ui.call_sync(self.sink.clear)
+        self.ui.call_sync(self.sink.focus)
+        if not control.hold(self.settle):
+            return None
+        schedule = compile_schedule(self.text, wpm, False, CALIBRATION_PROFILE)
+        if not self.engine.run(schedule).completed:
+            return None
+        if not control.hold(self.settle):
+            return None
+        return self.ui.call_sync(self.sink.text) == self.text
+
+
+def calibrate_backend(root, ui, backend, control=None, on_trial=None, **search):
+    """Calibrate backend against a new TextSink; call from a worker thread"""
+    # Imported here: sink needs tkinter, which the CLI only loads for calibration
+    from sink import TextSink
+    sink = ui.call_sync(TextSink, root, "Calibrating - do not touch the keyboard")
+    engine = TypingEngine(backend, control or RunControl())
+    trial = SinkTrial(engine, sink, ui)
+    if on_trial is not None:
+        trial = _reporting(trial, on_trial)
+    try:
+        return find_max_wpm(trial, **search)
+    finally:
+        ui.call(sink.close)
+
+
+def _reporting(trial, on_trial):
+    def run(wpm):
+        on_trial(wpm)
+        return trial(wpm)
+    return run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Find the highest WPM a backend delivers into a local text window without losing "
+                    "keys, and save it as the default speed (needs a display)")
+    parser.add_argument('-b', '--backend', choices=available_backends(), default=DEFAULT_BACKEND)
+    parser.add_argument('--start', type=int, default=1000, help="first rate to try (default: 1000)")
+    parser.add_argument('--max', type=int, default=60000, help="highest rate to try (default: 60000)")
+    args = parser.parse_args(argv)
+
+    import tkinter as tk
+    from uipump import UIUpdatePump
+    backend = create_backend(args.backend)
+    try:
+        backend.open()
+    except BackendError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    root = tk.Tk()
+    root.withdraw()
+    ui = UIUpdatePump(root)
+    ui.start()
+    outcome = []
+
+    def worker():
+        report = lambda wpm: print(f"trying {wpm} WPM...", flush=True)
+        outcome.append(calibrate_backend(root, ui, backend, on_trial=report,
+                                         start=args.start, maximum=args.max))
+        ui.call(root.quit)
+
+    threading.Thread(target=worker, daemon=True).start()
+    root.mainloop()
+    backend.close()
+
+    result = outcome[0]
+    print(result.summary())
+    if result.wpm is None or result.cancelled:
+        return 1
+    save_profile(args.backend, result.wpm, trials=result.trials)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
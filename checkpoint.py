@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import time
+from functools import partial
+
+CHECKPOINT_PATH = os.path.join(os.path.expanduser("~"), ".ultra_typer", "checkpoint.json")
+
+
+def text_digest(text):
+    """sha256 of the text being typed"""
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def file_digest(path, block_size=1 << 20):
+    """sha256 of a file's bytes, read a block at a time"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(partial(f.read, block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """Where an interrupted run stopped, so the next run can continue from the same character"""
+
+    def __init__(self, digest, offset, total, path=None):
+        self.digest = digest  # text_digest() of the text, or file_digest() of the document
+        self.offset = offset  # characters typed, which is also the schedule index to resume at
+        self.total = total  # characters in the whole text or document
+        self.path = path  # document in large-document mode, None for pasted text
+
+    def matches(self, digest, path=None):
+        """True if this checkpoint belongs to the text or document with digest"""
+        return digest == self.digest and path == self.path
+
+    @property
+    def percent(self):
+        return min(100, int(self.offset * 100 / self.total)) if self.total else 0
+
+    def to_dict(self):
+        return {'digest': self.digest, 'offset': self.offset, 'total': self.total, 'path': self.path}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['digest'], int(data['offset']), int(data['total']), data.get('path'))
+
+
+def load_checkpoint(path=CHECKPOINT_PATH):
+    """The saved checkpoint, or None if there is none or it cannot be read"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return Checkpoint.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_checkpoint(checkpoint, path=CHECKPOINT_PATH):
+    """Atomically replace the saved checkpoint; returns False if it could not be written"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial_path = path + '.tmp'
+        with open(partial_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint.to_dict(), f)
+        os.replace(partial_path, path)
+    except OSError:
+        return False
+    return True
+
+
+def clear_checkpoint(path=CHECKPOINT_PATH):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class CheckpointRecorder:
+    """Keeps a running checkpoint on disk without rewriting it on every progress update"""
+
+    def __init__(self, checkpoint, path=CHECKPOINT_PATH, interval=2.0, clock=time.monotonic):
+        self.checkpoint = checkpoint
+        self.path = path
+        self.interval = interval
+        self.clock = clock
+        self.last_save = None
+
+    def update(self, offset, force=False):
+        """Record progress; saves if forced or interval seconds have passed since the last save"""
+        self.checkpoint.offset = offset
+        now = self.clock()
+        if force or self.last_save is None or now - self.last_save >= self.interval:
+            save_checkpoint(self.checkpoint, self.path)
+            self.last_save = now
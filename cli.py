@@ -0,0 +1,376 @@
+import argparse
+import sys
+import threading
+
+# Only light, GUI-free modules are imported up front; tkinter is never
+# imported and the injection backend's own package is loaded by open()
+from backends import BackendError, DEFAULT_BACKEND, BACKENDS, available_backends, create_backend
+from control import RunControl
+from engine import TypingEngine
+from hotkeys import CANCEL_KEY, PAUSE_KEY, TRIGGER_KEY, HotkeyError, HotkeyListener, format_hotkey
+from incremental import plan_edits
+from keymap import DEFAULT_LAYOUT, LAYOUTS
+from profiles import calibrated_wpm
+from schedule import MODERN_PROFILE, PROFILES, compile_schedule, compile_stream, format_duration
+from sources import iter_file_chunks, iter_stream_chunks, rstrip_chunks
+from whitespace import DEFAULT_EDITOR, EDITOR_PRESETS, plan_for_editor
+
+DEFAULT_WPM = 3000
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Type text into the focused window without the GUI",
+        epilog="Text comes from TEXT, --file, or stdin when neither is given.",
+    )
+    parser.add_argument('text', nargs='?', help="text to type")
+    parser.add_argument('-f', '--file', help="type this file, streamed in chunks")
+    parser.add_argument('-w', '--wpm', type=int,
+                        help=f"typing speed (default: the backend's calibrated WPM, else {DEFAULT_WPM})")
+    parser.add_argument('-d', '--delay', type=float, default=3.0,
+                        help="seconds to wait before typing starts (default: 3)")
+    parser.add_argument('--jobs', metavar='FILE',
+                        help="type every snippet of FILE in turn; snippets are separated by '---' lines, "
+                             "which may set their own options, e.g. '--- wpm=8000 variance label=sig'")
+    parser.add_argument('--gap', type=float, default=1.0,
+                        help="seconds between --jobs snippets, unless --hotkey starts each one (default: 1)")
+    parser.add_argument('--replay', metavar='FILE',
+                        help="type a recorded session file with its own timing; -w scales it to that WPM")
+    parser.add_argument('--record', metavar='FILE',
+                        help="also record the typed text and its timing to session FILE, for --replay")
+    parser.add_argument('--hotkey', action='store_true',
+                        help=f"instead of the delay, start on {format_hotkey(TRIGGER_KEY)} pressed in the target; "
+                             f"{format_hotkey(PAUSE_KEY)} pauses and {format_hotkey(CANCEL_KEY)} cancels (needs pynput)")
+    parser.add_argument('-v', '--variance', action='store_true', help="add human-like variance")
+    parser.add_argument('-i', '--instant', action='store_true', help="type at the backend's maximum rate")
+    parser.add_argument('-p', '--profile', choices=sorted(PROFILES), default=MODERN_PROFILE.name,
+                        help="timing rules (default: modern)")
+    parser.add_argument('-b', '--backend', choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                        help=f"keystroke injection backend (default: {DEFAULT_BACKEND})")
+    parser.add_argument('-l', '--layout', choices=sorted(LAYOUTS), default=DEFAULT_LAYOUT,
+                        help=f"keyboard layout of the target (default: {DEFAULT_LAYOUT}; xtest reads the server's)")
+    parser.add_argument('--no-plan-cache', action='store_true',
+                        help="compile TEXT and --jobs snippets afresh instead of reusing plans cached in "
+                             "~/.ultra_typer/plans")
+    parser.add_argument('--max-catchup', type=float, default=0.05,
+                        help="seconds the engine may burst to catch up after a stall (default: 0.05)")
+    parser.add_argument('--keep-trailing-newlines', action='store_true',
+                        help="type trailing newlines instead of dropping them")
+    parser.add_argument('-e', '--editor', choices=sorted(EDITOR_PRESETS), default=DEFAULT_EDITOR,
+                        help="target editor, so its auto-indent and auto-close are not typed twice "
+                             f"(default: {DEFAULT_EDITOR})")
+    parser.add_argument('--since', metavar='FILE',
+                        help="the target already holds FILE's text: type only the changes")
+    parser.add_argument('--line-keys', action='store_true',
+                        help="with --since, navigate with Up/Home (targets that do not soft-wrap)")
+    parser.add_argument('--verify', action='store_true',
+                        help="read the target back with select-all and copy, then retype what differs "
+                             "(needs wl-paste, xclip, xsel, pbpaste or PowerShell)")
+    parser.add_argument('--verify-keys',
+                        help="select-all and copy chords for --verify (default: ctrl+a,ctrl+c; "
+                             "command+a,command+c on macOS)")
+    parser.add_argument('--report', metavar='FILE',
+                        help="record every injected batch and write a timing report to FILE "
+                             "(CSV rows per batch for .csv, JSON summary otherwise)")
+    parser.add_argument('--profile-run', action='store_true',
+                        help="run the typing under cProfile and save PREFIX.prof and PREFIX.profile.txt, "
+                             "grouped by subsystem, next to --report (PREFIX 'typing-run' without it)")
+    parser.add_argument('--calibrate', action='store_true',
+                        help="find the backend's highest loss-free WPM in a local window, save it as "
+                             "the default and exit (needs a display)")
+    parser.add_argument('--list-backends', action='store_true', help="list installed backends and exit")
+    parser.add_argument('-q', '--quiet', action='store_true', help="no countdown or summary output")
+    return parser
+
+
+def read_chunks(args):
+    """Text chunks to type, from the argument, a file or stdin"""
+    if args.text is not None:
+        chunks = iter((args.text,))
+    elif args.file is not None:
+        chunks = iter_file_chunks(args.file)
+    else:
+        chunks = iter_stream_chunks(sys.stdin)
+    if not args.keep_trailing_newlines:
+        chunks = rstrip_chunks(chunks)
+    return chunks
+
+
+def read_text(path, encoding='utf-8'):
+    with open(path, encoding=encoding, errors='replace') as f:
+        return f.read()
+
+
+def open_plan_cache(args):
+    """Cache of compiled plans for TEXT and --jobs snippets, None with --no-plan-cache"""
+    if args.no_plan_cache:
+        return None
+    # Imported here: hashlib is only loaded when there is a plan to look up
+    from plan_cache import PlanCache
+    return PlanCache(layout=args.layout)
+
+
+def log(args, message):
+    if not args.quiet:
+        print(message, file=sys.stderr, flush=True)
+
+
+def countdown(args, control):
+    for remaining in range(int(args.delay), 0, -1):
+        log(args, f"Starting in {remaining}... focus the target window")
+        control.hold(1)
+    control.hold(args.delay - int(args.delay))
+
+
+def run_jobs(args, engine, queue, hotkeys):
+    """Type the queued snippets back to back; returns the exit status"""
+    if hotkeys is None:
+        countdown(args, engine.control)
+    else:
+        engine.backend.probe()
+        log(args, f"Armed: press {format_hotkey(TRIGGER_KEY)} in the target window to type each job "
+                  f"({format_hotkey(CANCEL_KEY)} cancels)")
+
+    def on_job(position, count, job):
+        log(args, f"Job {position}/{count}: {job.summary()}")
+
+    def on_done(position, count, job):
+        log(args, f"  {job.summary()}")
+
+    finished = queue.run(engine, args.gap, hotkeys, on_job, on_done=on_done)
+    log(args, queue.summary())
+    if not finished:
+        log(args, "Typing cancelled")
+        return 130
+    return 0
+
+
+def hotkey_listener(control):
+    """Trigger, pause and cancel hotkeys for a CLI run"""
+    def resume_after_release():
+        hotkeys.wait_for_release()
+        control.resume()
+
+    def toggle_pause():
+        if control.paused:
+            # The listener thread must not block, and Ctrl+Alt would garble the next keys
+            threading.Thread(target=resume_after_release, daemon=True).start()
+        else:
+            control.pause()
+
+    hotkeys = HotkeyListener({TRIGGER_KEY: control.trigger, PAUSE_KEY: toggle_pause, CANCEL_KEY: control.cancel})
+    return hotkeys
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.list_backends:
+        for name in available_backends():
+            print(name)
+        return 0
+    if args.calibrate:
+        # Imported here: calibration is the only CLI mode that needs tkinter
+        from calibrate import main as calibrate_main
+        return calibrate_main(['--backend', args.backend])
+    # A replay keeps its recorded speed unless a WPM is given
+    replay_wpm = args.wpm
+    if args.wpm is None:
+        args.wpm = calibrated_wpm(args.backend) or DEFAULT_WPM
+    queue = None
+    replay = None
+    if args.replay is not None:
+        if args.text is not None or args.file is not None or args.jobs or args.since or args.verify \
+                or args.editor != DEFAULT_EDITOR:
+            parser.error("--replay cannot be combined with TEXT, --file, --jobs, --since, --verify or --editor")
+        # Imported here: only replays and recordings use the session file format
+        from session_file import SessionError, SessionReader
+        try:
+            replay = SessionReader(args.replay)
+        except (OSError, SessionError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+        log(args, f"Session {args.replay}: {replay.summary()}")
+    elif args.jobs is not None:
+        if args.text is not None or args.file is not None or args.since or args.verify or args.report \
+                or args.profile_run:
+            parser.error("--jobs cannot be combined with TEXT, --file, --since, --verify, --report or --profile-run")
+        # Imported here: the job file parser is only needed for --jobs
+        from jobs import JobQueue, load_jobs
+        cache = open_plan_cache(args)
+        queue = JobQueue(cache)
+        try:
+            queue.extend(load_jobs(args.jobs, args.wpm, args.variance, PROFILES[args.profile], args.instant, cache))
+        except (OSError, ValueError) as e:
+            print(f"error: {args.jobs}: {e}", file=sys.stderr)
+            return 1
+        if not len(queue):
+            print(f"error: {args.jobs} holds no snippets", file=sys.stderr)
+            return 1
+        log(args, queue.summary())
+    elif args.text is None and args.file is None and sys.stdin.isatty():
+        parser.error("no text given: pass TEXT, --file, or pipe text on stdin")
+    verifier = None
+    if args.verify:
+        # Imported here: only --verify reads the target back through the clipboard
+        from verify import COPY, SELECT_ALL, Verifier, command_clipboard_reader, parse_chord
+        select_chord, copy_chord = SELECT_ALL, COPY
+        if args.verify_keys is not None:
+            try:
+                select_chord, copy_chord = (parse_chord(chord) for chord in args.verify_keys.split(','))
+            except ValueError:
+                parser.error("--verify-keys must look like ctrl+a,ctrl+c")
+        read_clipboard = command_clipboard_reader()
+        if read_clipboard is None:
+            print("error: --verify needs a clipboard tool (wl-paste, xclip, xsel, pbpaste or PowerShell)",
+                  file=sys.stderr)
+            return 1
+        verifier = Verifier(read_clipboard, select_chord, copy_chord)
+
+    backend = create_backend(args.backend, layout=args.layout)
+    try:
+        backend.open()
+    except BackendError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    capture = None
+    if args.record is not None:
+        from session_file import SessionCapture, SessionWriter
+        capture = SessionCapture(backend, SessionWriter(args.record))
+        try:
+            capture.open()
+        except OSError as e:
+            backend.close()
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+
+    profile = PROFILES[args.profile]
+    control = RunControl()
+    trace = None
+    if args.report:
+        # Imported here: csv and json are only loaded when a report is asked for
+        from instrument import KeystrokeTrace
+        trace = KeystrokeTrace()
+    profiler = None
+    if args.profile_run:
+        # Imported here: cProfile is only loaded when profiling is asked for
+        from profiling import RunProfiler
+        profiler = RunProfiler()
+    engine = TypingEngine(capture or backend, control, max_catchup=args.max_catchup, trace=trace)
+    hotkeys = None
+    if args.hotkey:
+        hotkeys = hotkey_listener(control)
+        try:
+            hotkeys.start()
+        except HotkeyError as e:
+            backend.close()
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+    chunks = read_chunks(args) if queue is None and replay is None else None
+    if verifier is not None:
+        # The whole text is needed to compare against what landed
+        text = ''.join(chunks)
+        chunks = iter((text,))
+    steps = None
+    try:
+        if queue is not None:
+            return run_jobs(args, engine, queue, hotkeys)
+        if args.since is not None:
+            # Diff against what the target already holds; the whole text is needed for that
+            plan = plan_edits(read_text(args.since), ''.join(chunks), args.line_keys)
+            log(args, f"{plan.keystrokes} keystrokes for the changes, {plan.saved} saved")
+            steps = plan.compile(args.wpm, args.variance, profile)
+            chunks = None
+        elif args.editor != DEFAULT_EDITOR:
+            plan = plan_for_editor(''.join(chunks), EDITOR_PRESETS[args.editor])
+            log(args, f"{plan.keystrokes} keystrokes, {plan.saved} saved by the {args.editor} preset")
+            steps = plan.compile(args.wpm, args.variance, profile)
+            chunks = None
+        # Compile short inline text up front so its duration can be shown
+        elif args.text is not None and not args.instant:
+            text = next(chunks, '')
+            # Text typed before with the same settings starts from its cached plan
+            cache = open_plan_cache(args)
+            if cache is not None:
+                schedule = cache.compile(text, args.wpm, args.variance, profile)
+            else:
+                schedule = compile_schedule(text, args.wpm, args.variance, profile)
+            log(args, f"{len(schedule)} characters, about {format_duration(schedule.duration)}")
+            chunks = None
+
+        if hotkeys is not None:
+            backend.probe()
+            log(args, f"Armed: press {format_hotkey(TRIGGER_KEY)} in the target window "
+                      f"({format_hotkey(CANCEL_KEY)} cancels)")
+            if not control.wait_for_trigger():
+                log(args, "Typing cancelled")
+                return 130
+            hotkeys.wait_for_release()
+        else:
+            countdown(args, control)
+
+        if profiler is not None:
+            profiler.start('typing')
+        if steps is not None:
+            result = engine.run_edits(steps, total=plan.keystrokes)
+        elif replay is not None and args.instant:
+            result = engine.run_instant_stream(replay.chunks())
+        elif replay is not None:
+            result = engine.run_stream(replay.schedules(replay_wpm), total=len(replay))
+        elif args.instant:
+            result = engine.run_instant_stream(chunks)
+        elif chunks is None:
+            result = engine.run(schedule)
+        else:
+            result = engine.run_stream(compile_stream(chunks, args.wpm, args.variance, profile))
+        if profiler is not None:
+            profiler.stop('typing')
+        report = None
+        if trace is not None:
+            # Before verification, whose read-back pauses are not part of the run
+            report = trace.report(result.elapsed)
+            engine.trace = None
+        verification = None
+        if result.completed and verifier is not None:
+            verification = verifier.run(engine, text, args.wpm, args.variance, profile)
+    except KeyboardInterrupt:
+        control.cancel()
+        log(args, "Typing cancelled")
+        return 130
+    finally:
+        if hotkeys is not None:
+            hotkeys.stop()
+        if capture is not None:
+            capture.close()
+        if replay is not None:
+            replay.close()
+        backend.close()
+
+    log(args, f"Typed {result.chars_typed} characters in {result.elapsed:.2f}s ({result.summary()})")
+    if capture is not None:
+        log(args, f"Recorded {len(capture.writer)} keys to {args.record}")
+    if report is not None:
+        log(args, report.summary())
+        try:
+            report.export(args.report)
+        except OSError as e:
+            print(f"error: could not write {args.report}: {e}", file=sys.stderr)
+            return 1
+    if profiler is not None:
+        from profiling import profile_stem
+        profile_report = profiler.report()
+        log(args, profile_report.summary())
+        try:
+            paths = profile_report.save(profile_stem(args.report) if args.report else 'typing-run')
+        except OSError as e:
+            print(f"error: could not write the profile: {e}", file=sys.stderr)
+            return 1
+        log(args, f"Profile saved to {' and '.join(paths)}")
+    if verification is not None:
+        log(args, f"Verification: {verification.summary()}")
+        return 0 if verification.verified else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import threading
+import time
+
+
+class ControlState:
+    """The flags of a run and the cancel-latency bookkeeping, without any way of waiting
+
+    RunControl waits on a thread Condition, aio_engine.AsyncRunControl on
+    the event loop; both keep their flags here.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.cancelled = False
+        self.paused = False
+        self.cancel_time = None
+        self.last_keystroke = None  # set by the engine after every batch
+
+    def mark_cancelled(self):
+        """Set the cancelled flag, timing the first cancel for cancel_latency"""
+        if not self.cancelled:
+            self.cancelled = True
+            self.cancel_time = self.clock()
+
+    @property
+    def cancel_latency(self):
+        """Seconds between cancel() and the last keystroke, None if not cancelled"""
+        if self.cancel_time is None:
+            return None
+        if self.last_keystroke is None:
+            return 0.0
+        return max(0.0, self.last_keystroke - self.cancel_time)
+
+
+class RunControl(ControlState):
+    """Cancel, pause and resume signals for a typing run
+
+    Every wait goes through a Condition, so cancel() and pause() wake sleeping
+    countdown and pacing code at once instead of after the current sleep.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        super().__init__(clock)
+        self.changed = threading.Condition()
+        self.triggered = False
+
+    def cancel(self):
+        """Stop the run; wakes every waiter"""
+        with self.changed:
+            self.mark_cancelled()
+            self.changed.notify_all()
+
+    def pause(self):
+        """Hold the run until resume(); wakes every waiter"""
+        with self.changed:
+            self.paused = True
+            self.changed.notify_all()
+
+    def resume(self):
+        with self.changed:
+            self.paused = False
+            self.changed.notify_all()
+
+    def trigger(self):
+        """Start an armed run waiting in wait_for_trigger(); safe from any thread"""
+        with self.changed:
+            self.triggered = True
+            self.changed.notify_all()
+
+    def rearm(self):
+        """Make wait_for_trigger() block again until the next trigger()"""
+        with self.changed:
+            self.triggered = False
+
+    def wait_for_trigger(self):
+        """Block until trigger() or cancel(); returns False if cancelled"""
+        with self.changed:
+            while not (self.triggered or self.cancelled):
+                self.changed.wait()
+            return not self.cancelled
+
+    def sleep_until(self, deadline):
+        """Sleep until deadline; returns False early if cancelled or paused"""
+        with self.changed:
+            while not (self.cancelled or self.paused):
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    return True
+                self.changed.wait(remaining)
+            return False
+
+    def wait_while_paused(self):
+        """Block while paused; returns the seconds spent waiting"""
+        started = self.clock()
+        with self.changed:
+            while self.paused and not self.cancelled:
+                self.changed.wait()
+        return self.clock() - started
+
+    def hold(self, seconds):
+        """Sleep for seconds of un-paused time; returns False if cancelled"""
+        remaining = seconds
+        while not self.cancelled:
+            started = self.clock()
+            if self.sleep_until(started + remaining):
+                return True
+            remaining -= self.clock() - started
+            self.wait_while_paused()
+        return False
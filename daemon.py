@@ -0,0 +1,491 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import BackendError, BACKENDS, DEFAULT_BACKEND, create_backend
+from control import RunControl
+from engine import TypingEngine
+from jobs import TypingJob
+from keymap import DEFAULT_LAYOUT, LAYOUTS
+from plan_cache import PlanCache
+from profiles import calibrated_wpm
+from schedule import MODERN_PROFILE, PROFILES
+
+SOCKET_PATH = os.path.join(os.path.expanduser("~"), ".ultra_typer", "daemon.sock")
+DEFAULT_WPM = 3000
+PROGRESS_INTERVAL = 0.05  # seconds between progress events of a job
+MAX_REQUEST = 16 << 20  # longest request line in bytes, so whole documents fit
+
+
+class DaemonError(RuntimeError):
+    """Raised when the daemon cannot start, is not running, or rejects a request"""
+
+
+def encode(message):
+    return json.dumps(message).encode('utf-8') + b'\n'
+
+
+def claim_socket(path):
+    """Make way for a new daemon on path, removing a socket left by one that died"""
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(path)
+    else:
+        raise DaemonError(f"a typing daemon is already listening on {path}")
+    finally:
+        probe.close()
+
+
+class DaemonJob:
+    """A queued TypingJob and the connection that hears about it"""
+
+    def __init__(self, number, job, priority, delay, send):
+        self.number = number
+        self.job = job  # jobs.TypingJob, compiled when it was queued
+        self.priority = priority
+        self.delay = delay  # seconds to hold before typing, e.g. to switch windows
+        self.send = send  # send(event) on the loop thread; a closed connection drops it
+        self.control = RunControl()
+        self.state = 'queued'  # then 'typing', and 'done', 'cancelled' or 'failed'
+
+    def describe(self):
+        return {'job': self.number, 'state': self.state, 'priority': self.priority, 'label': self.job.label,
+                'chars': len(self.job), 'typed': self.job.typed}
+
+    def done_event(self, result=None, error=None):
+        event = {'event': 'done', 'job': self.number, 'completed': self.state == 'done',
+                 'typed': self.job.typed, 'total': len(self.job)}
+        if result is not None:
+            event['elapsed'] = result.elapsed
+            event['summary'] = result.summary()
+        if error is not None:
+            event['error'] = error
+        return event
+
+
+class TypingDaemon:
+    """Keeps one injection backend open and types jobs sent over a Unix socket, most urgent first
+
+    Requests and events are JSON objects, one per line. A "type" request
+    (text, and optionally wpm, variance, instant, profile, priority, delay
+    and label) is compiled through the plan cache, then queued; its
+    "queued", "started", "progress" and "done" events go back on the same
+    connection, where "cancel", "pause" and "resume" act on its jobs.
+    "status", "shutdown", and "cancel" with a job number work from any
+    connection. Closing a connection cancels its jobs. A job the backend
+    fails on ends with a "done" event carrying an "error"; the next job
+    is typed as usual.
+
+    The loop only serves connections. Requests are compiled in a compiler
+    thread, one at a time, and jobs are typed one at a time by the
+    threaded TypingEngine in an executor thread, so neither a large
+    document nor pacing's spin ever holds up the other clients.
+    """
+
+    def __init__(self, backend, path=SOCKET_PATH, default_wpm=DEFAULT_WPM, cache=None, max_catchup=0.05):
+        self.backend = backend
+        self.path = path
+        self.default_wpm = default_wpm
+        self.cache = cache  # optional plan_cache.PlanCache
+        self.max_catchup = max_catchup
+        self.jobs = {}  # number -> DaemonJob, until it is done or cancelled
+        self.numbers = itertools.count(1)
+        self.queue = None  # asyncio.PriorityQueue of (-priority, number, job), made on the loop
+        self.running = None  # future of the typing thread's current job
+        self.compiler = None  # one-thread executor for compiling requests, made on the loop
+        self.stopped = None
+
+    async def serve(self):
+        """Listen until stop() or a "shutdown" request"""
+        self.queue = asyncio.PriorityQueue()
+        self.stopped = asyncio.Event()
+        self.compiler = ThreadPoolExecutor(max_workers=1, thread_name_prefix='compile')
+        claim_socket(self.path)
+        # Only this user may connect: every job types into their session
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self.handle, self.path, limit=MAX_REQUEST)
+        finally:
+            os.umask(umask)
+        worker = asyncio.create_task(self.work())
+        try:
+            await self.stopped.wait()
+        finally:
+            server.close()
+            for job in list(self.jobs.values()):
+                self.cancel(job)
+            if self.running is not None:
+                # Let the job being typed stop and report before the worker goes
+                await asyncio.wait([self.running], timeout=2.0)
+                await asyncio.sleep(0)
+            worker.cancel()
+            self.compiler.shutdown(wait=False, cancel_futures=True)
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def stop(self):
+        self.stopped.set()
+
+    async def work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, job = await self.queue.get()
+            if job.state != 'queued':
+                continue
+            job.state = 'typing'
+            job.send({'event': 'started', 'job': job.number})
+            self.running = loop.run_in_executor(None, self.type_job, job, loop)
+            error = None
+            try:
+                result = await self.running
+            except Exception as e:
+                # A backend failure ends this job, not the daemon
+                result = None
+                error = f"typing failed: {e}"
+                print(f"Job {job.number}: {error}", file=sys.stderr)
+            finally:
+                self.running = None
+            if error is not None:
+                job.state = 'failed'
+            else:
+                job.state = 'done' if result is not None and result.completed else 'cancelled'
+            self.jobs.pop(job.number, None)
+            job.send(job.done_event(result, error))
+
+    def type_job(self, job, loop):
+        """Typing thread: hold for the job's delay, then type it; None if cancelled before the first key"""
+        control = job.control
+        if job.delay and not control.hold(job.delay):
+            return None
+        engine = TypingEngine(self.backend, control, self.max_catchup)
+        reported = 0.0
+
+        def on_progress(typed, total):
+            nonlocal reported
+            now = time.perf_counter()
+            if typed == total or now - reported >= PROGRESS_INTERVAL:
+                reported = now
+                event = {'event': 'progress', 'job': job.number, 'typed': typed, 'total': total}
+                loop.call_soon_threadsafe(job.send, event)
+
+        return job.job.run(engine, on_progress)
+
+    async def handle(self, reader, writer):
+        """One client connection: requests in, events for its jobs out"""
+        own = []
+
+        def send(event):
+            if not writer.is_closing():
+                writer.write(encode(event))
+
+        try:
+            while not self.stopped.is_set():
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    send({'event': 'error', 'error': f"requests are limited to {MAX_REQUEST} bytes"})
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError
+                except ValueError:
+                    send({'event': 'error', 'error': "requests are JSON objects, one per line"})
+                    continue
+                await self.dispatch(request, own, send)
+                await writer.drain()
+        except asyncio.CancelledError:
+            # The daemon is shutting down with this client still connected
+            pass
+        finally:
+            # Nobody is left to hear about these jobs, or to stop them
+            for job in own:
+                self.cancel(job)
+            writer.close()
+
+    async def dispatch(self, request, own, send):
+        op = request.get('op')
+        if op == 'type':
+            try:
+                own.append(await self.submit(request, send))
+            except (TypeError, ValueError) as e:
+                send({'event': 'error', 'error': f"bad type request: {e}"})
+        elif op in ('cancel', 'pause', 'resume'):
+            if 'job' in request:
+                job = self.jobs.get(request['job'])
+                if job is None:
+                    send({'event': 'error', 'error': f"no queued or running job {request['job']}"})
+                    return
+                targets = [job]
+            else:
+                targets = [job for job in own if job.number in self.jobs]
+            for job in targets:
+                if op == 'cancel':
+                    self.cancel(job)
+                elif op == 'pause':
+                    job.control.pause()
+                else:
+                    job.control.resume()
+        elif op == 'status':
+            send({'event': 'status', 'backend': self.backend.name, 'wpm': self.default_wpm,
+                  'jobs': [job.describe() for job in sorted(self.jobs.values(), key=self.order)]})
+        elif op == 'shutdown':
+            send({'event': 'stopping'})
+            self.stop()
+        else:
+            send({'event': 'error', 'error': f"unknown op {op!r}"})
+
+    async def submit(self, request, send):
+        """Compile and queue a "type" request; raises TypeError or ValueError if it is invalid"""
+        text = request.get('text')
+        if not isinstance(text, str) or not text:
+            raise ValueError("'text' must be a non-empty string")
+        wpm = int(request.get('wpm') or self.default_wpm)
+        if wpm <= 0:
+            raise ValueError("'wpm' must be positive")
+        profile = PROFILES.get(request.get('profile') or MODERN_PROFILE.name)
+        if profile is None:
+            raise ValueError(f"unknown profile {request['profile']!r}")
+        label = request.get('label')
+        priority = int(request.get('priority', 0))
+        delay = float(request.get('delay', 0))
+        # Compiling and hashing a document of up to MAX_REQUEST bytes takes a while; other clients go on meanwhile
+        loop = asyncio.get_running_loop()
+        job = await loop.run_in_executor(self.compiler, TypingJob, text, wpm, bool(request.get('variance')), profile,
+                                         bool(request.get('instant')), None if label is None else str(label),
+                                         self.cache)
+        job = DaemonJob(next(self.numbers), job, priority, delay, send)
+        self.jobs[job.number] = job
+        self.queue.put_nowait((-job.priority, job.number, job))
+        ahead = sum(1 for other in self.jobs.values()
+                    if other.state == 'typing' or (other.state == 'queued' and self.order(other) < self.order(job)))
+        send({'event': 'queued', 'job': job.number, 'ahead': ahead, 'label': job.job.label})
+        return job
+
+    @staticmethod
+    def order(job):
+        return (job.state != 'typing', -job.priority, job.number)
+
+    def cancel(self, job):
+        """Cancel a job; a queued one is dropped at once, a running one stops after the batch in flight"""
+        job.control.cancel()
+        if job.state == 'queued':
+            job.state = 'cancelled'
+            self.jobs.pop(job.number, None)
+            job.send(job.done_event())
+
+
+class DaemonClient:
+    """Blocking client for scripts and editor plugins: one connection, JSON lines both ways"""
+
+    def __init__(self, path=SOCKET_PATH, timeout=None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            self.sock.close()
+            raise DaemonError(f"no typing daemon is listening on {path}; start one with: python daemon.py serve")
+        self.file = self.sock.makefile('rb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def request(self, op, **fields):
+        self.sock.sendall(encode(dict(fields, op=op)))
+
+    def events(self):
+        """Events from the daemon as they arrive, until it closes the connection"""
+        for line in self.file:
+            yield json.loads(line)
+
+    def wait_for(self, name, on_event=None):
+        """Read events until one named name; raises DaemonError on an error event or a closed connection"""
+        for event in self.events():
+            if on_event is not None:
+                on_event(event)
+            if event['event'] == 'error':
+                raise DaemonError(event['error'])
+            if event['event'] == name:
+                return event
+        raise DaemonError("the daemon closed the connection")
+
+    def submit(self, text, wpm=None, variance=False, instant=False, profile=None, priority=0, delay=0.0, label=None):
+        """Queue text and return its job number; its events keep coming on this connection
+
+        For queuing several jobs over one connection: closing it cancels them.
+        """
+        self.request('type', text=text, wpm=wpm, variance=variance, instant=instant, profile=profile,
+                     priority=priority, delay=delay, label=label)
+        return self.wait_for('queued')['job']
+
+    def type(self, text, wpm=None, variance=False, instant=False, profile=None, priority=0, delay=0.0, label=None,
+             on_event=None):
+        """Queue text and wait until it is typed or cancelled; returns the "done" event
+
+        on_event, if given, sees every event on the way, progress included.
+        Keep the connection open until then: closing it cancels the job.
+        """
+        self.request('type', text=text, wpm=wpm, variance=variance, instant=instant, profile=profile,
+                     priority=priority, delay=delay, label=label)
+        return self.wait_for('done', on_event)
+
+    def cancel(self, job=None):
+        """Cancel a job by number, or every job of this connection"""
+        self.request('cancel', **({} if job is None else {'job': job}))
+
+    def pause(self, job=None):
+        self.request('pause', **({} if job is None else {'job': job}))
+
+    def resume(self, job=None):
+        self.request('resume', **({} if job is None else {'job': job}))
+
+    def status(self):
+        self.request('status')
+        return self.wait_for('status')
+
+    def shutdown(self):
+        self.request('shutdown')
+        return self.wait_for('stopping')
+
+
+def serve(args):
+    backend = create_backend(args.backend, layout=args.layout)
+    try:
+        backend.open()
+    except BackendError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    wpm = args.wpm or calibrated_wpm(args.backend) or DEFAULT_WPM
+    cache = None if args.no_plan_cache else PlanCache(layout=args.layout)
+    daemon = TypingDaemon(backend, args.socket, wpm, cache, args.max_catchup)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, daemon.stop)
+        print(f"Typing daemon on {args.socket} ({backend.name} backend, {wpm} WPM by default)", file=sys.stderr)
+        await daemon.serve()
+
+    try:
+        asyncio.run(main())
+    except DaemonError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        backend.close()
+    return 0
+
+
+def type_text(args):
+    text = args.text if args.text is not None else sys.stdin.read()
+
+    def on_event(event):
+        if args.quiet:
+            return
+        if event['event'] == 'queued':
+            print(f"Job {event['job']} queued behind {event['ahead']}", file=sys.stderr)
+        elif event['event'] == 'progress':
+            print(f"\rTyping {event['typed']}/{event['total']}", end='', file=sys.stderr, flush=True)
+
+    with DaemonClient(args.socket) as client:
+        try:
+            done = client.type(text, args.wpm, args.variance, args.instant, args.profile, args.priority, args.delay,
+                               args.label, on_event)
+        except KeyboardInterrupt:
+            # Cancel over the same connection and wait for the daemon to confirm
+            client.cancel()
+            done = client.wait_for('done')
+    if 'error' in done:
+        print(f"\rJob {done['job']}: {done['error']}", file=sys.stderr)
+        return 1
+    if not args.quiet:
+        outcome = done.get('summary', '') if done['completed'] else f"cancelled at {done['typed']}/{done['total']}"
+        print(f"\rJob {done['job']}: {outcome}", file=sys.stderr)
+    return 0 if done['completed'] else 130
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep a typing backend warm and type jobs sent over a local socket")
+    parser.add_argument('--socket', default=SOCKET_PATH, help=f"Unix socket path (default: {SOCKET_PATH})")
+    commands = parser.add_subparsers(dest='command', required=True)
+    server = commands.add_parser('serve', help="run the daemon in the foreground")
+    server.add_argument('-b', '--backend', choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                        help=f"keystroke injection backend (default: {DEFAULT_BACKEND})")
+    server.add_argument('-l', '--layout', choices=sorted(LAYOUTS), default=DEFAULT_LAYOUT,
+                        help=f"keyboard layout of the target (default: {DEFAULT_LAYOUT})")
+    server.add_argument('-w', '--wpm', type=int,
+                        help=f"speed of jobs that do not set one (default: the calibrated WPM, else {DEFAULT_WPM})")
+    server.add_argument('--max-catchup', type=float, default=0.05,
+                        help="seconds the engine may burst to catch up after a stall (default: 0.05)")
+    server.add_argument('--no-plan-cache', action='store_true', help="compile every job afresh")
+    typer = commands.add_parser('type', help="type TEXT (or stdin) through the daemon and wait until it is done")
+    typer.add_argument('text', nargs='?', help="text to type")
+    typer.add_argument('-w', '--wpm', type=int, help="typing speed (default: the daemon's)")
+    typer.add_argument('-v', '--variance', action='store_true', help="add human-like variance")
+    typer.add_argument('-i', '--instant', action='store_true', help="type at the backend's maximum rate")
+    typer.add_argument('-p', '--profile', choices=sorted(PROFILES), help="timing rules (default: modern)")
+    typer.add_argument('--priority', type=int, default=0, help="jobs with a higher priority are typed first")
+    typer.add_argument('-d', '--delay', type=float, default=0.0, help="seconds to wait before typing (default: 0)")
+    typer.add_argument('--label', help="name shown by status")
+    typer.add_argument('-q', '--quiet', action='store_true', help="no progress or summary output")
+    commands.add_parser('status', help="list the queued and running jobs")
+    canceller = commands.add_parser('cancel', help="cancel a job by number")
+    canceller.add_argument('job', type=int)
+    commands.add_parser('stop', help="cancel every job and stop the daemon")
+    args = parser.parse_args(argv)
+
+    if not hasattr(socket, 'AF_UNIX'):
+        print("error: the typing daemon needs Unix domain sockets", file=sys.stderr)
+        return 1
+    if args.command == 'serve':
+        return serve(args)
+    try:
+        if args.command == 'type':
+            return type_text(args)
+        with DaemonClient(args.socket) as client:
+            if args.command == 'status':
+                status = client.status()
+                print(f"{status['backend']} backend, {status['wpm']} WPM by default, {len(status['jobs'])} jobs")
+                for job in status['jobs']:
+                    print(f"  {job['job']:>4} {job['state']:<7} priority {job['priority']:<3} "
+                          f"{job['typed']}/{job['chars']} {job['label']}")
+            elif args.command == 'cancel':
+                client.cancel(args.job)
+                # Errors come back as events; status() reads up to its answer
+                client.status()
+            else:
+                client.shutdown()
+    except DaemonError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+import time
+
+from control import RunControl
+from incremental import HOTKEY, TYPE
+
+
+class DeadlinePacer:
+    """Waits for absolute monotonic deadlines: sleeps coarsely, then spins the last stretch"""
+
+    def __init__(self, spin_threshold=0.002, clock=time.perf_counter):
+        # OS sleeps overshoot by up to a scheduler tick, so the final
+        # spin_threshold seconds before a deadline are spent polling the clock
+        self.spin_threshold = spin_threshold
+        self.clock = clock
+
+    def wait_until(self, deadline, control=None):
+        """Block until the clock reaches deadline; False if control cancelled or paused first"""
+        remaining = deadline - self.clock()
+        if remaining > self.spin_threshold:
+            if control is None:
+                time.sleep(remaining - self.spin_threshold)
+            elif not control.sleep_until(deadline - self.spin_threshold):
+                return False
+        while self.clock() < deadline:
+            if control is not None and (control.cancelled or control.paused):
+                return False
+            time.sleep(0)  # yield the GIL to the Tk thread while spinning
+        return True
+
+
+class Pacing:
+    """Deadline and catch-up arithmetic of one paced schedule, shared by the typing engines
+
+    The engine waits until due() says the next keystroke is due, in its own
+    way (a blocking sleep or an await), then calls send(), which writes
+    every keystroke whose deadline has passed as one batch. A pause is
+    applied by adding its length to origin.
+    """
+
+    def __init__(self, engine, schedule, index, origin):
+        self.text = schedule.text
+        self.offsets = schedule.offsets
+        self.total = len(schedule.text)
+        self.index = index
+        self.origin = origin  # clock time of offset 0
+        self.clock = engine.clock
+        self.write = engine.backend.write
+        self.control = engine.control
+        self.trace = engine.trace
+        self.max_catchup = engine.max_catchup
+        self.batch_limit = engine.batch_limit
+        self.deadline = None
+        self.stalls = 0  # times the run fell behind by more than max_catchup
+        self.waited = 0.0
+
+    def due(self):
+        """The deadline to wait for before send(), or None if the next keystroke is already due"""
+        self.deadline = deadline = self.origin + self.offsets[self.index]
+        lag = self.clock() - deadline
+        if lag < 0:
+            self.waited -= lag
+            return deadline
+        if lag > self.max_catchup:
+            # Stalled: keep a bounded catch-up burst and move the rest of the timeline
+            self.origin += lag - self.max_catchup
+            self.stalls += 1
+        return None
+
+    def send(self):
+        """Write everything whose deadline has already passed as one batch; returns the new index"""
+        text = self.text
+        offsets = self.offsets
+        origin = self.origin
+        index = self.index
+        now = self.clock()
+        end = index + 1
+        limit = min(self.total, index + self.batch_limit)
+        while end < limit and origin + offsets[end] <= now:
+            end += 1
+        self.write(text[index:end])
+        control = self.control
+        control.last_keystroke = self.clock()
+        if self.trace is not None:
+            self.trace.record(now, control.last_keystroke, end - index, now - self.deadline)
+        self.index = end
+        return end
+
+    def finish(self):
+        if self.trace is not None:
+            self.trace.add_wait(self.waited)
+
+
+def next_burst(burst, spent, burst_time, max_burst):
+    """Size of the next instant-mode burst: grown or shrunk towards burst_time seconds of backend work"""
+    if spent > 0:
+        burst = int(burst * min(2.0, max(0.5, burst_time / spent)))
+    else:
+        burst *= 2
+    return max(1, min(max_burst, burst))
+
+
+class RunResult:
+    """Outcome of one typing run: how many keys were sent and how fast"""
+
+    def __init__(self, chars_typed, total_chars, target_duration, elapsed, completed, stalls=0,
+                 cancel_latency=None):
+        self.chars_typed = chars_typed
+        self.total_chars = total_chars
+        self.target_duration = target_duration
+        self.elapsed = elapsed
+        self.completed = completed
+        self.stalls = stalls  # times the run fell behind by more than the catch-up bound
+        self.cancel_latency = cancel_latency  # seconds from cancel to the last keystroke
+
+    @property
+    def target_cps(self):
+        return self.total_chars / self.target_duration if self.target_duration else 0.0
+
+    @property
+    def achieved_cps(self):
+        return self.chars_typed / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def target_wpm(self):
+        return self.target_cps * 60 / 5
+
+    @property
+    def achieved_wpm(self):
+        return self.achieved_cps * 60 / 5
+
+    def summary(self):
+        """One-line target vs achieved rate for the status bar"""
+        if self.target_duration is None:
+            return f"{self.achieved_cps:.0f} chars/s"
+        return f"target {self.target_wpm:.0f} WPM, achieved {self.achieved_wpm:.0f} WPM"
+
+
+class TypingEngine:
+    """Sends a compiled TypingSchedule through an injection backend on time"""
+
+    def __init__(self, backend, control=None, max_catchup=0.05, batch_limit=64, burst_time=0.005,
+                 pacer=None, trace=None):
+        self.backend = backend
+        # How far behind the schedule the engine may burst to catch up;
+        # anything beyond that shifts the rest of the timeline instead
+        self.max_catchup = max_catchup
+        self.batch_limit = batch_limit
+        # Instant mode sizes its bursts so each one takes about this long,
+        # which bounds how late a cancel can be noticed
+        self.burst_time = burst_time
+        self.pacer = pacer or DeadlinePacer()
+        self.clock = self.pacer.clock
+        self.control = control or RunControl(self.clock)
+        # Optional instrument.KeystrokeTrace that every backend call is recorded into
+        self.trace = trace
+
+    def cancel(self):
+        """Stop the current run after the batch in flight"""
+        self.control.cancel()
+
+    def pause(self):
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    def run(self, schedule, start_index=0, on_progress=None):
+        """Type schedule from start_index, pacing every keystroke against absolute deadlines"""
+        clock = self.clock
+        offsets = schedule.offsets
+        total = len(schedule)
+
+        started = clock()
+        index, origin, stalls = self._pace(
+            schedule, start_index, started - offsets[start_index], 0, total, on_progress)
+
+        completed = index >= total and not self.control.cancelled
+        if completed:
+            self.pacer.wait_until(origin + offsets[total], self.control)
+        return RunResult(
+            index - start_index,
+            total - start_index,
+            offsets[total] - offsets[start_index],
+            clock() - started,
+            completed,
+            stalls,
+            self.control.cancel_latency,
+        )
+
+    def run_stream(self, schedules, on_progress=None, total=None, start=0):
+        """Type consecutive schedules (see compile_stream) as one continuous timeline
+
+        Each schedule is only pulled from the iterable when the previous one is
+        done, so memory stays bounded by the chunk size however long the input is.
+        total, if known, is only used for progress reporting. start is the number
+        of characters already typed before the first schedule, when resuming.
+        """
+        clock = self.clock
+        control = self.control
+        started = clock()
+        origin = None
+        typed = start
+        planned = stalls = 0
+        first_offset = last_offset = 0.0
+
+        for schedule in schedules:
+            if origin is None:
+                first_offset = schedule.offsets[0]
+                origin = started - first_offset
+            index, origin, chunk_stalls = self._pace(schedule, 0, origin, typed, total, on_progress)
+            typed += index
+            planned += len(schedule)
+            stalls += chunk_stalls
+            last_offset = schedule.offsets[-1]
+            if index < len(schedule):
+                break
+
+        completed = not control.cancelled
+        if completed and origin is not None:
+            self.pacer.wait_until(origin + last_offset, control)
+        return RunResult(
+            typed - start,
+            planned,
+            last_offset - first_offset,
+            clock() - started,
+            completed,
+            stalls,
+            control.cancel_latency,
+        )
+
+    def run_edits(self, steps, on_progress=None, total=None):
+        """Apply compiled edit plan steps (see incremental.py)
+
+        Navigation and deletion keys go out in batch_limit-sized presses so a
+        cancel is noticed quickly; insertions are paced like run().
+        """
+        clock = self.clock
+        backend = self.backend
+        control = self.control
+        trace = self.trace
+        started = clock()
+        done = stalls = 0
+
+        for step in steps:
+            if control.paused:
+                control.wait_while_paused()
+            if control.cancelled:
+                break
+            if step[0] == TYPE:
+                schedule = step[1]
+                index, _, chunk_stalls = self._pace(
+                    schedule, 0, clock() - schedule.offsets[0], done, total, on_progress)
+                done += index
+                stalls += chunk_stalls
+                continue
+            sent = clock()
+            if step[0] == HOTKEY:
+                backend.hotkey(*step[1])
+                done += 1
+                count = 1
+            else:
+                _, key, remaining = step
+                count = 0
+                while remaining and not control.cancelled:
+                    batch = min(remaining, self.batch_limit)
+                    backend.press(key, batch)
+                    count += batch
+                    remaining -= batch
+                done += count
+            control.last_keystroke = clock()
+            if trace is not None:
+                trace.record(sent, control.last_keystroke, count)
+            if on_progress is not None:
+                on_progress(done, total)
+
+        # Navigation is not paced, so the rate is reported in keys per second
+        return RunResult(done, total if total is not None else done, None, clock() - started,
+                         not control.cancelled, stalls, control.cancel_latency)
+
+    def _pace(self, schedule, index, origin, progress_base, progress_total, on_progress):
+        """Hot loop: send schedule from index against origin; returns (index, origin, stalls)"""
+        pacing = Pacing(self, schedule, index, origin)
+        total = pacing.total
+        wait_until = self.pacer.wait_until
+        control = self.control
+
+        while pacing.index < total and not control.cancelled:
+            if control.paused:
+                # Slide the remaining timeline by however long the pause lasted
+                pacing.origin += control.wait_while_paused()
+                continue
+            deadline = pacing.due()
+            if deadline is not None and not wait_until(deadline, control):
+                continue
+            index = pacing.send()
+            if on_progress is not None:
+                on_progress(progress_base + index, progress_total)
+        pacing.finish()
+        return pacing.index, pacing.origin, pacing.stalls
+
+    def run_instant(self, text, on_progress=None, start_index=0):
+        """Type text from start_index as fast as the backend allows, in adaptively sized bursts"""
+        return self.run_instant_stream((text[start_index:],), on_progress, len(text), start=start_index)
+
+    def run_instant_stream(self, chunks, on_progress=None, total=None, max_burst=4096, start=0):
+        """Type an iterable of text chunks as fast as the backend allows
+
+        start is the number of characters already typed before the first chunk.
+        """
+        clock = self.clock
+        write = self.backend.write
+        control = self.control
+        trace = self.trace
+        burst = 16
+
+        started = clock()
+        typed = start
+        for text in chunks:
+            index = 0
+            while index < len(text) and not control.cancelled:
+                if control.paused:
+                    control.wait_while_paused()
+                    continue
+                end = min(len(text), index + burst)
+                burst_started = clock()
+                write(text[index:end])
+                control.last_keystroke = clock()
+                if trace is not None:
+                    trace.record(burst_started, control.last_keystroke, end - index)
+                burst = next_burst(burst, control.last_keystroke - burst_started, self.burst_time, max_burst)
+                typed += end - index
+                index = end
+                if on_progress is not None:
+                    on_progress(typed, total)
+            if control.cancelled:
+                break
+
+        completed = not control.cancelled
+        return RunResult(typed - start, (total if total is not None else typed) - start, None,
+                         clock() - started, completed, cancel_latency=control.cancel_latency)
@@ -0,0 +1,87 @@
+import threading
+
+# pynput hotkey syntax. The trigger is a single key so typing can start the
+# moment it goes down; combos with modifiers wait for them to be released.
+TRIGGER_KEY = '<f9>'
+PAUSE_KEY = '<ctrl>+<alt>+p'
+CANCEL_KEY = '<ctrl>+<alt>+c'
+
+
+class HotkeyError(Exception):
+    """Global hotkeys are unavailable (pynput missing, no display, or a bad key combo)"""
+
+
+def format_hotkey(combo):
+    """'<ctrl>+<alt>+p' -> 'Ctrl+Alt+P'"""
+    return '+'.join(part.strip('<>').capitalize() for part in combo.split('+'))
+
+
+class HotkeyListener:
+    """System-wide hotkeys through pynput, which is only imported by start()
+
+    Callbacks run on pynput's listener thread, so they must be quick and
+    must not touch Tk. Hotkeys are not swallowed: the target sees them too.
+    """
+
+    def __init__(self, bindings):
+        self.bindings = bindings  # pynput combo such as '<ctrl>+<alt>+p' -> callback
+        self.listener = None
+        self.modifiers = frozenset()
+        self.held = set()  # modifier keys currently down
+        self.released = threading.Condition()
+
+    def start(self):
+        """Start listening; raises HotkeyError if hotkeys cannot be used here"""
+        try:
+            # Imported here: pynput hooks the keyboard at import time on some platforms
+            from pynput import keyboard
+        except Exception as e:
+            raise HotkeyError(f"Global hotkeys need pynput and a desktop session ({e})") from e
+        try:
+            hotkeys = [keyboard.HotKey(keyboard.HotKey.parse(combo), callback)
+                       for combo, callback in self.bindings.items()]
+        except ValueError as e:
+            raise HotkeyError(f"Bad hotkey: {e}") from e
+        key = keyboard.Key
+        self.modifiers = frozenset((key.ctrl, key.ctrl_l, key.ctrl_r, key.alt, key.alt_l, key.alt_r, key.alt_gr,
+                                    key.shift, key.shift_l, key.shift_r, key.cmd, key.cmd_l, key.cmd_r))
+
+        def on_press(pressed):
+            if pressed in self.modifiers:
+                with self.released:
+                    self.held.add(pressed)
+            canonical = listener.canonical(pressed)
+            for hotkey in hotkeys:
+                hotkey.press(canonical)
+
+        def on_release(released):
+            if released in self.modifiers:
+                with self.released:
+                    self.held.discard(released)
+                    self.released.notify_all()
+            canonical = listener.canonical(released)
+            for hotkey in hotkeys:
+                hotkey.release(canonical)
+
+        # The callbacks keep their own reference: stop() may clear self.listener mid-callback
+        listener = keyboard.Listener(on_press=on_press, on_release=on_release)
+        listener.start()
+        listener.wait()
+        self.listener = listener
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        with self.released:
+            self.held.clear()
+            self.released.notify_all()
+
+    def wait_for_release(self, timeout=2.0):
+        """Block until no modifier is held, so injected keys are not turned into shortcuts
+
+        Returns False if modifiers were still down after timeout seconds.
+        Not for use from a hotkey callback: those run on the listener thread.
+        """
+        with self.released:
+            return self.released.wait_for(lambda: not self.held, timeout)
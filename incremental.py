@@ -0,0 +1,149 @@
+import random
+import sys
+from itertools import accumulate
+
+from schedule import CLASSIC_PROFILE, compile_schedule
+
+# Edit plan step kinds: ('keys', key, count), ('hotkey', keys), ('type', text or TypingSchedule)
+KEYS, HOTKEY, TYPE = 'keys', 'hotkey', 'type'
+
+# Key chords that move to the start and end of the document, and select all of it
+if sys.platform == 'darwin':
+    DOCUMENT_START, DOCUMENT_END, SELECT_ALL = ('command', 'up'), ('command', 'down'), ('command', 'a')
+else:
+    DOCUMENT_START, DOCUMENT_END, SELECT_ALL = ('ctrl', 'home'), ('ctrl', 'end'), ('ctrl', 'a')
+
+# Replaced blocks longer than this are retyped whole instead of diffed character by character
+MAX_REFINE = 20000
+
+
+def common_prefix_length(a, b, block=4096):
+    """Length of the common prefix of a and b, compared a block at a time"""
+    limit = min(len(a), len(b))
+    length = 0
+    while length < limit and a[length:length + block] == b[length:length + block]:
+        length += block
+    if length >= limit:
+        return limit
+    # The first difference is in the block at length: bisect it
+    low, high = length, min(length + block, limit)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[length:middle] == b[length:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def diff_opcodes(old, new):
+    """Non-equal (tag, i1, i2, j1, j2) character opcodes turning old into new
+
+    The common prefix and suffix are skipped, then lines are matched, so only
+    changed lines are compared character by character and large documents
+    with small edits stay cheap to diff.
+    """
+    # Imported here: the engine imports this module and difflib is only needed for diffing
+    from difflib import SequenceMatcher
+    prefix = common_prefix_length(old, new)
+    suffix = common_prefix_length(old[prefix:][::-1], new[prefix:][::-1])
+    # Keep whole lines around the change so the line matcher sees them intact
+    prefix = old.rfind('\n', 0, prefix) + 1
+    old_lines = old[prefix:len(old) - suffix].splitlines(keepends=True)
+    new_lines = new[prefix:len(new) - suffix].splitlines(keepends=True)
+    old_starts = list(accumulate(map(len, old_lines), initial=prefix))
+    new_starts = list(accumulate(map(len, new_lines), initial=prefix))
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, a1, a2, b1, b2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        i1, i2, j1, j2 = old_starts[a1], old_starts[a2], new_starts[b1], new_starts[b2]
+        if tag != 'replace' or max(i2 - i1, j2 - j1) > MAX_REFINE:
+            yield tag, i1, i2, j1, j2
+            continue
+        inner = SequenceMatcher(None, old[i1:i2], new[j1:j2], autojunk=False)
+        for tag, x1, x2, y1, y2 in inner.get_opcodes():
+            if tag != 'equal':
+                yield tag, i1 + x1, i1 + x2, j1 + y1, j1 + y2
+
+
+class EditPlan:
+    """Keystrokes that turn the previously typed text into the new text"""
+
+    def __init__(self, steps, old, new):
+        self.steps = steps
+        self.old = old
+        self.new = new
+
+    @property
+    def keystrokes(self):
+        """Keys the plan sends, counting each typed character and each key press"""
+        count = 0
+        for step in self.steps:
+            if step[0] == KEYS:
+                count += step[2]
+            elif step[0] == HOTKEY:
+                count += 1
+            else:
+                count += len(step[1])
+        return count
+
+    @property
+    def saved(self):
+        """Keystrokes saved compared to typing the new text from scratch, never negative"""
+        return max(0, len(self.new) - self.keystrokes)
+
+    def compile(self, wpm, use_variance, profile=CLASSIC_PROFILE, seed=None):
+        """Steps with every insertion compiled into a TypingSchedule"""
+        rng = random.Random(seed)
+        return [
+            (TYPE, compile_schedule(step[1], wpm, use_variance, profile, rng.random())) if step[0] == TYPE else step
+            for step in self.steps
+        ]
+
+
+def plan_edits(old, new, line_keys=False, select_all=SELECT_ALL):
+    """Build the EditPlan that edits old, already typed into the target, into new
+
+    Edits are applied from the end of the document backwards, so positions
+    before the cursor always still match old. The cursor is first sent to the
+    end of the document, and every move is the cheapest of: Left presses,
+    DOCUMENT_START then Right presses, or (with line_keys) Up, Home and Right.
+    Line keys are off by default because targets that soft-wrap lines, like
+    browser text areas, move Up/Home by screen line rather than by text line.
+    If the edits would take more keys than retyping, the plan presses
+    select_all and types new over it instead.
+    """
+    steps = [(HOTKEY, DOCUMENT_END)]
+    # The cursor sits after old[:position] followed by the text just inserted there
+    position, inserted = len(old), ''
+
+    def move_to(target):
+        distance = position - target + len(inserted)
+        options = [(distance, [(KEYS, 'left', distance)])]
+        options.append((1 + target, [(HOTKEY, DOCUMENT_START), (KEYS, 'right', target)]))
+        if line_keys:
+            line_start = old.rfind('\n', 0, target) + 1
+            lines = old.count('\n', target, position) + inserted.count('\n')
+            column = target - line_start
+            options.append((lines + 1 + column, [(KEYS, 'up', lines), (KEYS, 'home', 1), (KEYS, 'right', column)]))
+        _, moves = min(options, key=lambda option: option[0])
+        steps.extend(move for move in moves if move[0] != KEYS or move[2])
+
+    for tag, i1, i2, j1, j2 in reversed(list(diff_opcodes(old, new))):
+        move_to(i2)
+        if i2 > i1:
+            steps.append((KEYS, 'backspace', i2 - i1))
+        if j2 > j1:
+            steps.append((TYPE, new[j1:j2]))
+        position, inserted = i1, new[j1:j2]
+
+    if position + len(inserted) != len(new) and len(steps) > 1:
+        steps.append((HOTKEY, DOCUMENT_END))
+    if len(steps) == 1:
+        steps = []  # nothing changed
+    plan = EditPlan(steps, old, new)
+    retype = [(HOTKEY, select_all), (TYPE, new) if new else (KEYS, 'backspace', 1)]
+    if plan.keystrokes > EditPlan(retype, old, new).keystrokes:
+        return EditPlan(retype, old, new)
+    return plan
@@ -0,0 +1,177 @@
+import csv
+import json
+import math
+from array import array
+
+# Upper edges of the inter-key interval histogram, in milliseconds
+INTERVAL_EDGES_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+
+class KeystrokeTrace:
+    """Per-batch injection timestamps in preallocated ring buffers
+
+    The engine calls record() after every backend call. Four flat arrays
+    are written in place, so recording allocates nothing; once capacity
+    batches have been recorded the oldest ones are overwritten.
+    """
+
+    def __init__(self, capacity=1 << 16):
+        self.capacity = capacity
+        self.sent = array('d', bytes(8 * capacity))  # clock() just before the backend call
+        self.backend = array('d', bytes(8 * capacity))  # seconds spent inside the backend call
+        self.late = array('d', bytes(8 * capacity))  # seconds after the batch's deadline, nan if unpaced
+        self.chars = array('I', bytes(array('I').itemsize * capacity))  # events in the batch
+        self.count = 0  # batches recorded, including overwritten ones
+        self.waited = 0.0  # seconds the pacer spent waiting for deadlines
+
+    def record(self, sent, finished, chars, late=math.nan):
+        slot = self.count % self.capacity
+        self.sent[slot] = sent
+        self.backend[slot] = finished - sent
+        self.chars[slot] = chars
+        self.late[slot] = late
+        self.count += 1
+
+    def add_wait(self, seconds):
+        self.waited += seconds
+
+    def clear(self):
+        self.count = 0
+        self.waited = 0.0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def rows(self):
+        """(sent, backend seconds, chars, lateness) of the kept batches, oldest first"""
+        kept = len(self)
+        first = self.count - kept
+        for position in range(first, self.count):
+            slot = position % self.capacity
+            yield self.sent[slot], self.backend[slot], self.chars[slot], self.late[slot]
+
+    def report(self, elapsed=None, stall_threshold=0.05, window=0.25):
+        """Summarise the trace as a RunReport; elapsed defaults to first to last batch"""
+        return RunReport(list(self.rows()), self.count - len(self), self.waited, elapsed, stall_threshold,
+                         window)
+
+
+def _percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+class RunReport:
+    """Throughput, interval histogram, jitter, stalls and time split of one traced run"""
+
+    def __init__(self, rows, dropped, waited, elapsed=None, stall_threshold=0.05, window=0.25):
+        self.rows = rows  # (sent, backend seconds, chars, lateness), times relative to the clock
+        self.dropped = dropped  # oldest batches overwritten in the ring buffer
+        self.stall_threshold = stall_threshold
+        self.window = window
+        self.chars = sum(row[2] for row in rows)
+        started = rows[0][0] if rows else 0.0
+        span = rows[-1][0] + rows[-1][1] - started if rows else 0.0
+        self.elapsed = elapsed if elapsed is not None else span
+        self.backend_time = sum(row[1] for row in rows)
+        self.wait_time = waited
+        # Whatever is neither backend nor waiting: scheduling, progress callbacks, GIL contention
+        self.overhead_time = max(0.0, self.elapsed - self.backend_time - self.wait_time)
+
+        # Achieved chars/sec per window, by when each batch was sent
+        buckets = [0] * (int(span / window) + 1 if rows else 0)
+        for sent, _, chars, _ in rows:
+            buckets[int((sent - started) / window)] += chars
+        length = min(window, span) or window  # runs shorter than a window are one short window
+        self.cps_series = [(round(index * window, 6), chars / length) for index, chars in enumerate(buckets)]
+
+        # Gaps between consecutive batches: histogram and stalls
+        self.histogram = [0] * (len(INTERVAL_EDGES_MS) + 1)
+        self.stalls = []  # (seconds into the run, gap in seconds)
+        for previous, row in zip(rows, rows[1:]):
+            gap = row[0] - previous[0]
+            self.histogram[_bucket(gap * 1000)] += 1
+            if gap > stall_threshold:
+                self.stalls.append((previous[0] - started, gap))
+
+        # Jitter: how late each paced batch went out against its deadline
+        late = sorted(row[3] * 1000 for row in rows if not math.isnan(row[3]))
+        self.paced = len(late)  # batches that had a deadline; instant mode and edit keys do not
+        self.jitter_ms = {
+            'p50': _percentile(late, 0.50),
+            'p99': _percentile(late, 0.99),
+            'max': late[-1] if late else 0.0,
+        }
+
+    @property
+    def cps(self):
+        return self.chars / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        """Multi-line text for the status section"""
+        if not self.rows:
+            return "No keystrokes recorded"
+        elapsed = self.elapsed or 1.0
+        throughput = (f"{self.chars} chars in {len(self.rows)} batches, {self.cps:.0f} chars/s "
+                      f"(peak {max(cps for _, cps in self.cps_series):.0f})")
+        if self.dropped:
+            throughput += f", oldest {self.dropped} batches not kept"
+        if self.paced:
+            jitter = (f"Jitter p50 {self.jitter_ms['p50']:.2f} ms, p99 {self.jitter_ms['p99']:.2f} ms, "
+                      f"max {self.jitter_ms['max']:.2f} ms")
+        else:
+            jitter = "Jitter n/a (unpaced run)"
+        return "\n".join((
+            throughput,
+            jitter,
+            f"{len(self.stalls)} stalls over {self.stall_threshold * 1000:.0f} ms - "
+            f"backend {self.backend_time / elapsed:.0%}, waiting {self.wait_time / elapsed:.0%}, "
+            f"other {self.overhead_time / elapsed:.0%}",
+        ))
+
+    def to_dict(self):
+        labels = [f"<={edge}ms" for edge in INTERVAL_EDGES_MS] + [f">{INTERVAL_EDGES_MS[-1]}ms"]
+        return {
+            'chars': self.chars,
+            'batches': len(self.rows),
+            'dropped_batches': self.dropped,
+            'elapsed_s': self.elapsed,
+            'chars_per_sec': self.cps,
+            'chars_per_sec_series': {'window_s': self.window, 'points': self.cps_series},
+            'interval_histogram': dict(zip(labels, self.histogram)),
+            'paced_batches': self.paced,
+            'jitter_ms': self.jitter_ms,
+            'stall_threshold_ms': self.stall_threshold * 1000,
+            'stalls': [{'at_s': at, 'gap_ms': gap * 1000} for at, gap in self.stalls],
+            'time_s': {'backend': self.backend_time, 'waiting': self.wait_time, 'other': self.overhead_time},
+        }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def write_csv(self, path):
+        """One row per batch, for offline analysis"""
+        started = self.rows[0][0] if self.rows else 0.0
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(('batch', 'sent_s', 'backend_ms', 'chars', 'late_ms'))
+            for index, (sent, backend, chars, late) in enumerate(self.rows):
+                writer.writerow((index, f"{sent - started:.6f}", f"{backend * 1000:.4f}", chars,
+                                 '' if math.isnan(late) else f"{late * 1000:.4f}"))
+
+    def export(self, path):
+        """Write CSV for a .csv path, JSON otherwise"""
+        if path.lower().endswith('.csv'):
+            self.write_csv(path)
+        else:
+            self.write_json(path)
+
+
+def _bucket(interval_ms):
+    for index, edge in enumerate(INTERVAL_EDGES_MS):
+        if interval_ms <= edge:
+            return index
+    return len(INTERVAL_EDGES_MS)
@@ -0,0 +1,197 @@
+from schedule import MODERN_PROFILE, PROFILES, compile_schedule, format_duration
+
+# Separates snippets in a job file; settings for the snippet below may follow it
+SEPARATOR = '---'
+# Job file words that switch a setting on or off
+FLAGS = {
+    'variance': ('use_variance', True),
+    'steady': ('use_variance', False),
+    'instant': ('instant', True),
+    'paced': ('instant', False),
+}
+
+
+class TypingJob:
+    """One snippet and its own settings, compiled as soon as it is queued"""
+
+    def __init__(self, text, wpm, use_variance=False, profile=MODERN_PROFILE, instant=False, label=None, cache=None):
+        self.text = text
+        self.wpm = wpm
+        self.use_variance = use_variance
+        self.profile = profile
+        self.instant = instant
+        self.label = label or preview(text)
+        # Compiled now so that starting the job costs nothing; a plan_cache.PlanCache
+        # skips even that for paced snippets typed before
+        if cache is not None and not instant:
+            self.schedule = cache.compile(text, wpm, use_variance, profile)
+        else:
+            self.schedule = compile_schedule(text, wpm, use_variance, profile)
+        self.typed = 0  # characters already typed, so an interrupted job continues where it stopped
+        self.result = None  # RunResult of the last attempt
+
+    def __len__(self):
+        return len(self.text)
+
+    @property
+    def done(self):
+        return self.typed >= len(self.text)
+
+    def run(self, engine, on_progress=None):
+        """Type what is left of the job; returns the RunResult"""
+        if self.instant:
+            result = engine.run_instant(self.text, on_progress, self.typed)
+        else:
+            result = engine.run(self.schedule, self.typed, on_progress)
+        self.typed += result.chars_typed
+        self.result = result
+        return result
+
+    def summary(self):
+        """One line for the queue list: settings before the run, throughput after it"""
+        if self.done and self.result is not None:
+            return f"✅ {self.label} - {len(self)} chars, {self.result.summary()}"
+        if self.typed:
+            return f"⏸ {self.label} - stopped at {self.typed}/{len(self)}"
+        speed = "instant" if self.instant else f"{self.wpm} WPM, ~{format_duration(self.schedule.duration)}"
+        return f"• {self.label} - {len(self)} chars, {speed}"
+
+
+class JobQueue:
+    """Snippets typed back to back with one engine, on a trigger hotkey or a fixed gap
+
+    Every job is compiled when it is added, so the only work left between
+    two jobs is waiting for the trigger or the gap.
+    """
+
+    def __init__(self, cache=None):
+        self.jobs = []
+        self.cache = cache  # optional plan_cache.PlanCache the jobs are compiled through
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def __iter__(self):
+        return iter(self.jobs)
+
+    def add(self, text, wpm, use_variance=False, profile=MODERN_PROFILE, instant=False, label=None):
+        job = TypingJob(text, wpm, use_variance, profile, instant, label, self.cache)
+        self.jobs.append(job)
+        return job
+
+    def extend(self, jobs):
+        self.jobs.extend(jobs)
+
+    def clear(self):
+        self.jobs = []
+
+    @property
+    def pending(self):
+        return [job for job in self.jobs if not job.done]
+
+    @property
+    def duration(self):
+        """Estimated typing time of the pending jobs, without gaps or instant ones"""
+        return sum(job.schedule.offsets[-1] - job.schedule.offsets[job.typed]
+                   for job in self.pending if not job.instant)
+
+    def run(self, engine, gap=0.0, hotkeys=None, on_job=None, on_progress=None, on_done=None):
+        """Type the pending jobs in order; returns True if all of them finished
+
+        With hotkeys, a started HotkeyListener whose trigger calls
+        engine.control.trigger, each job waits for its own trigger press.
+        Without them jobs follow each other gap seconds apart; the first
+        starts at once, since the caller has done its countdown. on_job and
+        on_done are called as (position, count, job) before each job starts
+        typing and after it stops, finished or not.
+        """
+        control = engine.control
+        pending = self.pending
+        for position, job in enumerate(pending, 1):
+            if hotkeys is not None:
+                # Presses while the previous job was typing do not count
+                control.rearm()
+                if not control.wait_for_trigger():
+                    return False
+                # Typing while Ctrl or Alt is still down would send shortcuts
+                hotkeys.wait_for_release()
+            elif position > 1 and not control.hold(gap):
+                return False
+            if on_job is not None:
+                on_job(position, len(pending), job)
+            result = job.run(engine, on_progress)
+            if on_done is not None:
+                on_done(position, len(pending), job)
+            if not result.completed:
+                return False
+        return True
+
+    def summary(self):
+        """Totals over the jobs typed so far"""
+        typed = [job for job in self.jobs if job.result is not None]
+        if not typed:
+            return f"{len(self.jobs)} jobs queued, ~{format_duration(self.duration)} of typing"
+        chars = sum(job.result.chars_typed for job in typed)
+        elapsed = sum(job.result.elapsed for job in typed)
+        rate = chars / elapsed * 60 / 5 if elapsed else 0.0
+        finished = sum(job.done for job in self.jobs)
+        return f"{finished}/{len(self.jobs)} jobs done - {chars} chars in {elapsed:.2f}s of typing ({rate:.0f} WPM)"
+
+
+def preview(text, width=32):
+    """First line of text, shortened to width characters"""
+    line = text.strip().split('\n', 1)[0]
+    return line if len(line) <= width else line[:width - 1] + '…'
+
+
+def parse_settings(line, number, settings):
+    """Apply the 'wpm=8000 variance profile=classic label=sig' part of a separator line"""
+    for token in line[len(SEPARATOR):].split():
+        name, _, value = token.partition('=')
+        if name == 'wpm' and value.isdigit() and int(value) > 0:
+            settings['wpm'] = int(value)
+        elif name == 'profile' and value in PROFILES:
+            settings['profile'] = PROFILES[value]
+        elif name == 'label' and value:
+            settings['label'] = value
+        elif token in FLAGS:
+            setting, value = FLAGS[token]
+            settings[setting] = value
+        else:
+            raise ValueError(f"line {number}: unknown job setting {token!r}")
+
+
+def parse_jobs(text, wpm, use_variance=False, profile=MODERN_PROFILE, instant=False, cache=None):
+    """Jobs from a job file: snippets separated by lines starting with '---'
+
+    A separator may carry settings for the snippet below it, e.g.
+    '--- wpm=8000 variance profile=classic label=sig' ('steady' and 'paced'
+    switch variance and instant off again). Anything not set there uses the
+    defaults passed in. Raises ValueError on an unknown setting.
+    """
+    defaults = {'wpm': wpm, 'use_variance': use_variance, 'profile': profile, 'instant': instant}
+    jobs = []
+    settings = dict(defaults)
+    lines = []
+
+    def flush():
+        snippet = '\n'.join(lines).rstrip('\n')
+        if snippet.strip():
+            jobs.append(TypingJob(snippet, cache=cache, **settings))
+
+    for number, line in enumerate(text.split('\n'), 1):
+        if line.startswith(SEPARATOR) and line.split()[0] == SEPARATOR:
+            flush()
+            lines = []
+            settings = dict(defaults)
+            parse_settings(line.rstrip(), number, settings)
+        else:
+            lines.append(line)
+    flush()
+    return jobs
+
+
+def load_jobs(path, wpm, use_variance=False, profile=MODERN_PROFILE, instant=False, cache=None, encoding='utf-8'):
+    """parse_jobs() on a file"""
+    with open(path, encoding=encoding, errors='replace') as f:
+        return parse_jobs(f.read(), wpm, use_variance, profile, instant, cache)
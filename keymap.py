@@ -0,0 +1,105 @@
+# Key event kinds produced by KeyMap.events()
+TAP, PRESS, RELEASE, UNICODE = range(4)
+
+
+def _qwerty(symbols, shifted_digits):
+    """Character -> (key name, needs shift) table for a QWERTY layout"""
+    table = {' ': ('space', False), '\n': ('enter', False), '\t': ('tab', False)}
+    for char in 'abcdefghijklmnopqrstuvwxyz0123456789':
+        table[char] = (char, False)
+    for char in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
+        table[char] = (char.lower(), True)
+    for plain, shifted, key in symbols:
+        if plain:
+            table[plain] = (key, False)
+        if shifted:
+            table[shifted] = (key, True)
+    for digit, shifted in zip('1234567890', shifted_digits):
+        table[shifted] = (digit, True)
+    return table
+
+
+US_QWERTY = _qwerty((
+    ('-', '_', 'minus'), ('=', '+', 'equal'), ('[', '{', 'leftbrace'),
+    (']', '}', 'rightbrace'), ('\\', '|', 'backslash'), (';', ':', 'semicolon'),
+    ("'", '"', 'apostrophe'), ('`', '~', 'grave'), (',', '<', 'comma'),
+    ('.', '>', 'dot'), ('/', '?', 'slash'),
+), '!@#$%^&*()')
+
+UK_QWERTY = _qwerty((
+    ('-', '_', 'minus'), ('=', '+', 'equal'), ('[', '{', 'leftbrace'),
+    (']', '}', 'rightbrace'), ('#', '~', 'backslash'), (';', ':', 'semicolon'),
+    ("'", '@', 'apostrophe'), ('`', '¬', 'grave'), (',', '<', 'comma'),
+    ('.', '>', 'dot'), ('/', '?', 'slash'), ('\\', '|', '102nd'),
+), '!"£$%^&*()')
+
+LAYOUTS = {'us': US_QWERTY, 'uk': UK_QWERTY}
+DEFAULT_LAYOUT = 'us'
+
+
+class KeyMap:
+    """A layout compiled into an O(1) character -> (key, needs shift) lookup"""
+
+    def __init__(self, layout, table):
+        self.layout = layout
+        self.table = dict(table)
+
+    def lookup(self, char):
+        """(key, needs shift) for char, or None if the layout has no key for it"""
+        return self.table.get(char)
+
+    def events(self, text):
+        """Minimal key events for text: shift is held once across a run of shifted characters"""
+        table = self.table
+        events = []
+        append = events.append
+        shifted = False
+        for char in text:
+            entry = table.get(char)
+            if entry is None:
+                if shifted:
+                    append((RELEASE, 'shift'))
+                    shifted = False
+                append((UNICODE, char))
+                continue
+            key, needs_shift = entry
+            if needs_shift != shifted:
+                append((PRESS if needs_shift else RELEASE, 'shift'))
+                shifted = needs_shift
+            append((TAP, key))
+        if shifted:
+            append((RELEASE, 'shift'))
+        return events
+
+    def unicode_events(self, char):
+        """Generic fallback for characters without a key: Ctrl+Shift+U, hex code point, space
+
+        Understood by GTK and IBus input methods; backends with a native way
+        of injecting arbitrary characters should handle UNICODE events themselves.
+        """
+        events = [(PRESS, 'ctrl'), (PRESS, 'shift'), (TAP, 'u'), (RELEASE, 'shift'), (RELEASE, 'ctrl')]
+        for digit in f"{ord(char):x}":
+            events.append((TAP, self.table[digit][0]))
+        events.append((TAP, 'space'))
+        return events
+
+
+_keymaps = {}
+
+
+def get_keymap(layout=DEFAULT_LAYOUT):
+    """Compiled KeyMap for layout, built on first use and cached per layout"""
+    keymap = _keymaps.get(layout)
+    if keymap is None:
+        try:
+            table = LAYOUTS[layout]
+        except KeyError:
+            raise ValueError(f"Unknown keyboard layout '{layout}'") from None
+        keymap = _keymaps[layout] = KeyMap(layout, table)
+    return keymap
+
+
+def register_layout(layout, table):
+    """Add or replace a layout, e.g. one read from the X server's keyboard mapping"""
+    LAYOUTS[layout] = table
+    _keymaps.pop(layout, None)
@@ -1,9 +1,24 @@
 import tkinter as tk
-from tkinter import scrolledtext
-import pyautogui
+from tkinter import filedialog, scrolledtext
+import os
+import sys
 import threading
-import time
-import random
+from functools import partial
+from backends import BackendError, available_backends, create_backend, default_backend
+from calibrate import calibrate_backend
+from checkpoint import Checkpoint, CheckpointRecorder, clear_checkpoint, file_digest, load_checkpoint, text_digest
+from control import RunControl
+from engine import TypingEngine
+from hotkeys import CANCEL_KEY, PAUSE_KEY, TRIGGER_KEY, HotkeyError, HotkeyListener, format_hotkey
+from incremental import plan_edits
+from plan_cache import PlanCache
+from profiles import calibrated_wpm, save_profile
+from schedule import CLASSIC_PROFILE, compile_schedule, compile_stream, estimate_duration, format_duration
+from sources import count_chars, iter_file_chunks, read_preview, skip_chars, spool_stdin
+from sink import read_tk_clipboard
+from uipump import UIUpdatePump
+from verify import COPY, SELECT_ALL, Verifier, format_chord, parse_chord
+from whitespace import DEFAULT_EDITOR, EDITOR_PRESETS, plan_for_editor
 
 class TextTyperApp:
     def __init__(self, root):
@@ -15,6 +30,9 @@ class TextTyperApp:
         # Set app icon and styling
         self.root.configure(bg="#f0f0f0")
         
+        # Compiled plans of earlier runs, so repeated text starts without compiling
+        self.plan_cache = PlanCache()
+        
         # Create a frame for better layout
         main_frame = tk.Frame(root, bg="#f0f0f0")
         main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
@@ -25,6 +43,7 @@ class TextTyperApp:
         
         self.input_text = scrolledtext.ScrolledText(main_frame, width=60, height=10, wrap=tk.WORD, font=("Arial", 10))
         self.input_text.pack(fill=tk.BOTH, expand=True, pady=(0, 15))
+        self.input_text.bind("<<Modified>>", self.on_text_modified)
         
         # Control frame for typing speed
         control_frame = tk.Frame(main_frame, bg="#f0f0f0")
@@ -43,7 +62,8 @@ class TextTyperApp:
             orient=tk.HORIZONTAL, 
             variable=self.wpm_var,
             length=150,
-            bg="#f0f0f0"
+            bg="#f0f0f0",
+            command=self.schedule_estimate
         )
         self.wpm_scale.pack(side=tk.LEFT)
         
@@ -53,10 +73,109 @@ class TextTyperApp:
             control_frame, 
             text="Add human-like variance", 
             variable=self.human_variance,
-            bg="#f0f0f0"
+            bg="#f0f0f0",
+            command=self.schedule_estimate
         )
         self.variance_check.pack(side=tk.LEFT, padx=(20, 0))
         
+        # Retype only what changed since the last completed run
+        self.changes_only = tk.BooleanVar(value=False)
+        self.changes_check = tk.Checkbutton(
+            control_frame, 
+            text="Type only changes", 
+            variable=self.changes_only,
+            bg="#f0f0f0"
+        )
+        self.changes_check.pack(side=tk.LEFT, padx=(20, 0))
+        
+        # Backend frame for choosing how keystrokes are injected
+        backend_frame = tk.Frame(main_frame, bg="#f0f0f0")
+        backend_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        backend_label = tk.Label(backend_frame, text="Injection backend:", bg="#f0f0f0")
+        backend_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        backends = available_backends()
+        self.backend_var = tk.StringVar(value=default_backend(backends))
+        self.backend_menu = tk.OptionMenu(
+            backend_frame, 
+            self.backend_var, 
+            *backends, 
+            command=self.select_backend
+        )
+        self.backend_menu.config(bg="#f0f0f0", highlightthickness=0)
+        self.backend_menu.pack(side=tk.LEFT)
+        
+        # Measured per-event cost of the selected backend
+        self.backend_cost_var = tk.StringVar()
+        self.backend_cost_label = tk.Label(
+            backend_frame, 
+            textvariable=self.backend_cost_var, 
+            bg="#f0f0f0", 
+            fg="#555555"
+        )
+        self.backend_cost_label.pack(side=tk.LEFT, padx=(20, 0))
+        
+        # Find the fastest rate the backend delivers without losing keys
+        self.calibrate_button = tk.Button(
+            backend_frame, 
+            text="Calibrate", 
+            command=self.start_calibration,
+            bg="#f0f0f0"
+        )
+        self.calibrate_button.pack(side=tk.LEFT, padx=(20, 0))
+        
+        # Editor frame: what the target does on its own while we type
+        editor_frame = tk.Frame(main_frame, bg="#f0f0f0")
+        editor_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        editor_label = tk.Label(editor_frame, text="Target editor:", bg="#f0f0f0")
+        editor_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.editor_var = tk.StringVar(value=DEFAULT_EDITOR)
+        self.editor_menu = tk.OptionMenu(editor_frame, self.editor_var, *EDITOR_PRESETS)
+        self.editor_menu.config(bg="#f0f0f0", highlightthickness=0)
+        self.editor_menu.pack(side=tk.LEFT)
+        
+        editor_hint = tk.Label(
+            editor_frame, 
+            text="(skips indentation and brackets the editor adds itself)", 
+            bg="#f0f0f0", 
+            fg="#555555"
+        )
+        editor_hint.pack(side=tk.LEFT, padx=(20, 0))
+        
+        # Verify frame: read the target back through the clipboard and fix what differs
+        verify_frame = tk.Frame(main_frame, bg="#f0f0f0")
+        verify_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        self.verify_after = tk.BooleanVar(value=False)
+        self.verify_check = tk.Checkbutton(
+            verify_frame, 
+            text="Verify and fix after typing, using keys:", 
+            variable=self.verify_after,
+            bg="#f0f0f0"
+        )
+        self.verify_check.pack(side=tk.LEFT)
+        
+        self.verify_chords_var = tk.StringVar(value=f"{format_chord(SELECT_ALL)}, {format_chord(COPY)}")
+        self.verify_chords_entry = tk.Entry(verify_frame, textvariable=self.verify_chords_var, width=20)
+        self.verify_chords_entry.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Hotkey frame: arm the run and start it from the target window instead of a countdown
+        hotkey_frame = tk.Frame(main_frame, bg="#f0f0f0")
+        hotkey_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        self.use_hotkeys = tk.BooleanVar(value=False)
+        self.hotkey_check = tk.Checkbutton(
+            hotkey_frame, 
+            text=f"Start with {format_hotkey(TRIGGER_KEY)} instead of the countdown "
+                 f"({format_hotkey(PAUSE_KEY)} pauses, {format_hotkey(CANCEL_KEY)} cancels)", 
+            variable=self.use_hotkeys,
+            bg="#f0f0f0"
+        )
+        self.hotkey_check.pack(side=tk.LEFT)
+        
         # Button frame for actions
         button_frame = tk.Frame(main_frame, bg="#f0f0f0")
         button_frame.pack(fill=tk.X, pady=(0, 10))
@@ -74,6 +193,19 @@ class TextTyperApp:
         )
         self.start_button.pack(side=tk.LEFT, padx=(0, 10))
         
+        self.pause_button = tk.Button(
+            button_frame, 
+            text="Pause", 
+            command=self.toggle_pause,
+            bg="#FF9800", 
+            fg="white", 
+            font=("Arial", 10, "bold"),
+            padx=10, 
+            pady=5,
+            state=tk.DISABLED
+        )
+        self.pause_button.pack(side=tk.LEFT, padx=(0, 10))
+        
         self.cancel_button = tk.Button(
             button_frame, 
             text="Cancel", 
@@ -87,6 +219,41 @@ class TextTyperApp:
         )
         self.cancel_button.pack(side=tk.LEFT)
         
+        # Continue an interrupted run from its saved checkpoint
+        self.resume_button = tk.Button(
+            button_frame, 
+            text="Resume Last Run", 
+            command=self.resume_typing,
+            bg="#2196F3", 
+            fg="white", 
+            font=("Arial", 10, "bold"),
+            padx=10, 
+            pady=5,
+            state=tk.DISABLED
+        )
+        self.resume_button.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Large documents are typed straight from the file, not the text box
+        self.file_button = tk.Button(
+            button_frame, 
+            text="Open File...", 
+            command=self.toggle_file,
+            font=("Arial", 10),
+            padx=10, 
+            pady=5
+        )
+        self.file_button.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Estimated typing time of the compiled schedule
+        self.estimate_var = tk.StringVar()
+        self.estimate_label = tk.Label(
+            button_frame, 
+            textvariable=self.estimate_var, 
+            bg="#f0f0f0", 
+            fg="#555555"
+        )
+        self.estimate_label.pack(side=tk.RIGHT)
+        
         # Status display
         self.status_var = tk.StringVar(value="Ready")
         self.status_label = tk.Label(
@@ -127,109 +294,488 @@ class TextTyperApp:
         self.typing_active = False
         self.typing_thread = None
         
-    def prepare_typing(self):
-        """Prepare for typing with a countdown"""
+        # Compiled typing schedule, reused while text and settings are unchanged
+        self.schedule = None
+        self.estimate_job = None
+        self.engine = None
+        self.control = None
+        self.hotkeys = None  # HotkeyListener while a hotkey-armed run is going
+        
+        # Large-document mode: path of the file being typed, None for the text box
+        self.source_path = None
+        self.source_digest = None
+        self.source_chars = None  # characters the document types, for progress and estimates
+        
+        # Where the last interrupted run stopped; survives cancel and restarts
+        self.checkpoint = load_checkpoint()
+        self.recorder = None
+        self.start_offset = 0
+        
+        # Text the target holds after the last completed run, for "Type only changes"
+        self.last_typed_text = None
+        self.typed_text = None
+        self.edit_plan = None
+        self.update_resume_button()
+        
+        # Worker threads never touch Tk; their updates go through this pump
+        self.ui = UIUpdatePump(root)
+        self.ui.register("status", self.status_var.set)
+        self.ui.register("timer", self.timer_var.set)
+        self.ui.register("progress", self.show_progress)
+        self.ui.start()
+        
+        # Keystroke injection backend
+        self.backend = None
+        self.select_backend(self.backend_var.get())
+        
+    def select_backend(self, name):
+        """Switch the injection backend and measure its per-event cost"""
+        try:
+            backend = create_backend(name)
+            backend.open()
+            backend.measure_cost()
+        except BackendError as e:
+            self.status_var.set(f"Error: {e}")
+            if self.backend is not None:
+                self.backend_var.set(self.backend.name)
+            return
+            
+        if self.backend is not None:
+            self.backend.close()
+        self.backend = backend
+        self.plan_cache.layout = backend.keymap.layout
+        if backend.simulated:
+            self.status_var.set(f"Warning: the {backend.name} backend only simulates typing; "
+                                "install pyautogui or python-xlib to type into other windows")
+        self.backend_cost_var.set(f"Cost: {backend.describe_cost()}")
+        self.apply_calibrated_wpm()
+        
+    def apply_calibrated_wpm(self):
+        """Default the speed to the backend's calibrated ceiling, if it has one"""
+        wpm = calibrated_wpm(self.backend.name)
+        if wpm is None:
+            return
+        resolution = int(self.wpm_scale.cget("resolution"))
+        wpm = max(resolution, wpm - wpm % resolution)  # never above the measured ceiling
+        if wpm > int(self.wpm_scale.cget("to")):
+            self.wpm_scale.config(to=wpm)
+        if wpm < int(self.wpm_scale.cget("from")):
+            self.wpm_scale.config(from_=wpm)
+        self.wpm_var.set(wpm)
+        self.schedule_estimate()
+        
+    def start_calibration(self):
+        """Type test patterns into a local window at rising rates to find the loss-free ceiling"""
+        if self.typing_active:
+            return
+        self.control = RunControl()
+        self.typing_active = True
+        self.start_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.resume_button.config(state=tk.DISABLED)
+        self.backend_menu.config(state=tk.DISABLED)
+        self.calibrate_button.config(state=tk.DISABLED)
+        self.status_var.set("Calibrating - don't touch the keyboard or mouse")
+        threading.Thread(target=self.run_calibration, daemon=True).start()
+        
+    def run_calibration(self):
+        """Calibration worker: every Tk call goes through the UI pump"""
+        on_trial = lambda wpm: self.ui.post("status", f"Calibrating: trying {wpm} WPM...")
+        try:
+            result = calibrate_backend(self.root, self.ui, self.backend, self.control, on_trial)
+            self.ui.call(self.calibration_complete, result)
+        except Exception as e:
+            # A backend error, the fail-safe corner or an unanswered Tk call
+            self.ui.post("status", f"Calibration failed ({self.backend.name} backend): {e}")
+        finally:
+            self.ui.call(self.calibration_finished)
+        
+    def calibration_complete(self, result):
+        """Save the measured ceiling as the backend's profile and use it"""
+        if result.wpm is not None and not result.cancelled:
+            save_profile(self.backend.name, result.wpm, trials=result.trials)
+            self.apply_calibrated_wpm()
+        self.status_var.set(f"Calibration: {result.summary()}")
+        
+    def calibration_finished(self):
+        """Give the controls back, however calibration ended"""
+        self.typing_active = False
+        self.start_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.backend_menu.config(state=tk.NORMAL)
+        self.calibrate_button.config(state=tk.NORMAL)
+        self.update_resume_button()
+        
+    def toggle_file(self):
+        """Open a document for large-document mode, or go back to the text box"""
+        if self.source_path is not None:
+            self.close_file()
+            return
+        path = filedialog.askopenfilename(title="Choose a text file to type")
+        if path:
+            self.open_file(path)
+            
+    def open_file(self, path):
+        """Type path by streaming it; the text box only shows a preview"""
+        self.source_path = path
+        self.source_digest = file_digest(path)
+        self.source_chars = count_chars(iter_file_chunks(path))
+        self.input_text.config(state=tk.NORMAL)
+        self.input_text.delete("1.0", tk.END)
+        self.input_text.insert("1.0", read_preview(path))
+        self.input_text.config(state=tk.DISABLED)
+        self.file_button.config(text="Close File")
+        self.status_var.set(f"Large document: {os.path.basename(path)} ({self.source_chars:,} characters), preview shown")
+        self.schedule_estimate()
+        self.update_resume_button()
+        
+    def close_file(self):
+        """Leave large-document mode"""
+        self.source_path = None
+        self.source_digest = None
+        self.source_chars = None
+        self.input_text.config(state=tk.NORMAL)
+        self.input_text.delete("1.0", tk.END)
+        self.file_button.config(text="Open File...")
+        self.status_var.set("Ready")
+        self.schedule_estimate()
+        self.update_resume_button()
+        
+    def on_text_modified(self, event=None):
+        """Refresh the time estimate when the input text changes"""
+        self.input_text.edit_modified(False)
+        self.schedule_estimate()
+        
+    def schedule_estimate(self, *args):
+        """Debounce estimate updates while the user is still typing or sliding"""
+        if self.estimate_job is not None:
+            self.root.after_cancel(self.estimate_job)
+        self.estimate_job = self.root.after(300, self.update_estimate)
+        
+    def update_estimate(self):
+        """Show how long the current text will take to type"""
+        self.estimate_job = None
+        self.update_resume_button()
+        if self.source_path is not None:
+            duration = estimate_duration(self.source_chars, self.wpm_var.get(), CLASSIC_PROFILE)
+            self.estimate_var.set(f"Estimated time: ~{format_duration(duration)}")
+            return
         if not self.input_text.get("1.0", tk.END).strip():
+            self.estimate_var.set("")
+            return
+        schedule = self.get_schedule()
+        self.estimate_var.set(f"Estimated time: {format_duration(schedule.duration)}")
+        
+    def get_schedule(self):
+        """Compile the typing schedule, reusing the last one if nothing changed"""
+        text = self.input_text.get("1.0", tk.END)
+        wpm = self.wpm_var.get()
+        use_variance = self.human_variance.get()
+        settings = (wpm, use_variance, CLASSIC_PROFILE.name)
+        if self.schedule is None or not self.schedule.matches(text, settings):
+            # Text typed before with the same settings is loaded instead of compiled
+            self.schedule = self.plan_cache.get(text, wpm, use_variance, CLASSIC_PROFILE)
+            if self.schedule is None:
+                self.schedule = compile_schedule(text, wpm, use_variance, CLASSIC_PROFILE)
+        return self.schedule
+        
+    def update_resume_button(self):
+        """Enable Resume only if the checkpoint belongs to the current text or an existing document"""
+        checkpoint = self.checkpoint
+        if self.typing_active or checkpoint is None:
+            resumable = False
+        elif checkpoint.path is not None:
+            resumable = os.path.exists(checkpoint.path)
+        else:
+            resumable = self.source_path is None and checkpoint.matches(text_digest(self.input_text.get("1.0", tk.END)))
+        self.resume_button.config(state=tk.NORMAL if resumable else tk.DISABLED)
+        
+    def resume_typing(self):
+        """Continue the interrupted run from the character where it stopped"""
+        checkpoint = self.checkpoint
+        if checkpoint.path is not None and checkpoint.path != self.source_path:
+            self.open_file(checkpoint.path)
+        if self.source_path is not None:
+            digest = self.source_digest
+        else:
+            digest = text_digest(self.input_text.get("1.0", tk.END))
+        if not checkpoint.matches(digest, self.source_path):
+            self.status_var.set("Error: The text has changed since the run was interrupted")
+            self.update_resume_button()
+            return
+        self.prepare_typing(checkpoint.offset)
+        self.status_var.set(f"Resuming at character {checkpoint.offset} ({checkpoint.percent}% already typed)")
+        
+    def typing_interrupted(self, offset):
+        """Save exactly where an interrupted run stopped, so it can be resumed"""
+        # The target now holds an unknown part of the text, so the next run types it all
+        self.last_typed_text = None
+        if self.edit_plan is not None:
+            return
+        self.recorder.update(offset, force=True)
+        self.checkpoint = self.recorder.checkpoint
+        self.update_resume_button()
+        
+    def prepare_typing(self, start_offset=0):
+        """Prepare for typing with a countdown, optionally resuming at start_offset"""
+        if self.source_path is not None:
+            # The file is compiled chunk by chunk while typing
+            self.schedule = None
+        elif not self.input_text.get("1.0", tk.END).strip():
             self.status_var.set("Error: No text to type")
             return
-            
+        else:
+            self.schedule = self.get_schedule()
+            self.plan_cache.put(self.schedule, CLASSIC_PROFILE)
+        if self.schedule is None:
+            checkpoint = Checkpoint(self.source_digest, start_offset, self.source_chars, self.source_path)
+        else:
+            checkpoint = Checkpoint(text_digest(self.schedule.text), start_offset, len(self.schedule))
+        self.recorder = CheckpointRecorder(checkpoint)
+        self.stream_settings = (self.wpm_var.get(), self.human_variance.get())
+        self.start_offset = start_offset
+        
+        # Optional read-back through the clipboard once typing is done
+        self.verifier = None
+        if self.verify_after.get():
+            try:
+                select_chord, copy_chord = (parse_chord(chord) for chord in self.verify_chords_var.get().split(','))
+            except ValueError:
+                self.status_var.set("Error: Verify keys must look like ctrl+a, ctrl+c")
+                return
+            read_clipboard = partial(self.ui.call_sync, read_tk_clipboard, self.root)
+            self.verifier = Verifier(read_clipboard, select_chord, copy_chord)
+        self.typed_text = None if self.schedule is None else self.schedule.text
+        
+        # Only type the differences from the last completed run, if it is known,
+        # and leave indentation and closing brackets the target editor adds to it
+        self.edit_plan = None
+        editor = EDITOR_PRESETS[self.editor_var.get()]
+        if self.changes_only.get() and self.typed_text is not None and self.last_typed_text is not None and not start_offset:
+            plan = plan_edits(self.last_typed_text, self.typed_text)
+            if not plan.steps:
+                self.status_var.set("Nothing changed since the last run")
+                return
+            self.edit_plan = plan
+        elif editor.name != DEFAULT_EDITOR and self.typed_text is not None and not start_offset:
+            self.edit_plan = plan_for_editor(self.typed_text, editor)
+        if self.edit_plan is not None:
+            self.edit_steps = self.edit_plan.compile(self.wpm_var.get(), self.human_variance.get(), CLASSIC_PROFILE)
+        self.control = RunControl()
+        self.engine = TypingEngine(self.backend, self.control)
+        if self.use_hotkeys.get():
+            hotkeys = HotkeyListener({
+                TRIGGER_KEY: self.control.trigger,
+                PAUSE_KEY: self.hotkey_pause,
+                CANCEL_KEY: self.hotkey_cancel,
+            })
+            try:
+                hotkeys.start()
+            except HotkeyError as e:
+                self.status_var.set(f"Error: {e}")
+                return
+            self.hotkeys = hotkeys
         self.typing_active = True
         self.start_button.config(state=tk.DISABLED)
+        self.pause_button.config(state=tk.NORMAL, text="Pause")
         self.cancel_button.config(state=tk.NORMAL)
+        self.resume_button.config(state=tk.DISABLED)
+        self.backend_menu.config(state=tk.DISABLED)
+        self.file_button.config(state=tk.DISABLED)
+        self.calibrate_button.config(state=tk.DISABLED)
         
         # Start countdown
         self.countdown_thread = threading.Thread(target=self.countdown, daemon=True)
         self.countdown_thread.start()
     
     def countdown(self):
-        """Countdown before starting to type"""
+        """Countdown before starting to type, or wait for the trigger hotkey"""
+        control = self.control
+        if self.hotkeys is not None:
+            self.arm()
+            return
         for i in range(5, 0, -1):
-            if not self.typing_active:
+            self.ui.post("timer", f"Starting in {i} seconds... Click where you want to type!")
+            # Wakes immediately on cancel and holds while paused
+            if not control.hold(1):
                 return
-            self.timer_var.set(f"Starting in {i} seconds... Click where you want to type!")
-            self.root.update()
-            time.sleep(1)
             
-        self.timer_var.set("Typing now...")
-        self.status_var.set("Typing in progress...")
+        self.ui.post("timer", "Typing now...")
+        self.ui.post("status", "Typing in progress...")
         
         # Start typing in a separate thread
         self.typing_thread = threading.Thread(target=self.start_typing, daemon=True)
         self.typing_thread.start()
         
-    def start_typing(self):
-        """Begin typing text with human-like speed"""
-        text = self.input_text.get("1.0", tk.END)
-        wpm = self.wpm_var.get()
-        use_variance = self.human_variance.get()
+    def arm(self):
+        """Wait for the trigger hotkey with everything ready, then type at once"""
+        control = self.control
+        hotkeys = self.hotkeys
+        # prepare_typing compiled the schedule; one probe warms up the backend's code paths
+        self.backend.probe()
+        self.ui.post("timer", f"Armed: press {format_hotkey(TRIGGER_KEY)} in the target window")
+        self.ui.post("status", "Waiting for the hotkey...")
+        if not control.wait_for_trigger():
+            return
+        # Typing while Ctrl or Alt is still down would send shortcuts
+        hotkeys.wait_for_release()
+        self.ui.post("timer", "Typing now...")
+        self.ui.post("status", "Typing in progress...")
+        self.typing_thread = threading.Thread(target=self.start_typing, daemon=True)
+        self.typing_thread.start()
         
-        # Calculate base delay between keypresses
-        # Average word is ~5 characters, so chars per minute = WPM * 5
-        chars_per_minute = wpm * 5
-        base_delay = 60.0 / chars_per_minute  # seconds per character
-        
-        # Give extra time for user to switch focus
-        time.sleep(0.5)
-        
-        # Type each character with appropriate delay
-        chars_typed = 0
-        total_chars = len(text)
-        
-        for char in text:
-            if not self.typing_active:
-                break
-                
-            # Type the character
-            pyautogui.write(char)
-            chars_typed += 1
+    def hotkey_pause(self):
+        """Pause hotkey (listener thread); resuming waits until Ctrl and Alt are let go"""
+        if not self.typing_active:
+            return
+        if self.control.paused:
+            threading.Thread(target=self.resume_after_release, args=(self.hotkeys,), daemon=True).start()
+        else:
+            self.ui.call(self.toggle_pause)
             
-            # Update status
-            if chars_typed % 10 == 0:
-                progress = int((chars_typed / total_chars) * 100)
-                self.status_var.set(f"Typing: {progress}% complete ({chars_typed}/{total_chars} characters)")
-                self.root.update_idletasks()
+    def resume_after_release(self, hotkeys):
+        if hotkeys is not None:
+            hotkeys.wait_for_release()
+        self.ui.call(self.toggle_pause)
+        
+    def hotkey_cancel(self):
+        """Cancel hotkey (listener thread): stop typing at once, then reset the UI"""
+        self.control.cancel()
+        self.ui.call(self.cancel_typing)
+        
+    def stop_hotkeys(self):
+        if self.hotkeys is not None:
+            self.hotkeys.stop()
+            self.hotkeys = None
+    
+    def start_typing(self):
+        """Typing worker: an error mid-run resets the UI and says what failed"""
+        try:
+            self.type_text()
+        except Exception as e:
+            self.ui.call(self.typing_failed, e)
             
-            # Delay between keypresses with variance if enabled
-            if use_variance:
-                # Add human-like variance (±20% randomness)
-                variance = random.uniform(0.8, 1.2)
-                delay = base_delay * variance
-                
-                # Slightly longer pauses at punctuation
-                if char in ['.', ',', '!', '?', ';', ':', '\n']:
-                    delay *= 1.5
-            else:
-                delay = base_delay
-                
-            time.sleep(delay)
-        
-        # Reset UI after typing completes
-        if self.typing_active:
-            self.typing_complete()
+    def type_text(self):
+        """Begin typing text with human-like speed"""
+        schedule = self.schedule
+        engine = self.engine
+        start = self.start_offset
+        
+        # Give extra time for user to switch focus, unless the hotkey was pressed there
+        if self.hotkeys is None and not engine.control.hold(0.5):
+            return
+        
+        on_progress = partial(self.ui.post, "progress")
+        if self.edit_plan is not None:
+            # Only the changes: navigation keys, deletions and paced insertions
+            result = engine.run_edits(self.edit_steps, on_progress, self.edit_plan.keystrokes)
+        elif schedule is None:
+            # Large-document mode: stream the file through the engine in bounded chunks
+            wpm, use_variance = self.stream_settings
+            chunks = skip_chars(iter_file_chunks(self.source_path), start)
+            schedules = compile_stream(chunks, wpm, use_variance, CLASSIC_PROFILE)
+            result = engine.run_stream(schedules, on_progress, self.source_chars, start)
+        else:
+            # Pace every keystroke against the schedule's absolute deadlines
+            result = engine.run(schedule, start, on_progress)
+        
+        if result.completed:
+            verification = None
+            if self.verifier is not None:
+                # Read back what landed and retype only the ranges that differ
+                self.ui.post("status", "Verifying typed text...")
+                wpm, use_variance = self.stream_settings
+                verification = self.verifier.run(engine, self.expected_text(), wpm, use_variance, CLASSIC_PROFILE)
+            self.ui.call(self.typing_complete, result, verification)
+            return
+        # Interrupted: remember the exact offset so the run can be resumed
+        self.ui.call(self.typing_interrupted, start + result.chars_typed)
+        if result.cancel_latency is not None:
+            self.ui.post("status", f"Typing cancelled (last keystroke {result.cancel_latency * 1000:.2f} ms after cancel)")
     
-    def typing_complete(self):
+    def show_progress(self, chars_typed, total_chars):
+        """Show typing progress (main thread, rate-limited by the UI pump)"""
+        if not self.typing_active:
+            return
+        if self.edit_plan is None:
+            self.recorder.update(chars_typed)
+        progress = min(100, int((chars_typed / total_chars) * 100))
+        self.status_var.set(f"Typing: {progress}% complete ({chars_typed}/{total_chars} characters)")
+            
+    def expected_text(self):
+        """Everything the target should hold once this run is done"""
+        if self.typed_text is not None:
+            return self.typed_text
+        return ''.join(iter_file_chunks(self.source_path))
+        
+    def typing_complete(self, result=None, verification=None):
         """Called when typing is complete"""
         self.typing_active = False
-        self.status_var.set("Typing complete!")
+        self.stop_hotkeys()
+        self.last_typed_text = self.typed_text
+        clear_checkpoint()
+        self.checkpoint = None
+        self.update_resume_button()
+        status = "Typing complete!" if not self.backend.simulated else "Dry run complete, nothing was typed"
+        if result is not None:
+            status += f" ({result.summary()})"
+        if self.edit_plan is not None:
+            status += f" - {self.edit_plan.saved} keystrokes saved"
+        if verification is not None:
+            status += f" - {verification.summary()}"
+        self.status_var.set(status)
         self.timer_var.set("")
         self.start_button.config(state=tk.NORMAL)
+        self.pause_button.config(state=tk.DISABLED, text="Pause")
         self.cancel_button.config(state=tk.DISABLED)
+        self.backend_menu.config(state=tk.NORMAL)
+        self.file_button.config(state=tk.NORMAL)
+        self.calibrate_button.config(state=tk.NORMAL)
+    
+    def typing_failed(self, error):
+        """Reset the UI after typing stopped on an error, naming the backend it came from"""
+        self.cancel_typing()
+        self.status_var.set(f"Error: typing through the {self.backend.name} backend failed: {error}")
+    
+    def toggle_pause(self):
+        """Pause or resume the countdown or typing"""
+        if self.control.paused:
+            self.control.resume()
+            self.pause_button.config(text="Pause")
+            self.status_var.set("Typing resumed")
+        else:
+            self.control.pause()
+            self.pause_button.config(text="Resume")
+            self.status_var.set("Typing paused")
     
     def cancel_typing(self):
         """Cancel the typing process"""
         self.typing_active = False
+        self.stop_hotkeys()
+        if self.control is not None:
+            self.control.cancel()
         self.status_var.set("Typing cancelled")
         self.timer_var.set("")
         self.start_button.config(state=tk.NORMAL)
+        self.pause_button.config(state=tk.DISABLED, text="Pause")
         self.cancel_button.config(state=tk.DISABLED)
+        self.backend_menu.config(state=tk.NORMAL)
+        self.file_button.config(state=tk.NORMAL)
+        self.calibrate_button.config(state=tk.NORMAL)
 
 if __name__ == "__main__":
+    app = None
     try:
         # Create and run the application
         root = tk.Tk()
         app = TextTyperApp(root)
+        
+        # Optional document to type in large-document mode ("-" reads stdin)
+        if len(sys.argv) > 1:
+            app.open_file(spool_stdin() if sys.argv[1] == "-" else sys.argv[1])
         root.mainloop()
     except Exception as e:
         # Show error in a simple message box
         import tkinter.messagebox as messagebox
-        messagebox.showerror("Error", f"An error occurred: {str(e)}\n\nMake sure you have pyautogui installed.")
+        backend = app.backend_var.get() if app is not None else default_backend(available_backends())
+        messagebox.showerror("Error", f"An error occurred: {str(e)}\n\nTyping backend: {backend}")
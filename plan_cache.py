@@ -0,0 +1,154 @@
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+
+from keymap import DEFAULT_LAYOUT
+from schedule import TypingSchedule, compile_schedule
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".ultra_typer", "plans")
+MAX_CACHE_BYTES = 64 << 20
+PLAN_SUFFIX = '.plan'
+
+# A 16-byte header, the count + 1 float64 offsets, then the text as UTF-8,
+# so the offsets sit at an 8-byte boundary of the mapped file
+MAGIC = b'UTPL'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')  # magic, version, reserved, keys, text bytes
+
+
+class PlanCache:
+    """Compiled typing schedules kept on disk, so a repeated snippet starts without compiling
+
+    Entries are keyed by a hash of the text, the settings, the profile's
+    timing rules and the keyboard layout. Each is a file that is mapped
+    and copied into the schedule's offsets in one go. A hit refreshes the
+    entry's modification time; once the cache grows past max_bytes, the
+    least recently used entries are deleted. Errors reading or writing
+    the cache are never fatal: the schedule is compiled as if it missed.
+
+    A plan compiled with variance is cached like any other, so repeats
+    of a snippet also repeat its rhythm until the entry is evicted.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, layout=DEFAULT_LAYOUT):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.layout = layout  # of the backend the plans are typed with
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text, wpm, use_variance, profile):
+        digest = hashlib.sha256()
+        rules = (VERSION, self.layout, wpm, bool(use_variance), profile.name, profile.variance,
+                 profile.punctuation, profile.punctuation_pause, profile.min_delay, profile.bigrams)
+        digest.update(repr(rules).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + PLAN_SUFFIX)
+
+    def get(self, text, wpm, use_variance, profile):
+        """The cached schedule for text and settings, None on a miss"""
+        settings = (wpm, bool(use_variance), profile.name)
+        schedule = self.load(self.path(self.key(text, wpm, use_variance, profile)), text, settings)
+        if schedule is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return schedule
+
+    def put(self, schedule, profile):
+        """Store a schedule compiled with profile, then evict down to the size cap
+
+        Returns False if it could not be written. A plan that is already
+        cached is left as it is.
+        """
+        wpm, use_variance, _ = schedule.settings
+        path = self.path(self.key(schedule.text, wpm, use_variance, profile))
+        if os.path.exists(path):
+            return True
+        encoded = schedule.text.encode('utf-8', 'surrogatepass')
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            partial_path = f"{path}.{os.getpid()}.tmp"
+            with open(partial_path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION, 0, len(schedule), len(encoded)))
+                f.write(array('d', schedule.offsets).tobytes())
+                f.write(encoded)
+            os.replace(partial_path, path)
+        except OSError:
+            return False
+        self.evict()
+        return True
+
+    def compile(self, text, wpm, use_variance, profile):
+        """compile_schedule() through the cache: load the plan, or compile and store it"""
+        schedule = self.get(text, wpm, use_variance, profile)
+        if schedule is None:
+            schedule = compile_schedule(text, wpm, use_variance, profile)
+            self.put(schedule, profile)
+        return schedule
+
+    def load(self, path, text, settings):
+        """The schedule stored at path, None if there is none or it does not hold text"""
+        try:
+            with open(path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    magic, version, _, count, text_size = HEADER.unpack_from(mapped)
+                    offsets_end = HEADER.size + (count + 1) * 8
+                    if magic != MAGIC or version != VERSION or len(mapped) != offsets_end + text_size:
+                        raise ValueError("damaged plan")
+                    offsets = array('d')
+                    offsets.frombytes(mapped[HEADER.size:offsets_end])
+                    stored = mapped[offsets_end:].decode('utf-8', 'surrogatepass')
+            # Marks the plan as recently used for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error):
+            self.discard(path)
+            return None
+        if stored != text:
+            return None
+        return TypingSchedule(text, offsets, settings)
+
+    def entries(self):
+        """(modification time, size, path) of every cached plan"""
+        try:
+            with os.scandir(self.directory) as scan:
+                return [(entry.stat().st_mtime_ns, entry.stat().st_size, entry.path)
+                        for entry in scan if entry.name.endswith(PLAN_SUFFIX)]
+        except OSError:
+            return []
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Delete the least recently used plans until the cache fits in max_bytes"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self.discard(path)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            self.discard(path)
+
+    def discard(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def summary(self):
+        entries = self.entries()
+        size = sum(size for _, size, _ in entries)
+        return f"{len(entries)} plans, {size / 1024:.0f} KiB of {self.max_bytes >> 20} MiB; {self.hits} hits, {self.misses} misses"
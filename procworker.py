@@ -0,0 +1,244 @@
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+
+from backends import BackendError, create_backend
+from control import RunControl
+from engine import TypingEngine
+from instrument import KeystrokeTrace
+
+# Shared progress block, in 8-byte float words: a sample counter, then a
+# ring of (characters typed, perf_counter) samples written by the worker
+COUNT = 0
+HEADER = 1
+RING_SLOTS = 256
+
+# Run modes a job can ask for
+SCHEDULE, INSTANT = 'schedule', 'instant'
+
+
+class ProgressRing:
+    """Single-writer progress samples in shared memory
+
+    The worker pushes one sample per injected batch; the GUI process reads
+    the newest one whenever it likes. Each word is written whole, and the
+    counter only after its slot, so a reader never sees a half-written
+    sample unless it falls RING_SLOTS samples behind.
+    """
+
+    SIZE = 8 * (HEADER + 2 * RING_SLOTS)
+
+    def __init__(self, shm):
+        self.words = shm.buf.cast('d')
+        self.count = 0
+
+    def reset(self):
+        self.count = 0
+        self.words[COUNT] = 0
+
+    def push(self, done, total=None):
+        slot = HEADER + 2 * (self.count % RING_SLOTS)
+        self.words[slot] = done
+        self.words[slot + 1] = time.perf_counter()
+        self.count += 1
+        self.words[COUNT] = self.count
+
+    def latest(self):
+        """(samples so far, characters typed, when) of the newest sample, or None"""
+        count = int(self.words[COUNT])
+        if not count:
+            return None
+        slot = HEADER + 2 * ((count - 1) % RING_SLOTS)
+        return count, int(self.words[slot]), self.words[slot + 1]
+
+    def release(self):
+        self.words.release()
+
+
+def _apply_commands(commands, state):
+    """Worker thread: forward pause, resume and cancel to the RunControl of the job they are for
+
+    Each command carries the number of its job. The control of a job exists
+    before the job arrives, so a command that overtakes a large schedule
+    still lands; one for a job that has already finished is dropped.
+    """
+    while True:
+        try:
+            number, command = commands.recv()
+        except EOFError:
+            number, command = None, 'exit'
+        current, control = state['job']
+        if command == 'exit':
+            control.cancel()
+            return
+        if number != current:
+            continue
+        if command == 'cancel':
+            control.cancel()
+        elif command == 'pause':
+            control.pause()
+        elif command == 'resume':
+            control.resume()
+
+
+def _worker_main(jobs, commands, shm_name, backend_name, backend_options, max_catchup):
+    """Entry point of the worker process: open the backend, then run jobs until told to stop"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = ProgressRing(shm)
+    backend = None
+    try:
+        try:
+            backend = create_backend(backend_name, **backend_options)
+            backend.open()
+        except BackendError as e:
+            jobs.send(('error', str(e)))
+            return
+        jobs.send(('ready', None))
+        # (number, control) of the job being received or run, replaced in one assignment
+        state = {'job': (1, RunControl())}
+        threading.Thread(target=_apply_commands, args=(commands, state), daemon=True).start()
+        while True:
+            try:
+                job = jobs.recv()
+            except EOFError:
+                return
+            if job is None:
+                return
+            mode, payload, start, trace_capacity = job
+            # A fresh trace is built here rather than pickled over empty
+            trace = KeystrokeTrace(trace_capacity) if trace_capacity else None
+            number, control = state['job']
+            ring.reset()
+            engine = TypingEngine(backend, control, max_catchup=max_catchup, trace=trace)
+            if mode == INSTANT:
+                result = engine.run_instant(payload, ring.push, start)
+            else:
+                result = engine.run(payload, start, ring.push)
+            state['job'] = (number + 1, RunControl())
+            jobs.send(('result', (result, control.last_keystroke, trace)))
+    finally:
+        if backend is not None:
+            backend.close()
+        ring.release()
+        shm.close()
+
+
+class ProcessEngine:
+    """Runs typing in a dedicated worker process, so Tk's GIL use cannot delay keystrokes
+
+    Offers the run() and run_instant() calls of TypingEngine. The worker
+    opens its own backend by name, gets the compiled schedule in one
+    message, and reports progress through a shared-memory ProgressRing.
+    Pause and cancel on control are forwarded to it while a run is going.
+    Start the worker early (e.g. during the countdown): spawning a
+    process takes far longer than a keystroke.
+    """
+
+    def __init__(self, backend_name, control=None, backend_options=None, max_catchup=0.05, trace=None,
+                 poll_interval=0.005):
+        self.backend_name = backend_name
+        self.backend_options = backend_options or {}
+        self.control = control or RunControl()
+        self.max_catchup = max_catchup
+        # Replaced after every run by the worker's filled-in trace of the same capacity
+        self.trace = trace
+        self.poll_interval = poll_interval
+        self.process = None
+        self.shm = None
+        self.ring = None
+        self.job_number = 0  # of the last job sent; commands carry it
+        self.startup_time = None  # seconds to spawn the worker and open its backend
+
+    def start(self, timeout=30.0):
+        """Spawn the worker and wait until its backend is open; raises BackendError"""
+        started = time.perf_counter()
+        # Spawn, not fork: forking a process that runs Tk and X connections is unsafe
+        context = multiprocessing.get_context('spawn')
+        self.shm = shared_memory.SharedMemory(create=True, size=ProgressRing.SIZE)
+        self.ring = ProgressRing(self.shm)
+        self.jobs, worker_jobs = context.Pipe()
+        worker_commands, self.commands = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=_worker_main,
+            args=(worker_jobs, worker_commands, self.shm.name, self.backend_name, self.backend_options,
+                  self.max_catchup),
+            daemon=True,
+        )
+        self.process.start()
+        # Only the worker holds its ends now, so its exit shows up here as EOF
+        worker_jobs.close()
+        worker_commands.close()
+        try:
+            if self.jobs.poll(timeout):
+                kind, error = self.jobs.recv()
+            else:
+                kind, error = 'error', "Typing worker did not start"
+        except (EOFError, OSError):
+            kind, error = 'error', "Typing worker exited during startup"
+        if kind == 'error':
+            self.close()
+            raise BackendError(error)
+        self.startup_time = time.perf_counter() - started
+
+    def close(self):
+        """Stop the worker and free the shared memory"""
+        if self.process is not None:
+            try:
+                self.jobs.send(None)
+                self.commands.send((None, 'exit'))
+            except (OSError, ValueError):
+                pass
+            self.process.join(2.0)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process = None
+            self.jobs.close()
+            self.commands.close()
+        if self.shm is not None:
+            self.ring.release()
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def run(self, schedule, start_index=0, on_progress=None):
+        return self._run(SCHEDULE, schedule, start_index, len(schedule), on_progress)
+
+    def run_instant(self, text, on_progress=None, start_index=0):
+        return self._run(INSTANT, text, start_index, len(text), on_progress)
+
+    def _run(self, mode, payload, start, total, on_progress):
+        control = self.control
+        self.ring.reset()
+        self.job_number += 1
+        number = self.job_number
+        self.jobs.send((mode, payload, start, self.trace.capacity if self.trace is not None else None))
+        cancelled = paused = False
+        seen = 0
+        while not self.jobs.poll(self.poll_interval):
+            if not self.process.is_alive():
+                raise BackendError("Typing worker exited during the run")
+            if control.cancelled and not cancelled:
+                self.commands.send((number, 'cancel'))
+                cancelled = True
+            if control.paused != paused:
+                paused = control.paused
+                self.commands.send((number, 'pause' if paused else 'resume'))
+            latest = self.ring.latest()
+            if on_progress is not None and latest is not None and latest[0] != seen:
+                seen = latest[0]
+                on_progress(latest[1], total)
+
+        try:
+            _, (result, last_keystroke, trace) = self.jobs.recv()
+        except EOFError:
+            raise BackendError("Typing worker exited during the run") from None
+        if self.trace is not None:
+            self.trace = trace
+        # perf_counter is system-wide, so the worker's timestamps line up with ours
+        control.last_keystroke = last_keystroke
+        if control.cancelled:
+            result.cancel_latency = control.cancel_latency
+        if on_progress is not None and result.chars_typed:
+            on_progress(start + result.chars_typed, total)
+        return result
@@ -0,0 +1,42 @@
+import json
+import os
+import time
+
+PROFILES_PATH = os.path.join(os.path.expanduser("~"), ".ultra_typer", "profiles.json")
+LOCAL_SINK = "local-sink"  # target name of calibrations against sink.TextSink
+
+
+def profile_key(backend, target=LOCAL_SINK):
+    return f"{target}/{backend}"
+
+
+def load_profiles(path=PROFILES_PATH):
+    """Saved target profiles by profile_key(), {} if there are none"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            profiles = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return profiles if isinstance(profiles, dict) else {}
+
+
+def save_profile(backend, wpm, target=LOCAL_SINK, path=PROFILES_PATH, **details):
+    """Record the highest loss-free WPM measured for a backend and target"""
+    profiles = load_profiles(path)
+    profiles[profile_key(backend, target)] = dict(details, wpm=wpm, calibrated=time.time())
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial_path = path + '.tmp'
+    with open(partial_path, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, indent=2)
+    os.replace(partial_path, path)
+
+
+def calibrated_wpm(backend, target=LOCAL_SINK, path=PROFILES_PATH):
+    """Calibrated WPM for a backend and target, or None if it was never calibrated"""
+    profile = load_profiles(path).get(profile_key(backend, target))
+    if not isinstance(profile, dict):
+        return None
+    try:
+        return int(profile['wpm'])
+    except (KeyError, TypeError, ValueError):
+        return None
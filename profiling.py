@@ -0,0 +1,118 @@
+import cProfile
+import os
+import pstats
+
+# Which part of the app a source file belongs to
+SUBSYSTEM_MODULES = {
+    'scheduling': ('engine', 'control', 'schedule', 'sources', 'incremental', 'whitespace', 'checkpoint',
+                   'instrument', 'aio_engine'),
+    'injection': ('backends', 'keymap', 'pyautogui', 'pyscreeze', 'pymsgbox', 'pytweening', 'Xlib', 'evdev'),
+    'ui': ('uipump', 'main', 'Improved', 'tkinter', 'sink'),
+}
+SUBSYSTEMS = ('scheduling', 'injection', 'ui', 'waiting', 'other')
+
+# Builtins that block rather than work
+WAITING_BUILTINS = ('time.sleep', "'acquire' of '_thread.lock'", "'acquire' of '_thread.RLock'")
+
+
+def module_subsystem(filename):
+    """Subsystem of a source file, from its module or top-level package name"""
+    parts = os.path.normpath(filename).split(os.sep)
+    for part in reversed(parts):
+        name = os.path.splitext(part)[0]
+        for subsystem, modules in SUBSYSTEM_MODULES.items():
+            if name in modules:
+                return subsystem
+    return 'other'
+
+
+class RunProfiler:
+    """cProfile profilers for the threads of one typing run, merged into one report
+
+    cProfile only sees the thread that enabled it, so the typing worker and
+    the Tk main thread each start their own under a label. Nothing is
+    profiled, and nothing is imported into the GUIs, unless profiling is on.
+    """
+
+    def __init__(self):
+        self.profiles = {}  # label -> cProfile.Profile
+
+    def start(self, label):
+        """Start profiling the calling thread"""
+        profile = self.profiles[label] = cProfile.Profile()
+        profile.enable()
+
+    def stop(self, label):
+        """Stop profiling the calling thread"""
+        self.profiles[label].disable()
+
+    def stats(self):
+        stats = None
+        for profile in self.profiles.values():
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        return stats
+
+    def report(self, limit=5):
+        return ProfileReport(self.stats(), limit)
+
+
+class ProfileReport:
+    """Self time per subsystem and each subsystem's hottest functions"""
+
+    def __init__(self, stats, limit=5):
+        self.stats = stats
+        self.totals = dict.fromkeys(SUBSYSTEMS, 0.0)
+        functions = {subsystem: [] for subsystem in SUBSYSTEMS}
+        entries = stats.stats if stats is not None else {}
+        for function, (_, calls, self_time, _, callers) in entries.items():
+            subsystem = self.subsystem(function, callers)
+            self.totals[subsystem] += self_time
+            functions[subsystem].append((self_time, calls, pstats.func_std_string(function)))
+        self.hottest = {subsystem: sorted(found, reverse=True)[:limit] for subsystem, found in functions.items()}
+
+    @staticmethod
+    def subsystem(function, callers):
+        filename, _, name = function
+        if filename != '~':
+            return module_subsystem(filename)
+        # Builtins belong to whoever called them most, unless they only wait
+        if any(waiting in name for waiting in WAITING_BUILTINS):
+            return 'waiting'
+        if not callers:
+            return 'other'
+        caller = max(callers, key=lambda caller: callers[caller][2])
+        return module_subsystem(caller[0]) if caller[0] != '~' else 'other'
+
+    def summary(self):
+        """One line for the status section: where the busy (non-waiting) time went"""
+        busy = sum(total for subsystem, total in self.totals.items() if subsystem != 'waiting')
+        if not busy:
+            return "Profile: nothing recorded"
+        shares = ', '.join(f"{subsystem} {self.totals[subsystem] / busy:.0%}"
+                           for subsystem in SUBSYSTEMS if subsystem != 'waiting' and self.totals[subsystem])
+        return f"Profile: {shares} of {busy * 1000:.0f} ms busy ({self.totals['waiting']:.2f}s waiting)"
+
+    def text(self):
+        lines = [self.summary(), ""]
+        for subsystem in SUBSYSTEMS:
+            lines.append(f"{subsystem}: {self.totals[subsystem] * 1000:.1f} ms self time")
+            for self_time, calls, name in self.hottest[subsystem]:
+                lines.append(f"  {self_time * 1000:10.2f} ms {calls:9d} calls  {name}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, stem):
+        """Write stem.prof (for pstats, snakeviz...) and the grouped stem.profile.txt; returns both paths"""
+        prof_path = stem + '.prof'
+        text_path = stem + '.profile.txt'
+        self.stats.dump_stats(prof_path)
+        with open(text_path, 'w', encoding='utf-8') as f:
+            f.write(self.text())
+        return prof_path, text_path
+
+
+def profile_stem(report_path):
+    """Path prefix for profile files saved next to a run report"""
+    return os.path.splitext(report_path)[0]
@@ -0,0 +1,100 @@
+import operator
+import random
+from array import array
+from itertools import accumulate, repeat
+
+
+class TypingProfile:
+    """Timing rules that turn a WPM setting into per-character delays"""
+
+    def __init__(self, name, variance, punctuation, punctuation_pause, min_delay=0.0, bigrams=False):
+        self.name = name
+        self.variance = variance  # +/- fraction applied when human variance is on
+        self.punctuation = punctuation
+        self.punctuation_pause = punctuation_pause
+        self.min_delay = min_delay
+        # Take variance from the bigram timing model (timing_model.py) instead of uniform
+        # noise and punctuation pauses; it keeps the WPM and scales its spread by variance
+        self.bigrams = bigrams
+
+    def base_delay(self, wpm):
+        """Seconds per character for a words-per-minute setting"""
+        # Average word is ~5 characters, so chars per minute = WPM * 5
+        return 60.0 / (wpm * 5)
+
+
+# Timing rules of TextTyperApp (main.py) and ModernTextTyperApp (Improved.py)
+CLASSIC_PROFILE = TypingProfile("classic", 0.2, ".,!?;:\n", 1.5, bigrams=True)
+MODERN_PROFILE = TypingProfile("modern", 0.1, ".\n", 1.2, min_delay=0.001, bigrams=True)
+PROFILES = {profile.name: profile for profile in (CLASSIC_PROFILE, MODERN_PROFILE)}
+
+
+class TypingSchedule:
+    """A compiled typing plan: the keys to send and the offset of every keystroke"""
+
+    def __init__(self, text, offsets, settings):
+        self.text = text
+        # offsets[i] is when text[i] is typed; offsets[-1] is when the run ends
+        self.offsets = offsets
+        self.settings = settings
+
+    def __len__(self):
+        return len(self.text)
+
+    @property
+    def duration(self):
+        """Estimated seconds from the first keystroke to the end of the run"""
+        return self.offsets[-1] - self.offsets[0]
+
+    def matches(self, text, settings):
+        """Whether this schedule can be reused for text typed with settings"""
+        return self.settings == settings and self.text == text
+
+
+def compile_schedule(text, wpm, use_variance, profile=CLASSIC_PROFILE, seed=None, start=0.0):
+    """Compile text and typing settings into a TypingSchedule"""
+    settings = (wpm, bool(use_variance), profile.name)
+    count = len(text)
+    base_delay = profile.base_delay(wpm)
+
+    if use_variance and profile.bigrams:
+        # Imported here: the model is only built the first time variance is used
+        from timing_model import MODEL_VARIANCE, default_model
+        delays = default_model().delays(text, base_delay, profile.variance / MODEL_VARIANCE, random.Random(seed))
+    elif use_variance:
+        # Build the per-character delays as a pipeline of C-level map() calls
+        rng = random.Random(seed)
+        low, high = 1 - profile.variance, 1 + profile.variance
+        noise = map(rng.uniform, repeat(low, count), repeat(high, count))
+        pauses = dict.fromkeys(profile.punctuation, base_delay * profile.punctuation_pause)
+        delays = map(operator.mul, noise, map(pauses.get, text, repeat(base_delay)))
+    else:
+        delays = repeat(base_delay, count)
+    if profile.min_delay:
+        delays = map(max, delays, repeat(profile.min_delay))
+
+    offsets = array('d', accumulate(delays, initial=start))
+    return TypingSchedule(text, offsets, settings)
+
+
+def compile_stream(chunks, wpm, use_variance, profile=CLASSIC_PROFILE, seed=None):
+    """Lazily compile text chunks into schedules that continue one another's timeline"""
+    rng = random.Random(seed)
+    start = 0.0
+    for chunk in chunks:
+        schedule = compile_schedule(chunk, wpm, use_variance, profile, rng.random(), start)
+        start = schedule.offsets[-1]
+        yield schedule
+
+
+def estimate_duration(char_count, wpm, profile=CLASSIC_PROFILE):
+    """Rough typing time for char_count characters without compiling a schedule"""
+    return char_count * max(profile.base_delay(wpm), profile.min_delay)
+
+
+def format_duration(seconds):
+    """Short human readable duration such as '1m 05.2s'"""
+    minutes, seconds = divmod(seconds, 60)
+    if minutes:
+        return f"{int(minutes)}m {seconds:04.1f}s"
+    return f"{seconds:.1f}s"
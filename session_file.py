@@ -0,0 +1,359 @@
+import argparse
+import mmap
+import operator
+import os
+import struct
+import sys
+import time
+from array import array
+from itertools import repeat
+
+from backends import InjectionBackend
+from schedule import TypingSchedule, format_duration
+
+# An 8-byte header, then one little-endian uint64 per key:
+# (microseconds since the first key << CODE_BITS) | code point
+MAGIC = b'UTKS'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')  # magic, version, reserved
+CODE_BITS = 21  # enough for every Unicode code point
+CODE_MASK = (1 << CODE_BITS) - 1
+MAX_MICROSECONDS = (1 << (64 - CODE_BITS)) - 1  # about 100 days
+SWAP_BYTES = sys.byteorder != 'little'
+
+# Records buffered before a write, and keys per schedule when replaying
+BLOCK_RECORDS = 8192
+CHUNK_KEYS = 4096
+
+SESSION_DIR = os.path.join(os.path.expanduser('~'), '.ultra_typer', 'sessions')
+SESSION_SUFFIX = '.utks'
+
+
+class SessionError(ValueError):
+    """Raised when a session file cannot be read or written"""
+
+
+def is_session_file(path):
+    """Whether path starts with a session file header"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def new_session_path(directory=SESSION_DIR):
+    """A fresh timestamped file name in directory for a recorded run"""
+    return os.path.join(directory, time.strftime('%Y%m%d-%H%M%S') + SESSION_SUFFIX)
+
+
+class SessionWriter:
+    """Appends keys and their times to a session file, a block of packed records at a time
+
+    Keys are packed straight into an array('Q') buffer, so recording
+    creates no Python object per key and memory stays at one block
+    however long the session runs.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.buffer = array('Q')
+        self.count = 0  # records already written
+        self.origin = None  # time of the first key, in seconds
+        self.last = 0  # microseconds of the last key; times never go backwards
+
+    def __len__(self):
+        return self.count + len(self.buffer)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0))
+
+    def add(self, text, when):
+        """Record every character of text as typed at when seconds, on any clock"""
+        if not text:
+            return
+        if self.origin is None:
+            self.origin = when
+        stamp = max(self.last, round((when - self.origin) * 1e6))
+        if stamp > MAX_MICROSECONDS:
+            raise SessionError("session is too long to record")
+        self.last = stamp
+        self.buffer.extend(map(operator.or_, repeat(stamp << CODE_BITS, len(text)), map(ord, text)))
+        if len(self.buffer) >= BLOCK_RECORDS:
+            self.flush()
+
+    def undo(self):
+        """Take back the last key if it is still buffered; returns False if it was written"""
+        if not self.buffer:
+            return False
+        self.buffer.pop()
+        return True
+
+    def flush(self):
+        if not self.buffer:
+            return
+        if SWAP_BYTES:
+            self.buffer.byteswap()
+        self.buffer.tofile(self.file)
+        self.count += len(self.buffer)
+        self.buffer = array('Q')
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+class SessionReader:
+    """A recorded session, memory-mapped and decoded a chunk of keys at a time
+
+    Nothing is read up front: the records are a uint64 view of the map,
+    and schedules() and chunks() build one chunk's text and offsets at a
+    time, so replaying an hours-long session takes as little memory as a
+    short one. A record cut short by a crash while recording is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise SessionError(f"{path} is not a session file")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _ = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            self.map.close()
+            raise SessionError(f"{path} is not a session file")
+        if version != VERSION:
+            self.map.close()
+            raise SessionError(f"{path} is a version {version} session; this reader knows version {VERSION}")
+        count = (size - HEADER.size) // 8
+        self.bytes = memoryview(self.map)[HEADER.size:HEADER.size + count * 8]
+        self.records = self.bytes.cast('Q')
+
+    def __len__(self):
+        return len(self.records)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.map.closed:
+            return
+        # The views must go before the map they point into
+        self.records.release()
+        self.bytes.release()
+        self.map.close()
+
+    def words(self, start, end):
+        """Records start to end, in this machine's byte order"""
+        if not SWAP_BYTES:
+            return self.records[start:end]
+        words = array('Q', self.records[start:end])
+        words.byteswap()
+        return words
+
+    def microseconds(self, index):
+        return self.words(index, index + 1)[0] >> CODE_BITS
+
+    @property
+    def duration(self):
+        """Seconds from the first key to the last"""
+        if not len(self):
+            return 0.0
+        return self.microseconds(len(self) - 1) * 1e-6
+
+    @property
+    def wpm(self):
+        """Typing speed of the recording from its gaps, None if it has no duration"""
+        return (len(self) - 1) * 12 / self.duration if self.duration else None
+
+    def chunks(self, start=0, chunk_keys=CHUNK_KEYS):
+        """Text of the keys from start on, chunk_keys at a time"""
+        for index in range(start, len(self), chunk_keys):
+            words = self.words(index, index + chunk_keys)
+            yield ''.join(map(chr, map(operator.and_, words, repeat(CODE_MASK))))
+
+    def text(self):
+        return ''.join(self.chunks())
+
+    def schedules(self, wpm=None, start=0, chunk_keys=CHUNK_KEYS):
+        """Replay schedules for TypingEngine.run_stream, from key start on
+
+        With wpm None every gap is kept as recorded; otherwise all of them
+        are scaled by the same factor, so the rhythm stays and the average
+        speed becomes wpm.
+        """
+        scale = 1e-6
+        if wpm is not None and self.wpm is not None:
+            scale *= self.wpm / wpm
+        total = len(self)
+        if start >= total:
+            return
+        origin = self.microseconds(start)
+        # Like a compiled schedule, the run ends one average gap after the last key
+        last = self.microseconds(total - 1)
+        finish = last + last / (total - 1) if total > 1 else last
+        settings = ('replay', self.path, wpm)
+        for index in range(start, total, chunk_keys):
+            end = min(total, index + chunk_keys)
+            words = self.words(index, end)
+            text = ''.join(map(chr, map(operator.and_, words, repeat(CODE_MASK))))
+            stamps = map(operator.rshift, words, repeat(CODE_BITS))
+            offsets = array('d', map(operator.mul, map(operator.sub, stamps, repeat(origin)), repeat(scale)))
+            # The chunk ends where the next one starts
+            offsets.append(((self.microseconds(end) if end < total else finish) - origin) * scale)
+            yield TypingSchedule(text, offsets, settings)
+
+    def timing(self):
+        """(text, times in seconds) of the whole session, as timing_model.learn() takes it"""
+        words = self.words(0, len(self))
+        times = [stamp * 1e-6 for stamp in map(operator.rshift, words, repeat(CODE_BITS))]
+        return self.text(), times
+
+    def summary(self):
+        speed = f"{self.wpm:.0f} WPM" if self.wpm is not None else "no timing"
+        return f"{len(self)} keys in {format_duration(self.duration)} ({speed})"
+
+
+class SessionCapture(InjectionBackend):
+    """Types through backend and records the text written through it into a session file
+
+    Wraps an already open backend and leaves it open: open() and close()
+    only start and finish the recording. Named keys and chords pass
+    through unrecorded, so a replay types the text, not the edits.
+    """
+    name = "session"
+
+    def __init__(self, backend, writer, clock=time.perf_counter):
+        self.backend = backend
+        self.writer = writer
+        self.clock = clock
+        self.keymap = backend.keymap
+        self.per_event_cost = backend.per_event_cost
+        self.is_open = False
+
+    def open(self):
+        self.writer.open()
+        self.is_open = True
+
+    def close(self):
+        self.writer.close()
+        self.is_open = False
+
+    def write(self, text):
+        self.backend.write(text)
+        self.writer.add(text, self.clock())
+
+    def send(self, events):
+        self.backend.send(events)
+
+    def press(self, key, count=1):
+        self.backend.press(key, count)
+
+    def hotkey(self, *keys):
+        self.backend.hotkey(*keys)
+
+    def probe(self):
+        self.backend.probe()
+
+
+def capture_keys(title, prompt, add, undo, save=None):
+    """Show a Tk window and report the keys a person types into it, until it is closed
+
+    add(char, seconds) gets every printable key, Tab and Return (as '\\n')
+    with the time of its key event; undo() is called for BackSpace. With
+    save, Ctrl+S calls save() and empties the window for the next session;
+    a message save() returns becomes the window title. Closing the window
+    calls save() once more.
+    """
+    # Imported here: recording a person is the only part that needs a display
+    import tkinter as tk
+    root = tk.Tk()
+    root.title(title)
+    label = tk.Label(root, text=prompt)
+    label.pack(padx=10, pady=5)
+    box = tk.Text(root, width=80, height=20, wrap=tk.WORD)
+    box.pack(padx=10, pady=(0, 10))
+    box.focus_set()
+
+    def on_key(event):
+        if event.keysym == 'BackSpace':
+            undo()
+        elif event.char == '\r':
+            add('\n', event.time / 1000)
+        elif event.char and (event.char.isprintable() or event.char == '\t'):
+            add(event.char, event.time / 1000)
+
+    def next_session(event=None):
+        message = save()
+        if message:
+            root.title(message)
+        box.delete('1.0', tk.END)
+        return 'break'
+
+    def close():
+        if save is not None:
+            save()
+        root.destroy()
+
+    box.bind('<KeyPress>', on_key)
+    if save is not None:
+        box.bind('<Control-s>', next_session)
+    root.protocol('WM_DELETE_WINDOW', close)
+    root.mainloop()
+
+
+def record(path):
+    """Record one session of your own typing in a Tk window; closing the window saves it"""
+    # Keys already written when BackSpace is pressed stay in the session
+    with SessionWriter(path) as writer:
+        capture_keys(f"Session recorder - {os.path.basename(path)}",
+                     "Type the way you normally do. Close the window to save the session.",
+                     writer.add, writer.undo)
+    return len(writer)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record typing sessions and inspect session files")
+    commands = parser.add_subparsers(dest='command', required=True)
+    recorder = commands.add_parser('record', help="record your own typing in a local window (needs a display)")
+    recorder.add_argument('session', nargs='?', help=f"file to write (default: a new file in {SESSION_DIR})")
+    info = commands.add_parser('info', help="show the length and speed of session files")
+    info.add_argument('sessions', nargs='+')
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        path = args.session or new_session_path()
+        keys = record(path)
+        print(f"Recorded {keys} keys to {path}; replay with: python cli.py --replay {path}")
+        return 0
+    status = 0
+    for path in args.sessions:
+        try:
+            with SessionReader(path) as session:
+                print(f"{path}: {session.summary()}")
+        except (OSError, SessionError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import argparse
+import random
+import sys
+import threading
+import tkinter as tk
+
+from backends import BackendError, available_backends, create_backend
+from control import RunControl
+from engine import TypingEngine
+from schedule import MODERN_PROFILE, compile_schedule
+from uipump import UIUpdatePump
+from verify import Verifier
+
+
+class TextSink:
+    """A local Tk text window that receives typed keystrokes, for verification and calibration"""
+
+    def __init__(self, root, title="Typing sink"):
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.window.geometry("500x300")
+        self.text_widget = tk.Text(self.window, wrap=tk.NONE, undo=False)
+        self.text_widget.pack(fill=tk.BOTH, expand=True)
+
+    def focus(self):
+        """Raise the sink and give it keyboard focus (main thread)"""
+        self.window.deiconify()
+        self.window.lift()
+        self.window.focus_force()
+        self.text_widget.focus_set()
+
+    def text(self):
+        """Everything typed into the sink so far (main thread)"""
+        return self.text_widget.get("1.0", "end-1c")
+
+    def clear(self):
+        self.text_widget.delete("1.0", tk.END)
+
+    def close(self):
+        self.window.destroy()
+
+
+def read_tk_clipboard(root):
+    """Clipboard contents via Tk, or None if it is empty or not text (main thread)"""
+    try:
+        return root.clipboard_get()
+    except tk.TclError:
+        return None
+
+
+class DroppingBackend:
+    """Wraps a backend and silently drops a fraction of typed characters, like an overloaded target"""
+
+    def __init__(self, backend, rate, seed=None):
+        self.backend = backend
+        self.rate = rate
+        self.random = random.Random(seed).random
+
+    def write(self, text):
+        kept = ''.join(char for char in text if self.random() >= self.rate)
+        if kept:
+            self.backend.write(kept)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+SAMPLE = ("The quick brown fox jumps over the lazy dog; pack my box with five dozen liquor jugs.\n"
+          "Sphinx of black quartz, judge my vow! 0123456789 (a+b)*[c/d]={e-f}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Type into a local Tk text window, then verify and repair it via the clipboard "
+                    "(needs a display, e.g. run under xvfb-run)")
+    parser.add_argument('-b', '--backend', choices=available_backends(), default='xtest')
+    parser.add_argument('-w', '--wpm', type=int, default=3000)
+    parser.add_argument('-n', '--repeat', type=int, default=5, help="copies of the sample text to type")
+    parser.add_argument('--drop', type=float, default=0.0,
+                        help="fraction of characters to drop on purpose, to exercise the repair")
+    args = parser.parse_args(argv)
+
+    root = tk.Tk()
+    root.withdraw()
+    sink = TextSink(root)
+    ui = UIUpdatePump(root)
+    ui.start()
+    backend = create_backend(args.backend)
+    try:
+        backend.open()
+    except BackendError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    if args.drop:
+        backend = DroppingBackend(backend, args.drop)
+    expected = SAMPLE * args.repeat
+    outcome = {}
+
+    def worker():
+        engine = TypingEngine(backend, RunControl())
+        schedule = compile_schedule(expected, args.wpm, False, MODERN_PROFILE)
+        outcome['typing'] = engine.run(schedule)
+        verifier = Verifier(lambda: ui.call_sync(read_tk_clipboard, root))
+        outcome['verify'] = verifier.run(engine, expected, args.wpm, False, MODERN_PROFILE)
+        outcome['landed'] = ui.call_sync(sink.text)
+        ui.call(root.quit)
+
+    sink.focus()
+    root.after(500, threading.Thread(target=worker, daemon=True).start)
+    root.mainloop()
+    backend.close()
+
+    print(f"typed {len(expected)} characters ({outcome['typing'].summary()})")
+    print(f"verification: {outcome['verify'].summary()}")
+    return 0 if outcome['landed'] == expected else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
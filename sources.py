@@ -0,0 +1,83 @@
+import codecs
+import io
+import mmap
+import os
+import sys
+
+CHUNK_SIZE = 16384
+
+
+def text_decoder(encoding='utf-8'):
+    """Incremental decoder that also turns \r\n and \r into \n across chunk boundaries"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    return io.IncrementalNewlineDecoder(decoder, translate=True)
+
+
+def iter_file_chunks(path, chunk_size=CHUNK_SIZE, encoding='utf-8'):
+    """Yield decoded text from a memory-mapped file, chunk_size bytes at a time"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            decoder = text_decoder(encoding)
+            for start in range(0, len(mapped), chunk_size):
+                text = decoder.decode(mapped[start:start + chunk_size])
+                if text:
+                    yield text
+            text = decoder.decode(b'', final=True)
+            if text:
+                yield text
+
+
+def iter_stream_chunks(stream, chunk_size=CHUNK_SIZE):
+    """Yield text chunks from an already open text stream such as sys.stdin"""
+    while True:
+        text = stream.read(chunk_size)
+        if not text:
+            return
+        yield text
+
+
+def rstrip_chunks(chunks, chars='\n'):
+    """Drop trailing chars from the end of a chunk stream, like str.rstrip"""
+    held = ''
+    for chunk in chunks:
+        stripped = chunk.rstrip(chars)
+        if stripped:
+            yield held + stripped
+            held = chunk[len(stripped):]
+        else:
+            held += chunk
+
+
+def skip_chars(chunks, count):
+    """Drop the first count characters of a chunk stream, e.g. when resuming a run"""
+    chunks = iter(chunks)
+    for chunk in chunks:
+        if count < len(chunk):
+            yield chunk[count:]
+            yield from chunks
+            return
+        count -= len(chunk)
+
+
+def count_chars(chunks):
+    """Total length of a chunk stream, e.g. the characters a document will type"""
+    return sum(map(len, chunks))
+
+
+def read_preview(path, limit=2000, encoding='utf-8'):
+    """First limit characters of a file, for display only"""
+    with open(path, encoding=encoding, errors='replace') as f:
+        return f.read(limit)
+
+
+def spool_stdin(chunk_size=CHUNK_SIZE):
+    """Copy stdin to a temporary file so it can be memory-mapped and typed more than once"""
+    # Imported here: shutil and tempfile are slow to import and rarely needed
+    import shutil
+    import tempfile
+    spool = tempfile.NamedTemporaryFile(prefix='typer-stdin-', suffix='.txt', delete=False)
+    with spool:
+        shutil.copyfileobj(sys.stdin.buffer, spool, chunk_size)
+    return spool.name
@@ -0,0 +1,329 @@
+import argparse
+import json
+import math
+import operator
+import os
+import random
+import statistics
+import sys
+from array import array
+from itertools import cycle, islice, repeat
+
+from plan_cache import PlanCache
+from session_file import SessionReader, capture_keys, is_session_file
+
+# Learned model, used instead of the built-in one once it exists
+MODEL_PATH = os.path.join(os.path.expanduser('~'), '.ultra_typer', 'timing_model.json')
+
+# Character classes: 0 for anything else (and the start of the text),
+# 1-95 for printable ASCII, then newline and tab
+OTHER = 0
+CLASS_COUNT = 98
+NEWLINE_CLASS = 96
+TAB_CLASS = 97
+
+# Pre-sampled standard normal noise, clipped so no delay comes out negative
+NOISE_SAMPLES = 8191
+NOISE_CLIP = 2.5
+# Shortest relative delay noise may produce; spreads are capped to keep above it
+DELAY_FLOOR = 0.2
+# Keystroke gaps longer than this in a recording are thinking, not typing
+MAX_GAP = 2.0
+# A profile variance of this much applies a model's spread as measured
+MODEL_VARIANCE = 0.2
+
+# US keyboard rows, unshifted and shifted, and the finger (1-5 from the thumb) of every column
+KEY_ROWS = (
+    ("`1234567890-=", "~!@#$%^&*()_+", "5543222234555"),
+    ("qwertyuiop[]\\", "QWERTYUIOP{}|", "5432222345555"),
+    ("asdfghjkl;'", "ASDFGHJKL:\"", "54322223455"),
+    ("zxcvbnm,./", "ZXCVBNM<>?", "5432222345"),
+)
+
+
+def char_class(char):
+    if char == '\n':
+        return NEWLINE_CLASS
+    if char == '\t':
+        return TAB_CLASS
+    code = ord(char)
+    return code - 31 if 32 <= code <= 126 else OTHER
+
+
+class _ClassTable(dict):
+    """str.translate() table: every character to the chr() of its class"""
+
+    def __missing__(self, code):
+        return '\x00'
+
+
+CLASS_TABLE = _ClassTable({code: chr(char_class(chr(code))) for code in range(32, 127)})
+CLASS_TABLE[ord('\n')] = chr(NEWLINE_CLASS)
+CLASS_TABLE[ord('\t')] = chr(TAB_CLASS)
+
+
+def pair_indexes(text):
+    """Index into a CLASS_COUNT x CLASS_COUNT table of every (previous, current) character pair"""
+    codes = text.translate(CLASS_TABLE).encode('latin-1')
+    previous = bytes((OTHER,)) + codes[:-1]
+    return array('H', map(operator.add, map(operator.mul, previous, repeat(CLASS_COUNT)), codes))
+
+
+class BigramModel:
+    """Mean and spread of the gap before each character, by the character before it
+
+    Both are relative to the average gap, so one model serves every speed.
+    Compiling a text is a few C-level map() passes: two table reads per
+    character plus a read of a noise buffer sampled when the model is built.
+    """
+
+    def __init__(self, name, means, spreads, seed=0):
+        self.name = name
+        self.means = array('d', means)
+        self.spreads = array('d', spreads)
+        rng = random.Random(seed)
+        self.noise = array('d', (max(-NOISE_CLIP, min(NOISE_CLIP, rng.gauss(0.0, 1.0)))
+                                 for _ in range(NOISE_SAMPLES)))
+        self.scaled = {}  # spread scale -> spreads for it
+
+    def spreads_for(self, scale):
+        """Spreads multiplied by scale, capped so that clipped noise never goes below DELAY_FLOOR"""
+        if scale not in self.scaled:
+            self.scaled[scale] = array('d', (min(spread * scale, max(0.0, mean - DELAY_FLOOR) / NOISE_CLIP)
+                                             for mean, spread in zip(self.means, self.spreads)))
+        return self.scaled[scale]
+
+    def delays(self, text, base_delay, scale=1.0, rng=random):
+        """Per-character delays for text that add up to exactly base_delay per character"""
+        pairs = pair_indexes(text)
+        start = rng.randrange(NOISE_SAMPLES)
+        noise = islice(cycle(self.noise), start, start + len(pairs))
+        spread = map(operator.mul, map(self.spreads_for(scale).__getitem__, pairs), noise)
+        relative = array('d', map(operator.add, map(self.means.__getitem__, pairs), spread))
+        # Variance only moves time between keystrokes; the run keeps its WPM
+        total = sum(relative)
+        factor = base_delay * len(relative) / total if total else base_delay
+        return map(operator.mul, relative, repeat(factor))
+
+    def to_dict(self):
+        return {'name': self.name, 'classes': CLASS_COUNT, 'means': list(self.means), 'spreads': list(self.spreads)}
+
+    def save(self, path=MODEL_PATH):
+        """Write the model as JSON, atomically"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temporary = path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        """Read a saved model; raises ValueError if it is not one"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        size = CLASS_COUNT * CLASS_COUNT
+        try:
+            # Valid JSON of any other shape fails on one of these lookups
+            if data['classes'] != CLASS_COUNT or len(data['means']) != size or len(data['spreads']) != size:
+                raise ValueError
+            return cls(str(data['name']), data['means'], data['spreads'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"{path} is not a timing model for {CLASS_COUNT} character classes") from None
+
+
+def key_positions():
+    """Class -> (hand, finger, row, column, shifted) on a US keyboard, for the keys that have one"""
+    positions = {}
+    for row, (plain, shifted, fingers) in enumerate(KEY_ROWS):
+        for column, finger in enumerate(fingers):
+            # The number row is shifted one key to the left of the letters
+            hand = 'left' if column < (6 if row == 0 else 5) else 'right'
+            positions[char_class(plain[column])] = (hand, int(finger), row, column, False)
+            positions[char_class(shifted[column])] = (hand, int(finger), row, column, True)
+    positions[char_class(' ')] = ('thumb', 1, 4, 5, False)
+    positions[NEWLINE_CLASS] = ('right', 5, 2, 12, False)
+    positions[TAB_CLASS] = ('left', 5, 1, -1, False)
+    return positions
+
+
+def builtin_pair(before, after, positions):
+    """(mean, relative spread) of the gap between two classes, from keyboard geometry"""
+    space = char_class(' ')
+    if before == OTHER or after == OTHER:
+        return 1.3, 0.4
+    char = chr(before + 31) if before < NEWLINE_CLASS else ''
+    if char and char in '.!?' and after in (space, NEWLINE_CLASS):
+        return 1.8, 0.45  # end of a sentence
+    if char and char in ',;:' and after == space:
+        return 1.4, 0.4
+    if before == NEWLINE_CLASS:
+        return 2.0, 0.45  # start of a line
+    if after == NEWLINE_CLASS:
+        return 1.4, 0.35
+    if after == space:
+        return 0.85, 0.2  # the thumb ends a word quickly
+    if before == space:
+        return 1.1, 0.3  # the next word starts
+    hand, finger, row, _, was_shifted = positions[before]
+    next_hand, next_finger, next_row, _, shifted = positions[after]
+    rows = abs(row - next_row)
+    if before == after:
+        mean, spread = 0.95, 0.2
+    elif hand != next_hand:
+        mean, spread = 0.8, 0.2
+    elif finger == next_finger:
+        mean, spread = 1.4 + 0.15 * rows, 0.3  # one finger has to move between keys
+    else:
+        mean, spread = 1.0 + 0.08 * rows, 0.22
+    if shifted and not was_shifted:
+        mean += 0.35  # reach for Shift
+    if next_row == 0:
+        mean += 0.15  # number row
+    return mean, spread
+
+
+def builtin_model():
+    """The shipped model: a touch typist on a US keyboard"""
+    positions = key_positions()
+    means = array('d', repeat(1.0, CLASS_COUNT * CLASS_COUNT))
+    spreads = array('d', repeat(0.3, CLASS_COUNT * CLASS_COUNT))
+    for before in range(CLASS_COUNT):
+        for after in range(CLASS_COUNT):
+            mean, spread = builtin_pair(before, after, positions)
+            means[before * CLASS_COUNT + after] = mean
+            spreads[before * CLASS_COUNT + after] = mean * spread
+    return BigramModel('builtin', means, spreads)
+
+
+def learn(sessions, prior=None, min_samples=5, name='learned'):
+    """Fit a model to recorded (text, times) sessions, times[i] being when text[i] was pressed
+
+    Gaps are measured relative to each session's median, so fast and slow
+    sessions can be mixed. Pairs seen fewer than min_samples times lean
+    towards prior (the built-in model by default) in proportion.
+    """
+    prior = prior or builtin_model()
+    size = CLASS_COUNT * CLASS_COUNT
+    counts = array('d', repeat(0.0, size))
+    sums = array('d', repeat(0.0, size))
+    squares = array('d', repeat(0.0, size))
+    for text, times in sessions:
+        gaps = [(times[i] - times[i - 1], i) for i in range(1, min(len(text), len(times)))]
+        gaps = [(gap, i) for gap, i in gaps if 0 < gap <= MAX_GAP]
+        if len(gaps) < 2:
+            continue
+        median = statistics.median(gap for gap, _ in gaps)
+        pairs = pair_indexes(text)
+        for gap, i in gaps:
+            pair = pairs[i]
+            relative = gap / median
+            counts[pair] += 1
+            sums[pair] += relative
+            squares[pair] += relative * relative
+
+    means = array('d', prior.means)
+    spreads = array('d', prior.spreads)
+    for pair in range(size):
+        count = counts[pair]
+        if not count:
+            continue
+        mean = sums[pair] / count
+        spread = math.sqrt(max(0.0, squares[pair] / count - mean * mean))
+        weight = count / (count + min_samples)
+        means[pair] = weight * mean + (1 - weight) * prior.means[pair]
+        spreads[pair] = weight * spread + (1 - weight) * prior.spreads[pair]
+    return BigramModel(name, means, spreads)
+
+
+_default = None
+
+
+def default_model():
+    """The learned model at MODEL_PATH if there is a readable one, else the built-in one; built once"""
+    global _default
+    if _default is None:
+        try:
+            _default = BigramModel.load()
+        except (OSError, ValueError):
+            _default = builtin_model()
+    return _default
+
+
+def read_sessions(path):
+    """Sessions from a JSON-lines recording: one {"text": ..., "times": [...]} per line
+
+    A binary session file (session_file.py) is read as one session.
+    """
+    if is_session_file(path):
+        with SessionReader(path) as session:
+            yield session.timing()
+        return
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                session = json.loads(line)
+                try:
+                    text, times = session['text'], array('d', session['times'])
+                    if not isinstance(text, str):
+                        raise TypeError
+                except (KeyError, TypeError):
+                    raise ValueError(f"{path} holds a line that is not a recorded session") from None
+                yield text, times
+
+
+def record(path):
+    """Record typing sessions in a Tk window, appending one JSON line per session to path"""
+    keys = []  # (character, seconds)
+
+    def undo():
+        if keys:
+            keys.pop()
+
+    def save():
+        message = None
+        if len(keys) > 1:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'text': ''.join(char for char, _ in keys),
+                                    'times': [when for _, when in keys]}) + '\n')
+            message = f"Saved a session of {len(keys)} keys to {path}"
+        keys.clear()
+        return message
+
+    capture_keys("Timing model recorder - type naturally, Ctrl+S saves a session",
+                 "Type anything the way you normally do. Ctrl+S saves the session and starts a new one.",
+                 lambda char, when: keys.append((char, when)), undo, save)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record typing and learn the bigram timing model used for variance")
+    commands = parser.add_subparsers(dest='command', required=True)
+    recorder = commands.add_parser('record', help="record sessions in a local window (needs a display)")
+    recorder.add_argument('sessions', help="JSON-lines file to append sessions to")
+    learner = commands.add_parser('learn', help="fit the model to recorded sessions and make it the default")
+    learner.add_argument('sessions', nargs='+',
+                         help="JSON-lines files written by 'record', or session files (session_file.py)")
+    learner.add_argument('-o', '--output', default=MODEL_PATH, help=f"where to save the model (default: {MODEL_PATH})")
+    learner.add_argument('--min-samples', type=int, default=5,
+                         help="pairs seen fewer times than this lean towards the built-in model (default: 5)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        record(args.sessions)
+        return 0
+    try:
+        sessions = [session for path in args.sessions for session in read_sessions(path)]
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    model = learn(sessions, min_samples=args.min_samples)
+    model.save(args.output)
+    if os.path.abspath(args.output) == os.path.abspath(MODEL_PATH):
+        # Cached plans with variance were compiled with the old model
+        PlanCache().clear()
+    keys = sum(len(text) for text, _ in sessions)
+    print(f"Learned from {len(sessions)} sessions ({keys} keys); saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import collections
+import sys
+import threading
+import time
+
+
+class UIUpdatePump:
+    """Carries updates from worker threads to Tk, applied only on the main thread
+
+    Workers call post() and call(), which only append to a deque (atomic in
+    CPython, so no lock is taken on the typing hot path). A root.after() loop
+    drains the deque, keeps just the newest value per key and hands it to the
+    key's handler at most max_rate times per second. A handler that raises
+    is reported like any other Tk callback error; the pump keeps running.
+    """
+
+    def __init__(self, root, max_rate=20, poll_ms=15):
+        self.root = root
+        self.min_interval = 1.0 / max_rate
+        self.poll_ms = poll_ms
+        self.queue = collections.deque()
+        self.handlers = {}
+        self.pending = {}
+        self.last_applied = {}
+        self.job = None
+
+    def register(self, key, handler):
+        """Route values posted under key to handler(*values) on the main thread"""
+        self.handlers[key] = handler
+
+    def post(self, key, *values):
+        """Queue a coalescable update from any thread"""
+        self.queue.append((key, values))
+
+    def call(self, function, *args):
+        """Queue a one-off call that runs on the main thread, in order, never coalesced"""
+        self.queue.append((None, (function, args)))
+
+    def call_sync(self, function, *args, timeout=5.0):
+        """Run function(*args) on the main thread and wait for its result (worker threads only)"""
+        done = threading.Event()
+        outcome = []
+
+        def run():
+            try:
+                outcome.append((True, function(*args)))
+            except Exception as e:
+                outcome.append((False, e))
+            finally:
+                done.set()
+
+        self.call(run)
+        if not done.wait(timeout):
+            raise TimeoutError("the Tk main loop did not answer")
+        succeeded, value = outcome[0]
+        if not succeeded:
+            raise value
+        return value
+
+    def start(self):
+        """Begin draining the queue from the Tk event loop"""
+        if self.job is None:
+            self.job = self.root.after(self.poll_ms, self.pump)
+
+    def stop(self):
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+
+    def pump(self):
+        """Drain queued updates; runs on the main thread via root.after"""
+        try:
+            queue = self.queue
+            while queue:
+                key, values = queue.popleft()
+                if key is None:
+                    # Updates posted before a call must not land after it
+                    self.flush()
+                    function, args = values
+                    self.run(function, *args)
+                else:
+                    self.pending[key] = values
+
+            now = time.monotonic()
+            for key in list(self.pending):
+                if now - self.last_applied.get(key, float('-inf')) >= self.min_interval:
+                    self.apply(key, now)
+        finally:
+            # A handler may have stopped the pump
+            if self.job is not None:
+                self.job = self.root.after(self.poll_ms, self.pump)
+
+    def flush(self):
+        """Apply every pending update immediately"""
+        now = time.monotonic()
+        for key in list(self.pending):
+            self.apply(key, now)
+
+    def apply(self, key, now):
+        values = self.pending.pop(key)
+        self.last_applied[key] = now
+        self.run(self.handlers[key], *values)
+
+    def run(self, handler, *args):
+        try:
+            handler(*args)
+        except Exception:
+            self.root.report_callback_exception(*sys.exc_info())
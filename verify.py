@@ -0,0 +1,116 @@
+import sys
+from functools import partial
+
+from incremental import DOCUMENT_END, SELECT_ALL, diff_opcodes, plan_edits
+
+# Key chord that copies the selection; SELECT_ALL and the repairs' navigation come from incremental
+COPY = ('command', 'c') if sys.platform == 'darwin' else ('ctrl', 'c')
+DESELECT = DOCUMENT_END
+
+# Command-line clipboard readers, tried in order
+CLIPBOARD_COMMANDS = (
+    ('wl-paste', '--no-newline'),
+    ('xclip', '-selection', 'clipboard', '-o'),
+    ('xsel', '--clipboard', '--output'),
+    ('pbpaste',),
+    ('powershell', '-NoProfile', '-Command', 'Get-Clipboard -Raw'),
+)
+
+
+def parse_chord(text):
+    """'ctrl+a' -> ('ctrl', 'a')"""
+    keys = tuple(key.strip().lower() for key in text.split('+') if key.strip())
+    if not keys:
+        raise ValueError(f"Empty key chord '{text}'")
+    return keys
+
+
+def format_chord(keys):
+    return '+'.join(keys)
+
+
+def _run_clipboard_command(command):
+    import subprocess
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.decode('utf-8', errors='replace')
+
+
+def command_clipboard_reader():
+    """Clipboard reader using the first installed command-line tool, or None"""
+    # Imported here: only needed when verifying outside the GUI
+    import shutil
+    for command in CLIPBOARD_COMMANDS:
+        if shutil.which(command[0]):
+            return partial(_run_clipboard_command, command)
+    return None
+
+
+class VerifyResult:
+    """Outcome of reading back and repairing a typed text"""
+
+    def __init__(self, verified, passes, mismatches, keystrokes, error=None):
+        self.verified = verified  # the target matched the source when last read back
+        self.passes = passes  # repair passes run
+        self.mismatches = mismatches  # differing ranges found on the first read-back
+        self.keystrokes = keystrokes  # keys sent to repair them
+        self.error = error  # why verification stopped early, if it did
+
+    def summary(self):
+        if self.error is not None:
+            return self.error
+        if not self.passes:
+            return "verified"
+        if self.verified:
+            return f"fixed {self.mismatches} ranges with {self.keystrokes} keystrokes"
+        return f"still differs after {self.passes} repair passes"
+
+
+class Verifier:
+    """Reads back what landed in the target with select-all and copy, and retypes only what is wrong"""
+
+    def __init__(self, read_clipboard, select_chord=SELECT_ALL, copy_chord=COPY, max_passes=2, settle=0.2):
+        self.read_clipboard = read_clipboard  # returns the clipboard text, or None
+        self.select_chord = select_chord
+        self.copy_chord = copy_chord
+        self.max_passes = max_passes
+        # Seconds for the target to catch up with queued keys, and for the clipboard to update
+        self.settle = settle
+
+    def read_back(self, engine):
+        """Text the target holds now, or None if cancelled or the clipboard is unreadable"""
+        control = engine.control
+        if not control.hold(self.settle):
+            return None
+        engine.backend.hotkey(*self.select_chord)
+        engine.backend.hotkey(*self.copy_chord)
+        if not control.hold(self.settle):
+            return None
+        # Drop the selection so the next keystroke cannot replace everything
+        engine.backend.hotkey(*DESELECT)
+        text = self.read_clipboard()
+        return None if text is None else text.replace('\r\n', '\n')
+
+    def run(self, engine, expected, wpm, use_variance, profile):
+        """Verify the target holds expected, repairing up to max_passes times"""
+        mismatches = keystrokes = 0
+        for passes in range(self.max_passes + 1):
+            actual = self.read_back(engine)
+            if actual is None:
+                error = "verification cancelled" if engine.control.cancelled else "could not read back the target"
+                return VerifyResult(False, passes, mismatches, keystrokes, error)
+            if actual == expected:
+                return VerifyResult(True, passes, mismatches, keystrokes)
+            if passes == self.max_passes:
+                break
+            if not passes:
+                mismatches = sum(1 for _ in diff_opcodes(actual, expected))
+            plan = plan_edits(actual, expected, select_all=self.select_chord)
+            keystrokes += plan.keystrokes
+            if not engine.run_edits(plan.compile(wpm, use_variance, profile)).completed:
+                return VerifyResult(False, passes + 1, mismatches, keystrokes, "verification cancelled")
+        return VerifyResult(False, self.max_passes, mismatches, keystrokes)
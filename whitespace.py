@@ -0,0 +1,123 @@
+from incremental import KEYS, TYPE, EditPlan
+
+
+class EditorPreset:
+    """How a target editor reacts to typing: auto-indent, auto-closing brackets and backspace"""
+
+    def __init__(self, name, auto_indent=False, indent_after='', dedent_words=(), auto_close=None,
+                 indent_unit='    ', backspace_unit=1, trims_blank_lines=False):
+        self.name = name
+        self.auto_indent = auto_indent  # Enter copies the current line's indentation
+        self.indent_after = indent_after  # ... plus one indent_unit after lines ending in these
+        self.dedent_words = frozenset(dedent_words)  # ... minus one unit after lines starting with these
+        self.auto_close = auto_close or {}  # opener -> closer inserted after the cursor
+        self.indent_unit = indent_unit
+        # Backspace in leading spaces deletes back to the previous multiple of this
+        self.backspace_unit = backspace_unit
+        self.trims_blank_lines = trims_blank_lines  # Enter on a whitespace-only line empties it
+
+    def next_indent(self, line):
+        """Indentation the editor inserts after Enter at the end of line"""
+        if not self.auto_indent:
+            return ''
+        indent = line[:len(line) - len(line.lstrip(' \t'))]
+        stripped = line.strip()
+        if stripped and stripped[-1] in self.indent_after:
+            return indent + self.indent_unit
+        if stripped.split(' ', 1)[0] in self.dedent_words and indent.endswith(self.indent_unit):
+            return indent[:-len(self.indent_unit)]
+        return indent
+
+    def closer_for(self, char, before):
+        """Closer the editor adds when char is typed after before, or None"""
+        closer = self.auto_close.get(char)
+        if closer is not None and char == closer and before[-1:].isalnum():
+            return None  # quotes do not auto-close right after a word, e.g. don't
+        return closer
+
+    def backspace(self, indent, column):
+        """Column of the cursor after one Backspace at column inside leading indent"""
+        unit = self.backspace_unit
+        if unit > 1 and indent[:column].strip(' ') == '' and column:
+            return (column - 1) // unit * unit
+        return column - 1
+
+
+BRACKETS = {'(': ')', '[': ']', '{': '}'}
+QUOTES = {'"': '"', "'": "'"}
+
+EDITOR_PRESETS = {preset.name: preset for preset in (
+    # Browser text areas, Notepad, most chat boxes: what you type is what you get
+    EditorPreset('plain'),
+    EditorPreset('vscode', auto_indent=True, indent_after=':{[(', auto_close={**BRACKETS, **QUOTES},
+                 backspace_unit=4, trims_blank_lines=True),
+    # Vim with autoindent; smartindent and plugins are not modelled
+    EditorPreset('vim', auto_indent=True, trims_blank_lines=True),
+    EditorPreset('idle', auto_indent=True, indent_after=':',
+                 dedent_words=('return', 'pass', 'break', 'continue', 'raise'), backspace_unit=4,
+                 trims_blank_lines=True),
+)}
+DEFAULT_EDITOR = 'plain'
+
+
+def plan_for_editor(text, preset):
+    """EditPlan that produces text in an editor behaving like preset, with the fewest keystrokes
+
+    Indentation the editor inserts by itself is not typed again (or is
+    backspaced away where the text wants less), and brackets the editor
+    closes on its own are deleted before Enter moves them to the next line.
+    plan.saved is the number of keystrokes saved over typing text literally.
+    """
+    steps = []
+    typed = []  # characters of the TYPE step being built
+
+    def flush():
+        if typed:
+            steps.append((TYPE, ''.join(typed)))
+            typed.clear()
+
+    indent = ''  # auto-indentation the editor put on the current line
+    lines = text.split('\n')
+    for number, line in enumerate(lines):
+        if number:
+            typed.append('\n')
+        if not line and preset.trims_blank_lines and number < len(lines) - 1:
+            # Leave the auto-indentation alone: the next Enter empties this line and keeps the indent
+            indent = preset.next_indent(indent)
+            continue
+
+        # Keep the part of the auto-indentation the line wants, backspace the rest
+        body = line.lstrip(' \t')
+        wanted = line[:len(line) - len(body)]
+        column = len(indent)
+        presses = 0
+        while column and indent[:column] != wanted[:column]:
+            column = preset.backspace(indent, column)
+            presses += 1
+        if presses:
+            flush()
+            steps.append((KEYS, 'backspace', presses))
+        typed.append(wanted[column:])
+
+        pending = []  # closers the editor inserted to the right of the cursor
+        for index, char in enumerate(body):
+            if len(pending) > 1 and body[index:] == ''.join(reversed(pending)):
+                # The rest of the line is already there: jump over it instead of typing it
+                flush()
+                steps.append((KEYS, 'end', 1))
+                pending.clear()
+                break
+            typed.append(char)
+            if pending and char == pending[-1]:
+                pending.pop()  # the editor types over its own closer
+                continue
+            closer = preset.closer_for(char, body[:index])
+            if closer is not None:
+                pending.append(closer)
+        if pending:
+            # Remove them before Enter pushes them onto the next line
+            flush()
+            steps.append((KEYS, 'delete', len(pending)))
+        indent = preset.next_indent(line)
+    flush()
+    return EditPlan(steps, '', text)